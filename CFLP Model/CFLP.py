@@ -1,35 +1,87 @@
 import geopandas as gpd
 import pandas as pd
 import numpy as np
-from geopy.distance import geodesic
-from pyscipopt import Model, quicksum, multidict
+import os
+import sys
+from pyscipopt import Model, multidict
 from pyscipopt import SCIP_PARAMEMPHASIS, SCIP_PARAMSETTING
 import json
+import tempfile
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Shared'))
+from distance_cache import CACHE_DIR, cached_centroids, cached_distance_matrix
+from stage_io import read_stage
+from telemetry import IncumbentLog, SolveTelemetry
+from lagrangian import LagrangianCFLP
+from screening import screen_sites
 
 class CFLPModel:
-    def __init__(self, pu_path, schools_path, sgr_level='none', include_dsa=False):
+    def __init__(self, pu_path, schools_path, sgr_level='none', include_dsa=False, metric='geodesic', cache_dir=CACHE_DIR,
+                 k_nearest=None, radius=None, solver_params=None, open_hint=None, lower_band=0.7, upper_band=1.05,
+                 new_sites=1, backend='scip', screen=None, screen_top=None, existing_sites=None, site_capacity=1550,
+                 context=None):
         self.pu_path = pu_path
         self.schools_path = schools_path
         self.sgr_level = self._parse_sgr_level(sgr_level)
         self.include_dsa = include_dsa
-        self.existing_site_capacities = {
+        self.metric = metric
+        # Each open facility must be filled to between lower_band and upper_band of its capacity
+        self.lower_band = lower_band
+        self.upper_band = upper_band
+        self.cache_dir = cache_dir
+        # Only create x[i,j] for each unit's k nearest sites, or sites within radius miles (None = all pairs)
+        if k_nearest is not None and k_nearest < 1:
+            raise ValueError(f'k_nearest must be at least 1, got {k_nearest}')
+        if radius is not None and radius <= 0:
+            raise ValueError(f'radius must be positive, got {radius}')
+        self.k_nearest = k_nearest
+        self.radius = radius
+        # Extra SCIP parameters applied on top of the defaults in build_model, e.g. {'limits/time': 3600}
+        self.solver_params = solver_params or {}
+        # 'scip' solves the MIP; 'lagrangian' gives a solution and lower bound in minutes (see lagrangian.py)
+        self.backend = backend
+        # Pre-screen the candidate sites ('voronoi' or 'lagrangian', see screening.py) and keep the screen_top best
+        self.screen = screen
+        self.screen_top = screen_top
+        self.screening = None
+        # MIP start: previous assignments {facility: [planning units]} and/or facilities expected to be open
+        self.warm_start = None
+        self.open_hint = set(open_hint) if open_hint is not None else None
+        # Planning units of the existing schools and their capacities ({pu_2324_84: capacity}, the high schools by
+        # default), and the capacity of a new school at any other non-Central unit
+        self.existing_site_capacities = dict(existing_sites) if existing_sites is not None else {
             45: 1400,
             507: 1510,
             602: 1340,
             566: 1240,
             290: 1335
         }
+        self.site_capacity = site_capacity
+        # Shared GeometryContext (Shared/geometry_context.py): the EPSG:4326 planning units, centroids and distances
+        # come from it instead of being rebuilt by every model, e.g. when ES, MS and HS run in one process
+        self.context = context
         if include_dsa:
             self.existing_site_capacities[584] = 500
         self.existing_sites = set(self.existing_site_capacities.keys())
-        self.facility_cap = 7 if self.include_dsa else 6
+        # The existing schools are always open, plus at most new_sites new ones. The DSA site takes one of the new
+        # sites, which keeps the original model's limit of 6 facilities (no new school) with include_dsa=True
+        self.facility_cap = len(self.existing_sites) + max(new_sites - int(include_dsa), 0)
 
-    def _parse_sgr_level(self, level):
+    @staticmethod
+    def _parse_sgr_level(level):
         return {'none': 0.0, 'half': 0.15, 'full': 0.3}.get(level.lower(), 0.0)
 
-    def load_data(self):
-        self.pu = gpd.read_file(f'../data/{self.pu_path}').set_index('pu_2324_84').to_crs('EPSG:4326')
-        self.schools = gpd.read_file(f'../data/{self.schools_path}').to_crs('EPSG:4326')
+    def load_data(self, pu=None, schools=None):
+        # pu/schools: GeoDataFrames already in memory (e.g. from the Residential Filter pipeline) instead of the files
+        if pu is None:
+            pu = read_stage(f'../data/{self.pu_path}')
+        if schools is None:
+            schools = read_stage(f'../data/{self.schools_path}')
+        if self.context is not None:
+            pu = self.context.attach(pu, 'EPSG:4326')
+        self.pu = pu.set_index('pu_2324_84').to_crs('EPSG:4326')
+        self.schools = schools.to_crs('EPSG:4326')
 
     def preprocess(self):
         self.pu['basez+gen'] = self.pu['basez'] + self.sgr_level * self.pu['student_gen']
@@ -37,79 +89,367 @@ class CFLPModel:
 
         # Set planning unit capacities
         not_central = self.pu[self.pu['Region'] != 'Central']
-        pu_dict = {idx: 1550 for idx in not_central.index}
+        pu_dict = {idx: self.site_capacity for idx in not_central.index}
         pu_dict.update(self.existing_site_capacities)
         self.J, self.M = multidict(pu_dict)
 
-        # Centroids for geodesic distances
-        self.centroids = {
-            idx: (geom.y, geom.x) for idx, geom in self.pu.geometry.centroid.items()
-        }
-        self.c = {
-            (i, j): geodesic(self.centroids[i], self.centroids[j]).miles
-            for i in self.I for j in self.J
-        }
+        # Centroid-to-site distances in miles, computed as one array (memory-mapped from the cache when unchanged)
+        if self.context is not None:
+            centroids = self.context.centroids('EPSG:4326')
+        else:
+            centroids = cached_centroids(self.pu.geometry, cache_dir=self.cache_dir)
+        self.centroids = centroids[~centroids.index.duplicated(keep='last')]
+        if self.context is not None:
+            # sliced from the context's unit-to-unit matrix, which every model sharing the context reuses
+            self.dist = self.context.unit_distances(self.I, self.J, 'EPSG:4326', metric=self.metric, units='miles')
+        else:
+            self.dist = cached_distance_matrix(
+                self.centroids.loc[self.I], self.centroids.loc[self.J],
+                metric=self.metric, units='miles', cache_dir=self.cache_dir
+            )
+        if self.screen is not None:
+            self._screen_sites()
+        self._select_arcs()
 
-    def build_model(self):
-        model = Model("CFLP")
+    def _screen_sites(self):
+        # Drop the candidate sites the screen leaves out; self.screening has the score and reason for every site
+        table = screen_sites(
+            self.screen, self.dist, [self.d[i] for i in self.I], [self.M[j] for j in self.J],
+            [j in self.existing_sites for j in self.J], self.facility_cap, self.lower_band, self.upper_band,
+            self.screen_top
+        )
+        table.insert(0, 'site', self.J)
+        self.screening = table.set_index('site')
+        kept = table['kept'].to_numpy()
+        self.dist = np.asarray(self.dist)[:, kept]
+        self.J = [j for j, keep in zip(self.J, kept) if keep]
+        self.M = {j: self.M[j] for j in self.J}
+
+    def _select_arcs(self):
+        # Pick the (i, j) pairs that get an assignment variable; arc_rule is the option the mask came from
+        dist = np.asarray(self.dist)
+        if self.k_nearest is not None and self.k_nearest < len(self.J):
+            self.arc_rule = 'k_nearest'
+            nearest = np.argpartition(dist, self.k_nearest - 1, axis=1)[:, :self.k_nearest]
+            mask = np.zeros(dist.shape, dtype=bool)
+            np.put_along_axis(mask, nearest, True, axis=1)
+        elif self.radius is not None:
+            self.arc_rule = 'radius'
+            mask = dist <= self.radius
+            # every unit keeps at least its nearest site
+            mask[np.arange(len(self.I)), dist.argmin(axis=1)] = True
+        else:
+            self.arc_rule = None
+            mask = np.ones(dist.shape, dtype=bool)
+        # existing schools are always open, so every unit keeps its arcs to them
+        mask[:, [b for b, j in enumerate(self.J) if j in self.existing_sites]] = True
 
-        x, y = {}, {}
-        for j in self.J:
-            y[j] = model.addVar(vtype="B", name=f"y({j})")
-            for i in self.I:
-                x[i, j] = model.addVar(vtype="C", name=f"x({i},{j})")
+        # unit row and site column of every arc, in the order the x variables are created (by unit, then site)
+        self.arc_mask = mask
+        self.arc_rows, self.arc_cols = np.nonzero(mask)
+        self.pruned = not mask.all()
 
-        for i in self.I:
-            model.addCons(quicksum(x[i, j] for j in self.J) == self.d[i])
+    def _widen_arcs(self):
+        '''
+        Double whichever of k_nearest or radius picked the arcs (see arc_rule) after an infeasible restricted solve,
+        until the arc set grows, so the same model is never solved twice. Once doubling can't add arcs, every arc is
+        put back. Returns False once every arc is already in the model.
+        '''
+        if not self.pruned:
+            return False
+        previous = self.arc_mask
+        longest = np.nanmax(np.asarray(self.dist))
+        while np.array_equal(self.arc_mask, previous):
+            if self.arc_rule == 'k_nearest':
+                self.k_nearest *= 2
+            elif self.arc_rule == 'radius' and self.radius <= longest:
+                self.radius *= 2
+            else:
+                self.k_nearest = self.radius = None
+            self._select_arcs()
+        return True
 
-        for j in self.M:
-            model.addCons(quicksum(x[i, j] for i in self.I) <= self.M[j] * y[j] * 1.05)
-            model.addCons(quicksum(x[i, j] for i in self.I) >= self.M[j] * y[j] * 0.7)
+    def load_warm_start(self, path):
+        # Use a previous solution, e.g. CFLP_0SGR.json from another SGR level, as the MIP start
+        with open(path) as f:
+            solution = json.load(f)
+        self.warm_start = {int(j): [int(i) for i in units] for j, units in solution['assignments'].items()}
 
-        for i, j in x:
-            model.addCons(x[i, j] <= self.d[i] * y[j])
+    def warm_start_from_gravity(self, assigned_units, schools):
+        # Use a gravity model assignment as the MIP start. assigned_units has pu_2324_84 and the
+        # assigned school name in 'assign' (school_geo.parquet); schools has the name and point of each
+        # school, and every school becomes a facility at the planning unit its point lies in
+        pu = self.pu.reset_index()[['pu_2324_84', 'geometry']]
+        sites = gpd.sjoin(schools[['name', 'geometry']].to_crs(self.pu.crs), pu, predicate='within')
+        site_for = dict(zip(sites['name'], sites['pu_2324_84']))
 
-        for j in self.existing_sites:
-            model.addCons(y[j] == 1)
+        self.warm_start = {}
+        for i, name in zip(assigned_units['pu_2324_84'], assigned_units['assign']):
+            if name in site_for:
+                self.warm_start.setdefault(int(site_for[name]), []).append(int(i))
 
-        model.addCons(quicksum(y[j] for j in self.J) <= 6)
+    def _add_warm_start(self, model):
+        # The full previous solution is kept only if it is still feasible (demand changes with the SGR level),
+        # so the open facilities are also given as a partial solution for SCIP to complete with new assignments
+        if not self.warm_start and self.open_hint is None:
+            return
+        # variable handles are only needed here, so they are fetched (in the order they were written) only for a start
+        variables = model.getVars()
+        y = dict(zip(self.J, variables[:len(self.J)]))
+        x = variables[len(self.J):]
+        arc_index = np.full(self.arc_mask.shape, -1)
+        arc_index[self.arc_rows, self.arc_cols] = np.arange(len(self.arc_rows))
+        row_of = {i: a for a, i in enumerate(self.I)}
+        column_of = {j: b for b, j in enumerate(self.J)}
 
-        model.setObjective(
-            quicksum(self.c[i, j] * x[i, j] for i in self.I for j in self.J),
-            "minimize")
+        open_sites = set()
+        if self.warm_start:
+            open_sites = {j for j in self.warm_start if j in y}
+            sol = model.createSol()
+            for j in open_sites:
+                model.setSolVal(sol, y[j], 1)
+                for i in self.warm_start[j]:
+                    k = arc_index[row_of[i], column_of[j]] if i in row_of else -1
+                    if k >= 0:
+                        model.setSolVal(sol, x[k], self.d[i])
+            model.addSol(sol)
+        if self.open_hint is not None:
+            open_sites = {j for j in self.open_hint if j in y}
+        if open_sites:
+            open_sites |= self.existing_sites
+            partial = model.createPartialSol()
+            for j in y:
+                model.setSolVal(partial, y[j], 1 if j in open_sites else 0)
+            model.addSol(partial)
+            # only the y values are known, so SCIP's default limit on unknown values would discard the start
+            model.setParam('heuristics/completesol/maxunknownrate', 1.0)
+
+    def build_model(self):
+        if self.backend == 'lagrangian':
+            self._build_lagrangian()
+            return
+        # The model is written from the arc arrays as a SCIP CIP file and read back in one call. Adding ~600k
+        # variables and constraints one at a time through PySCIPOpt took most of the build time and memory.
+        model = Model("CFLP")
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'CFLP.cip')
+            self._write_cip(path)
+            # SCIP reports the file it read; the solve output itself is controlled by display/verblevel as before
+            model.hideOutput()
+            model.readProblem(path)
+            model.hideOutput(False)
 
         model.setParam('limits/solutions', 1)
         model.setParam("presolving/maxrounds", 5)
         model.setEmphasis(SCIP_PARAMEMPHASIS.FEASIBILITY)
         model.setHeuristics(SCIP_PARAMSETTING.AGGRESSIVE)
         model.setParam("limits/gap", 0.01)
+        if self.warm_start or self.open_hint is not None:
+            # the start itself would count as the first solution and stop the solve right away
+            model.setParam('limits/solutions', -1)
+        for name, value in self.solver_params.items():
+            model.setParam(name, value)
+
+        self._add_warm_start(model)
 
         self.model = model
-        self.model.data = x, y
 
-    def optimize(self):
+    def _write_cip(self, path):
+        '''
+        Write the model in SCIP's CIP format. The variables are y(j) for every site and x(i,j) for every arc,
+        in arc order; every constraint over an index range is one slice of the arc arrays.
+        '''
+        rows, cols = self.arc_rows, self.arc_cols
+        cost = np.asarray(self.dist)[rows, cols].tolist()
+        demand = [float(self.d[i]) for i in self.I]
+        arc_demand = np.asarray(demand)[rows].tolist()
+        x = [f'<x({i},{j})>' for i, j in zip(np.asarray(self.I)[rows].tolist(), np.asarray(self.J)[cols].tolist())]
+        y = [f'<y({j})>' for j in self.J]
+
+        # arcs are sorted by unit; the arcs of site b are by_site[site_start[b]:site_start[b + 1]]
+        unit_start = np.searchsorted(rows, np.arange(len(self.I) + 1)).tolist()
+        by_site = np.argsort(cols, kind='stable')
+        site_start = np.searchsorted(cols[by_site], np.arange(len(self.J) + 1)).tolist()
+        by_site = by_site.tolist()
+
+        with open(path, 'w') as f:
+            f.write('STATISTICS\n  Problem name     : CFLP\nOBJECTIVE\n  Sense            : minimize\nVARIABLES\n')
+            # existing schools are always open
+            f.writelines(f'  [binary] {y[b]}: obj=0, original bounds=[{int(j in self.existing_sites)},1]\n'
+                         for b, j in enumerate(self.J))
+            f.writelines(f'  [continuous] {name}: obj={c!r}, original bounds=[0,+inf]\n' for name, c in zip(x, cost))
+
+            f.write('CONSTRAINTS\n')
+            # every unit's demand is fully assigned
+            f.writelines(f'  [linear] <demand({i})>: {" +".join(v + "[C]" for v in x[unit_start[a]:unit_start[a + 1]])} '
+                         f'== {demand[a]!r};\n' for a, i in enumerate(self.I))
+            # each site is filled to between lower_band and upper_band of its capacity when open
+            for b, j in enumerate(self.J):
+                units = ' +'.join(x[k] + '[C]' for k in by_site[site_start[b]:site_start[b + 1]])
+                f.write(f'  [linear] <upper({j})>: {units} -{float(self.M[j] * self.upper_band)!r}{y[b]}[B] <= 0;\n')
+                f.write(f'  [linear] <lower({j})>: {units} -{float(self.M[j] * self.lower_band)!r}{y[b]}[B] >= 0;\n')
+            # x(i,j) <= d(i) y(j), as variable bound constraints (units with no students get x = 0 from the demand row)
+            f.writelines(f'  [varbound] <link({name[3:-2]})>: {name}[C] -{d!r}{y[b]}[B] <= 0;\n'
+                         for name, d, b in zip(x, arc_demand, cols.tolist()) if d > 0)
+            f.write(f'  [linear] <facilities>: {" +".join(v + "[B]" for v in y)} <= {self.facility_cap};\n')
+            f.write('END\n')
+
+    def _build_lagrangian(self):
+        # same data as the MIP, as arrays: distances on the selected arcs (inf elsewhere), demand and capacity
+        cost = np.where(self.arc_mask, np.asarray(self.dist), np.inf)
+        self.model = LagrangianCFLP(
+            cost, [self.d[i] for i in self.I], [self.M[j] for j in self.J],
+            [j in self.existing_sites for j in self.J], self.facility_cap, self.lower_band, self.upper_band
+        )
+
+    def optimize(self, log_path=None, solution_dir=None, gap=None, time_limit=None, log_interval=5.0):
+        '''
+        log_path: stream the primal/dual bound, gap, node count and elapsed time to this JSON Lines file
+        solution_dir: write every improving solution there (incumbent_<k>.json) as soon as it is found
+        gap, time_limit: stop once the relative gap is at most gap or after time_limit seconds, keeping the best
+            solution so far. Either one lifts the one-solution limit from build_model, so the solve keeps
+            improving on the first feasible solution until a target is reached.
+        time_limit (or solver_params['limits/time']) covers the whole call: the re-solves after an infeasible
+        restricted arc set only get the time that is left, and the solution is None if none is left.
+        See telemetry.py; the records found are left in self.telemetry.
+        With backend='lagrangian', gap defaults to 0.01 and time_limit to solver_params['limits/time'], the log
+        records count subgradient iterations instead of nodes, and the solution also has its lower_bound and gap.
+        '''
+        limit = time_limit if time_limit is not None else self.solver_params.get('limits/time')
+        deadline = None if limit is None else time.perf_counter() + limit
+        if self.backend == 'lagrangian':
+            return self._optimize_lagrangian(log_path, solution_dir, gap, deadline, log_interval)
+        return self._optimize_scip(log_path, solution_dir, gap, time_limit is not None, deadline, log_interval)
+
+    @staticmethod
+    def _time_left(deadline):
+        # seconds left before deadline, None without one
+        return None if deadline is None else deadline - time.perf_counter()
+
+    def _optimize_scip(self, log_path, solution_dir, gap, timed, deadline, log_interval):
+        remaining = self._time_left(deadline)
+        if remaining is not None and remaining <= 0:
+            # the time ran out on earlier attempts with too few arcs
+            self.solution = None
+            return
+        if gap is not None or timed:
+            self.model.setParam('limits/solutions', -1)
+        if gap is not None:
+            self.model.setParam('limits/gap', gap)
+        if remaining is not None:
+            self.model.setParam('limits/time', remaining)
+
+        self.telemetry = None
+        if log_path is not None or solution_dir is not None:
+            if solution_dir is not None:
+                os.makedirs(solution_dir, exist_ok=True)
+            self.telemetry = SolveTelemetry(log_path, solution_dir, describe=self._solution_from, interval=log_interval)
+            self.model.includeEventhdlr(self.telemetry, 'telemetry', 'streams solve progress and incumbents')
+
         self.model.optimize()
-        x, y = self.model.data
-        sol = self.model.getBestSol()
+        if self.telemetry is not None:
+            self.telemetry.finish()
+
+        # A restricted arc set can cut off every feasible assignment; add pruned arcs back and re-solve
+        if self.model.getStatus() == 'infeasible' and self._widen_arcs():
+            self.build_model()
+            return self._optimize_scip(log_path, solution_dir, gap, timed, deadline, log_interval)
+
+        # e.g. a time limit was hit before any feasible solution was found
+        if self.model.getNSols() == 0:
+            self.solution = None
+            return
+
+        self.solution = {'solution_number': 1, **self._solution_from(self.model.getBestSol())}
+
+    def _optimize_lagrangian(self, log_path, solution_dir, gap, deadline, log_interval):
+        # self.telemetry has the same incumbents, log_path and solution_dir as with SCIP (see telemetry.py)
+        remaining = self._time_left(deadline)
+        if remaining is not None and remaining <= 0:
+            self.solution = None
+            return
+        self.telemetry = None
+        if log_path is not None or solution_dir is not None:
+            if solution_dir is not None:
+                os.makedirs(solution_dir, exist_ok=True)
+            self.telemetry = IncumbentLog(log_path, solution_dir, describe=self._solution_from_flows)
+        result = self.model.solve(
+            gap=0.01 if gap is None else gap,
+            time_limit=remaining,
+            log_path=log_path, on_incumbent=self.telemetry.add if self.telemetry is not None else None,
+            log_interval=log_interval
+        )
+
+        # as with SCIP, add pruned arcs back when the restricted arcs leave no feasible assignment
+        if result['objective'] is None and result['status'] != 'timelimit' and self._widen_arcs():
+            self.build_model()
+            return self._optimize_lagrangian(log_path, solution_dir, gap, deadline, log_interval)
 
+        if result['objective'] is None:
+            self.solution = None
+            return
+
+        self.solution = {'solution_number': 1, **self._solution_from_flows(result['flows']),
+                         'lower_bound': result['lower_bound'], 'gap': result['gap']}
+
+    def solution_values(self, sol):
+        '''
+        Values of a SCIP solution as dense arrays: x by arc (aligned with arc_rows/arc_cols) and y by site.
+        SCIP writes the nonzero values in one call, which are then placed by their variable names.
+        '''
+        x, y = np.zeros(len(self.arc_rows)), np.zeros(len(self.J))
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'solution.sol')
+            self.model.writeSol(sol, path, write_zeros=False)
+            values = pd.read_csv(path, sep=r'\s+', skiprows=1, header=None, usecols=[0, 1], names=['name', 'value'])
+
+        names = values['name'].str.extract(r'^([xy])\((-?\d+)(?:,(-?\d+))?\)$')
+        is_y = (names[0] == 'y').to_numpy()
+        sites = pd.Index(self.J)
+        y[sites.get_indexer(names.loc[is_y, 1].astype(int))] = values.loc[is_y, 'value']
+
+        is_x = (names[0] == 'x').to_numpy()
+        arc_index = np.full(self.arc_mask.shape, -1)
+        arc_index[self.arc_rows, self.arc_cols] = np.arange(len(self.arc_rows))
+        units = pd.Index(self.I).get_indexer(names.loc[is_x, 1].astype(int))
+        x[arc_index[units, sites.get_indexer(names.loc[is_x, 2].astype(int))]] = values.loc[is_x, 'value']
+        return x, y
+
+    def _solution_from(self, sol):
+        # open facilities, planning units assigned to each and their current enrollment, from a SCIP solution
+        x, _ = self.solution_values(sol)
+        assigned = np.flatnonzero(x > 0.5)
+        assignments = {}
+        for a, b in zip(self.arc_rows[assigned].tolist(), self.arc_cols[assigned].tolist()):
+            assignments.setdefault(self.J[b], []).append(self.I[a])
+        return self._describe(self.model.getSolObjVal(sol), assignments)
+
+    def _solution_from_flows(self, flows):
+        # same from a Lagrangian backend solution: {site column: {unit row: students}}
         assignments = {}
-        for (i, j) in x:
-            if self.model.getSolVal(sol, x[i, j]) > 0.5:
-                assignments.setdefault(j, []).append(i)
+        objective = 0.0
+        dist = np.asarray(self.dist)
+        for b, units in flows.items():
+            for a, amount in units.items():
+                objective += float(dist[a, b]) * amount
+                if amount > 0.5:
+                    assignments.setdefault(self.J[b], []).append(self.I[a])
+        return self._describe(objective, assignments)
 
+    def _describe(self, objective, assignments):
         student_counts = {
-            j: sum(self.pu.loc[i, 'basez'] for i in i_list)
+            j: int(sum(self.pu.loc[i, 'basez'] for i in i_list))
             for j, i_list in assignments.items()
         }
 
-        self.solution = {
-            'solution_number': 1,
+        return {
+            'objective': objective,
             'facilities': list(assignments.keys()),
             'assignments': assignments,
             'student_count': student_counts
         }
 
-    def export_results(self):
+    def export_results(self, out_dir='.', name=None):
         pu_copy = self.pu.copy()
         pu_to_facility = {
             pu_id: facility
@@ -117,12 +457,16 @@ class CFLPModel:
             for pu_id in pu_list
         }
         pu_copy['assignment'] = pu_copy.index.map(pu_to_facility)
-        sgr_label = f"{int(self.sgr_level * 100)}SGR"
-        pu_copy.to_file(f"CFLP_{sgr_label}.geojson", driver="GeoJSON")
+        if name is None:
+            name = f"CFLP_{int(self.sgr_level * 100)}SGR"
+        pu_copy.to_file(os.path.join(out_dir, f"{name}.geojson"), driver="GeoJSON")
 
-        with open(f"CFLP_{sgr_label}.json", "w") as f:
+        with open(os.path.join(out_dir, f"{name}.json"), "w") as f:
             json.dump(self.solution, f, indent=2)
 
+        if self.screening is not None:
+            self.screening.to_csv(os.path.join(out_dir, f"{name}_screening.csv"))
+
 
 def main():
     pu_file = input("Enter the filename of the planning units GeoJSON: ").strip()
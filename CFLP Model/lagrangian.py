@@ -0,0 +1,272 @@
+'''
+Lagrangian relaxation backend for the CFLP model.
+
+The demand constraints (every planning unit fully assigned) are relaxed with one multiplier per planning unit.
+What is left splits by site: each site on its own is a continuous knapsack (fill it to between its lower and upper
+band with the units of lowest reduced cost), and the best sites up to the facility limit are opened. That gives a
+lower bound on the optimal objective at every iteration, and the multipliers are updated by subgradient steps.
+
+The sites each iteration opens are repaired into a feasible solution by solving the assignment LP with exactly
+those sites open. The best repaired solution and the best lower bound give a solution with a known gap in
+minutes, where the full MIP can take hours.
+'''
+import json
+import math
+import time
+
+import numpy as np
+from pyscipopt import Model, quicksum
+
+from telemetry import _gap
+
+
+class LagrangianCFLP:
+    '''
+    cost: (units x sites) array of assignment costs, np.inf where a unit has no arc to a site
+    demand: students in each unit; capacity: capacity of each site
+    forced: boolean array, True for sites that are always open (the existing schools)
+    max_open: most sites that can be open, forced ones included
+    lower_band, upper_band: each open site is filled to between these shares of its capacity
+    '''
+    def __init__(self, cost, demand, capacity, forced, max_open, lower_band=0.7, upper_band=1.05):
+        self.cost = np.asarray(cost, dtype=float)
+        self.demand = np.asarray(demand, dtype=float)
+        self.forced = np.asarray(forced, dtype=bool)
+        self.max_open = max_open
+        self.lower = lower_band * np.asarray(capacity, dtype=float)
+        self.upper = upper_band * np.asarray(capacity, dtype=float)
+        # repaired solutions by set of open sites, so a set the subgradient steps keep returning to is solved once
+        self._repaired = {}
+
+    def _sites(self, lam):
+        '''
+        Best fill of every site on its own for reduced costs cost - lam: units are taken in order of reduced cost,
+        all the ones below zero up to the upper band, and more if needed to reach the lower band (the last unit
+        taken can be split). Returns each site's value (np.inf if its arcs can't reach the lower band), the unit
+        order and the amount taken from each unit in that order.
+        '''
+        reduced = self.cost - lam[:, None]
+        order = np.argsort(reduced, axis=0)
+        reduced = np.take_along_axis(reduced, order, axis=0)
+        demand = self.demand[order]
+
+        reachable = np.where(np.isfinite(reduced), demand, 0).sum(axis=0)
+        target = np.clip(np.where(reduced < 0, demand, 0).sum(axis=0), self.lower, self.upper)
+        taken = np.clip(target - (np.cumsum(demand, axis=0) - demand), 0, demand)
+
+        value = (np.where(taken > 0, reduced, 0) * taken).sum(axis=0)
+        value[reachable < self.lower] = np.inf
+        return value, order, taken
+
+    def _choose(self, value):
+        # the forced sites plus the free sites that lower the bound the most, up to the facility limit
+        free = np.flatnonzero(~self.forced & np.isfinite(value))
+        ranked = free[np.argsort(value[free], kind='stable')]
+        slots = self.max_open - int(self.forced.sum())
+        lower_bound_sites = self.forced.copy()
+        lower_bound_sites[[j for j in ranked[:slots] if value[j] < 0]] = True
+        # for repair, fill every slot even if the site's value is positive: it may still make the LP feasible
+        repair_sites = self.forced.copy()
+        repair_sites[ranked[:slots]] = True
+        return lower_bound_sites, repair_sites, ranked
+
+    def assignment_lp(self, open_sites):
+        '''
+        Exact assignment with the given sites (boolean array) open: the LP over the arcs to those sites.
+        Returns (objective, {site column: {unit row: amount}}), or None if no assignment fits the bands.
+        '''
+        key = frozenset(np.flatnonzero(open_sites).tolist())
+        if key in self._repaired:
+            return self._repaired[key]
+
+        model = Model('assignment')
+        model.hideOutput()
+        x, sites_for = {}, {i: [] for i in range(len(self.demand))}
+        for j in sorted(key):
+            for i in np.flatnonzero(np.isfinite(self.cost[:, j])).tolist():
+                x[i, j] = model.addVar(vtype='C', lb=0, obj=self.cost[i, j])
+                sites_for[i].append(j)
+
+        result = None
+        if all(sites_for[i] or self.demand[i] == 0 for i in sites_for):
+            for i, sites in sites_for.items():
+                if sites:
+                    model.addCons(quicksum(x[i, j] for j in sites) == self.demand[i])
+            for j in key:
+                units = quicksum(x[i, j] for i in np.flatnonzero(np.isfinite(self.cost[:, j])).tolist())
+                model.addCons(units >= self.lower[j])
+                model.addCons(units <= self.upper[j])
+            model.optimize()
+            if model.getStatus() == 'optimal':
+                flows = {j: {} for j in key}
+                for (i, j), var in x.items():
+                    amount = model.getVal(var)
+                    if amount > 1e-9:
+                        flows[j][i] = amount
+                result = (model.getObjVal(), flows)
+
+        self._repaired[key] = result
+        return result
+
+    def solve(self, gap=0.01, time_limit=None, max_iter=1000, patience=20, min_step=1e-4, polish=20,
+              log_path=None, on_incumbent=None, log_interval=5.0):
+        '''
+        Subgradient optimization of the multipliers, repairing the sites each iteration opens.
+        Stops once the gap between the best repaired solution and the best lower bound is at most gap, after
+        time_limit seconds or max_iter iterations, or when the step size (halved after patience iterations
+        without a better bound) drops below min_step. The best solution is then polished by swapping each
+        free open site for the polish best-ranked free sites under the best multipliers.
+
+        log_path: JSON Lines records as in telemetry.py (time, event, primal, dual, gap, plus iterations)
+        on_incumbent(record, flows): called for every new best repaired solution with its log record
+        Returns a dict with status, objective, lower_bound, gap, iterations, open (site columns) and flows.
+        '''
+        self.start = time.perf_counter()
+        self.log_path, self.on_incumbent = log_path, on_incumbent
+        self.best = None
+        self.lower_bound = -math.inf
+        self.iterations = 0
+        last_progress = -math.inf
+
+        # start from each unit's cheapest arc, so every reduced cost is non-negative
+        lam = self.cost.min(axis=1, initial=np.inf, where=np.isfinite(self.cost))
+        lam[~np.isfinite(lam)] = 0
+        best_lam, step, stall, ranked = lam, 2.0, 0, np.array([], dtype=int)
+        status = 'iterlimit'
+
+        for self.iterations in range(1, max_iter + 1):
+            value, order, taken = self._sites(lam)
+            if not np.isfinite(value[self.forced]).all():
+                status = 'infeasible'
+                break
+            bound_sites, repair_sites, ranked_now = self._choose(value)
+            bound = lam @ self.demand + value[bound_sites].sum()
+            if bound > self.lower_bound + 1e-9 * max(1.0, abs(bound)):
+                self.lower_bound, best_lam, ranked, stall = bound, lam, ranked_now, 0
+            else:
+                stall += 1
+                if stall >= patience:
+                    step, stall = step / 2, 0
+
+            for sites in (bound_sites, repair_sites):
+                self._try(sites)
+
+            if self.best is not None and _gap(self.best[0], self.lower_bound) is not None \
+                    and _gap(self.best[0], self.lower_bound) <= gap:
+                status = 'gaplimit'
+                break
+            if time_limit is not None and self.elapsed() >= time_limit:
+                status = 'timelimit'
+                break
+            if step < min_step:
+                status = 'stepsize'
+                break
+
+            # subgradient: demand minus what the open sites took from each unit
+            columns = np.flatnonzero(bound_sites)
+            assigned = np.bincount(order[:, columns].ravel(), weights=taken[:, columns].ravel(),
+                                   minlength=len(self.demand))
+            subgradient = self.demand - assigned
+            norm = subgradient @ subgradient
+            if norm < 1e-12:
+                # the relaxed solution assigns every unit exactly, so it is optimal
+                status = 'optimal'
+                break
+            upper = self.best[0] if self.best is not None else bound + abs(bound) * 0.1 + 1
+            lam = lam + step * (upper - bound) / norm * subgradient
+
+            if self.elapsed() - last_progress >= log_interval:
+                last_progress = self.elapsed()
+                self._write(self._record('progress'))
+
+        if status != 'infeasible' and self.best is not None:
+            self._polish(ranked, polish, time_limit)
+
+        record = self._record('end')
+        record['status'] = status
+        self._write(record)
+        self.multipliers = best_lam
+        return {
+            'status': record['status'],
+            'objective': self.best[0] if self.best is not None else None,
+            'lower_bound': record['dual'],
+            'gap': record['gap'],
+            'iterations': self.iterations,
+            'open': sorted(self.best[1]) if self.best is not None else [],
+            'flows': self.best[1] if self.best is not None else {}
+        }
+
+    def site_bounds(self, lam=None):
+        '''
+        Lower bound on the objective of any solution that opens each site, under multipliers lam (default: the
+        best ones found by solve): the forced sites, the site itself and the best other free sites for the
+        remaining slots. np.inf for sites that can't be filled to the lower band or can't be opened at all.
+        '''
+        lam = self.multipliers if lam is None else lam
+        value, _, _ = self._sites(lam)
+        base = lam @ self.demand + value[self.forced].sum()
+        slots = self.max_open - int(self.forced.sum())
+        bounds = np.full(len(value), np.inf)
+        bounds[self.forced] = base + np.sort(np.minimum(value[~self.forced], 0))[:slots].sum()
+        if slots < 1:
+            return bounds
+
+        free = np.flatnonzero(~self.forced & np.isfinite(value))
+        # sites that would be among the others anyway are replaced by the next best one
+        gains = np.sort(np.minimum(value[free], 0))
+        others = np.full(len(free), gains[:slots - 1].sum())
+        if slots > 1 and len(gains) >= slots:
+            among = np.minimum(value[free], 0) <= gains[slots - 2]
+            others[among] = gains[:slots].sum() - np.minimum(value[free][among], 0)
+        bounds[free] = base + value[free] + others
+        return bounds
+
+    def _try(self, sites):
+        result = self.assignment_lp(sites)
+        if result is not None and (self.best is None or result[0] < self.best[0] - 1e-9):
+            self.best = result
+            record = self._record('incumbent')
+            self._write(record)
+            if self.on_incumbent is not None:
+                self.on_incumbent(record, result[1])
+
+    def _polish(self, ranked, candidates, time_limit):
+        # swap moves: replace one free open site by one of the best-ranked closed ones, keep any improvement
+        improved = True
+        while improved:
+            improved = False
+            open_sites = np.zeros(len(self.forced), dtype=bool)
+            open_sites[list(self.best[1])] = True
+            for out in np.flatnonzero(open_sites & ~self.forced):
+                for j in ranked[:candidates]:
+                    if open_sites[j] or (time_limit is not None and self.elapsed() >= time_limit):
+                        continue
+                    swapped = open_sites.copy()
+                    swapped[[out, j]] = [False, True]
+                    before = self.best[0]
+                    self._try(swapped)
+                    if self.best[0] < before:
+                        improved = True
+                        break
+                if improved:
+                    break
+
+    def elapsed(self):
+        return time.perf_counter() - self.start
+
+    def _record(self, event):
+        primal = float(self.best[0]) if self.best is not None else None
+        dual = float(self.lower_bound) if math.isfinite(self.lower_bound) else None
+        return {
+            'time': round(self.elapsed(), 3),
+            'event': event,
+            'primal': primal,
+            'dual': dual,
+            'gap': _gap(primal, dual),
+            'iterations': self.iterations
+        }
+
+    def _write(self, record):
+        if self.log_path is not None:
+            with open(self.log_path, 'a') as f:
+                f.write(json.dumps(record) + '\n')
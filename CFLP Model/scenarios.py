@@ -0,0 +1,142 @@
+'''
+Solve a grid of CFLP scenarios (SGR level, DSA inclusion, capacity band) in parallel worker processes
+and write a summary table of objective, gap, open facilities and runtime.
+
+The grid is a CSV file with one scenario per row and the columns
+    sgr_level, include_dsa, lower_band, upper_band
+plus an optional time_limit column (seconds). See scenarios.csv for an example. Any column whose value varies
+between rows is added to the output names, and two scenarios with the same name are rejected before solving.
+
+Run from the CFLP Model folder:
+    python scenarios.py scenarios.csv --pu hs_full_geo.geojson --schools dps_hs_locations.geojson --processes 3
+'''
+import argparse
+import os
+import time
+from multiprocessing import Pool
+
+import pandas as pd
+
+from CFLP import CFLPModel
+
+# set once per worker process by _init_worker, so the planning units are not pickled for every scenario
+_pu = None
+_options = None
+
+
+def _init_worker(pu, options):
+    global _pu, _options
+    _pu = pu
+    _options = options
+
+
+NAME_COLUMNS = ['sgr_level', 'include_dsa', 'lower_band', 'upper_band']
+
+
+def scenario_name(row, extra=()):
+    # extra: the other grid columns that vary between scenarios, appended as _<column>-<value>
+    dsa = 'DSA' if row['include_dsa'] else 'noDSA'
+    name = f"CFLP_{int(row['sgr'] * 100)}SGR_{dsa}_{int(round(row['lower_band'] * 100))}-{int(round(row['upper_band'] * 100))}"
+    return name + ''.join(f'_{column}-{row[column]}' for column in extra)
+
+
+def _make_model(row, options):
+    solver_params = dict(options['solver_params'])
+    if pd.notna(row.get('time_limit')):
+        solver_params['limits/time'] = float(row['time_limit'])
+    return CFLPModel(options['pu_path'], options['schools_path'], row['sgr_level'], include_dsa=bool(row['include_dsa']),
+                     lower_band=row['lower_band'], upper_band=row['upper_band'],
+                     k_nearest=options['k_nearest'], solver_params=solver_params)
+
+
+def _solve(row):
+    start = time.perf_counter()
+    model = _make_model(row, _options)
+    model.pu = _pu.copy()
+    model.preprocess()
+    model.build_model()
+    model.optimize()
+
+    scip = model.model
+    has_solution = model.solution is not None
+    if has_solution:
+        model.export_results(out_dir=_options['out_dir'], name=row['name'])
+    return {
+        'scenario': row['name'],
+        'sgr_level': row['sgr_level'],
+        'include_dsa': bool(row['include_dsa']),
+        'lower_band': row['lower_band'],
+        'upper_band': row['upper_band'],
+        **{column: row[column] for column in _options['extra_columns']},
+        'status': scip.getStatus(),
+        'objective': scip.getObjVal() if has_solution else float('nan'),
+        'gap': scip.getGap(),
+        'open_facilities': ' '.join(str(j) for j in sorted(model.solution['facilities'])) if has_solution else '',
+        'runtime_s': time.perf_counter() - start,
+    }
+
+
+def run_scenarios(grid, pu_path, schools_path, out_dir='scenario_outputs', processes=None,
+                  k_nearest=None, solver_params=None):
+    '''
+    Solve every row of grid (a DataFrame with sgr_level, include_dsa, lower_band, upper_band and optionally
+    time_limit) and return the summary DataFrame. Results are written to out_dir, one file pair per scenario.
+    Raises a ValueError if two scenarios would write the same files.
+    '''
+    grid = grid.copy()
+    grid['sgr'] = grid['sgr_level'].map(CFLPModel._parse_sgr_level)
+    extra = [column for column in grid.columns
+             if column not in NAME_COLUMNS + ['sgr'] and grid[column].nunique(dropna=False) > 1]
+    grid['name'] = grid.apply(scenario_name, axis=1, extra=extra)
+    duplicated = grid['name'][grid['name'].duplicated()].unique()
+    if len(duplicated):
+        raise ValueError(f"Scenarios with the same output name would overwrite each other: {', '.join(duplicated)}")
+    os.makedirs(out_dir, exist_ok=True)
+
+    options = {'pu_path': pu_path, 'schools_path': schools_path, 'out_dir': out_dir,
+               'k_nearest': k_nearest, 'solver_params': solver_params or {}, 'extra_columns': extra}
+
+    # Load the planning units once, and build the distance matrix once per distinct site set (with and
+    # without DSA) so every worker memory-maps it from the cache instead of recomputing it
+    pu = None
+    for _, group in grid.groupby(grid['include_dsa'].astype(bool)):
+        model = _make_model(group.iloc[0], options)
+        if pu is None:
+            model.load_data()
+            pu = model.pu
+        model.pu = pu.copy()
+        model.preprocess()
+
+    rows = grid.to_dict('records')
+    with Pool(processes, initializer=_init_worker, initargs=(pu, options)) as pool:
+        summary = list(pool.imap(_solve, rows))
+    return pd.DataFrame(summary)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('grid', help='CSV file with one scenario per row')
+    parser.add_argument('--pu', default='hs_full_geo.geojson', help='planning units file in data/')
+    parser.add_argument('--schools', default='dps_hs_locations.geojson', help='schools file in data/')
+    parser.add_argument('--out-dir', default='scenario_outputs', help='folder for per-scenario results and the summary')
+    parser.add_argument('--processes', type=int, default=None, help='worker processes (default: one per CPU)')
+    parser.add_argument('--time-limit', type=float, default=None,
+                        help='SCIP time limit in seconds for scenarios without a time_limit column value')
+    parser.add_argument('--k-nearest', type=int, default=None, help='sparse k-nearest formulation (see README)')
+    args = parser.parse_args()
+
+    grid = pd.read_csv(args.grid)
+    solver_params = {'display/verblevel': 0}
+    if args.time_limit is not None:
+        solver_params['limits/time'] = args.time_limit
+
+    summary = run_scenarios(grid, args.pu, args.schools, out_dir=args.out_dir, processes=args.processes,
+                            k_nearest=args.k_nearest, solver_params=solver_params)
+    summary_path = os.path.join(args.out_dir, 'summary.csv')
+    summary.to_csv(summary_path, index=False)
+    print(summary.to_string(index=False))
+    print(f'Summary saved to {summary_path}')
+
+
+if __name__ == '__main__':
+    main()
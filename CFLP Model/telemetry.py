@@ -0,0 +1,118 @@
+'''
+Progress reporting for long CFLP solves: a SCIP event handler that streams the primal bound, dual bound, gap,
+node count and elapsed time to a JSON Lines log, and writes every improving solution to a file as it is found.
+'''
+import json
+import math
+import os
+
+from pyscipopt import Eventhdlr, SCIP_EVENTTYPE
+
+# SCIP reports a missing bound or gap as +/-1e20 (or infinity)
+SCIP_INFINITY = 1e19
+
+
+def _finite(value):
+    return None if value is None or not math.isfinite(value) or abs(value) >= SCIP_INFINITY else value
+
+
+def _gap(primal, dual):
+    # SCIP's gap definition, |primal - dual| / min(|primal|, |dual|)
+    if primal is None or dual is None:
+        return None
+    if primal == dual:
+        return 0.0
+    if primal * dual <= 0:
+        return None
+    return abs(primal - dual) / min(abs(primal), abs(dual))
+
+
+class SolveTelemetry(Eventhdlr):
+    '''
+    log_path: JSON Lines file, one record per line with time (s), event, primal, dual, gap, nodes and solutions.
+              'incumbent' records are written for every new best solution, 'progress' records at most every
+              interval seconds while nodes and LPs are solved, and one 'end' record with the final status.
+    solution_dir: each new best solution is written there as incumbent_<k>.json by describe(sol), a function
+                  that turns a SCIP solution into a JSON-serializable dict (e.g. open facilities and assignments)
+    '''
+    def __init__(self, log_path=None, solution_dir=None, describe=None, interval=5.0):
+        self.log_path = log_path
+        self.solution_dir = solution_dir
+        self.describe = describe
+        self.interval = interval
+        self.incumbents = []
+        self._last_progress = -math.inf
+
+    def eventinit(self):
+        # LPSOLVED too, so a long root node still reports progress
+        for event_type in (SCIP_EVENTTYPE.BESTSOLFOUND, SCIP_EVENTTYPE.NODESOLVED, SCIP_EVENTTYPE.LPSOLVED):
+            self.model.catchEvent(event_type, self)
+
+    def eventexit(self):
+        for event_type in (SCIP_EVENTTYPE.BESTSOLFOUND, SCIP_EVENTTYPE.NODESOLVED, SCIP_EVENTTYPE.LPSOLVED):
+            self.model.dropEvent(event_type, self)
+
+    def eventexec(self, event):
+        if event.getType() == SCIP_EVENTTYPE.BESTSOLFOUND:
+            record = self._record('incumbent')
+            # the primal bound is only updated after the event, so take the new solution's value
+            record['primal'] = self.model.getSolObjVal(self.model.getBestSol())
+            record['gap'] = _gap(record['primal'], record['dual'])
+            if self.solution_dir is not None and self.describe is not None:
+                path = os.path.join(self.solution_dir, f'incumbent_{len(self.incumbents) + 1}.json')
+                with open(path, 'w') as f:
+                    json.dump({**record, 'incumbent': len(self.incumbents) + 1,
+                               **self.describe(self.model.getBestSol())}, f, indent=2)
+                record['file'] = path
+            self.incumbents.append(record)
+            self._write(record)
+        elif self.model.getSolvingTime() - self._last_progress >= self.interval:
+            self._last_progress = self.model.getSolvingTime()
+            self._write(self._record('progress'))
+
+    def _record(self, event):
+        model = self.model
+        return {
+            'time': round(model.getSolvingTime(), 3),
+            'event': event,
+            'primal': _finite(model.getPrimalbound()),
+            'dual': _finite(model.getDualbound()),
+            'gap': _finite(model.getGap()),
+            'nodes': model.getNNodes(),
+            'solutions': model.getNSols()
+        }
+
+    def _write(self, record):
+        if self.log_path is not None:
+            with open(self.log_path, 'a') as f:
+                f.write(json.dumps(record) + '\n')
+
+    def finish(self):
+        # called after the solve returns; the final bounds and why SCIP stopped
+        record = self._record('end')
+        record['status'] = self.model.getStatus()
+        self._write(record)
+        return record
+
+
+class IncumbentLog:
+    '''
+    The incumbent side of SolveTelemetry for solvers that write their own log records (the Lagrangian backend in
+    lagrangian.py), so model.telemetry has the same log_path, solution_dir and incumbents whichever backend ran.
+    add(record, solution) is called with every new best solution's log record; describe(solution) is as in
+    SolveTelemetry.
+    '''
+    def __init__(self, log_path=None, solution_dir=None, describe=None):
+        self.log_path = log_path
+        self.solution_dir = solution_dir
+        self.describe = describe
+        self.incumbents = []
+
+    def add(self, record, solution):
+        record = dict(record)
+        if self.solution_dir is not None and self.describe is not None:
+            path = os.path.join(self.solution_dir, f'incumbent_{len(self.incumbents) + 1}.json')
+            with open(path, 'w') as f:
+                json.dump({**record, 'incumbent': len(self.incumbents) + 1, **self.describe(solution)}, f, indent=2)
+            record['file'] = path
+        self.incumbents.append(record)
@@ -0,0 +1,87 @@
+'''
+Checks that a restricted arc set (k_nearest / radius) that leaves the CFLP infeasible is widened until it solves,
+within the time limit of the whole solve.
+Run from the CFLP Model folder: python -m pytest test_CFLP.py
+'''
+import time
+
+import geopandas as gpd
+import numpy as np
+import pytest
+import shapely
+
+from CFLP import CFLPModel
+
+
+def line_of_units(n=4, spacing=0.01):
+    # n planning units of 10 students in a row, 0.01 degrees (about half a mile) apart
+    x0 = -78.9 + spacing * np.arange(n)
+    pu = gpd.GeoDataFrame({
+        'pu_2324_84': range(1, n + 1),
+        'Region': 'North',
+        'basez': 10,
+        'student_gen': 0,
+    }, geometry=shapely.box(x0, 36.0, x0 + spacing / 2, 36.0 + spacing / 2), crs='EPSG:4326')
+    schools = gpd.GeoDataFrame(geometry=shapely.points(x0[:1] + spacing / 4, 36.0 + spacing / 4), crs='EPSG:4326')
+    return pu, schools
+
+
+def solve(**options):
+    # unit 1 is a small existing school (7-10.5 students), new schools take 14-21, so the 40 students need
+    # two new schools that each draw on more than one unit
+    pu, schools = line_of_units()
+    model = CFLPModel(None, None, cache_dir=None, existing_sites={1: 10}, site_capacity=20, new_sites=3,
+                      solver_params={'display/verblevel': 0}, **options)
+    model.load_data(pu=pu, schools=schools)
+    model.preprocess()
+    model.build_model()
+    model.optimize()
+    return model
+
+
+def test_infeasible_k_nearest_is_widened():
+    # with k_nearest=1 every new site only reaches its own unit, below its lower band
+    model = solve(k_nearest=1)
+    assert model.solution is not None
+    assert model.k_nearest > 1 or not model.pruned
+
+
+def test_infeasible_radius_is_widened():
+    # the units are about 0.56 miles apart: 0.2 miles adds no arcs, so the radius keeps doubling to 0.8
+    model = solve(radius=0.1)
+    assert model.solution is not None
+    assert model.radius == pytest.approx(0.8)
+    assert model.pruned
+
+
+def test_radius_is_widened_when_k_covers_every_site():
+    # k_nearest covers all 4 sites, so the radius picks the arcs and is the option that has to grow
+    model = solve(k_nearest=10, radius=0.1)
+    assert model.solution is not None
+    assert model.k_nearest == 10
+    assert model.radius == pytest.approx(0.8)
+
+
+def test_time_limit_covers_the_re_solves():
+    # the first solve (k_nearest=1) is infeasible, and rebuilding the widened model uses up the time limit
+    pu, schools = line_of_units()
+    model = CFLPModel(None, None, cache_dir=None, existing_sites={1: 10}, site_capacity=20, new_sites=3,
+                      k_nearest=1, solver_params={'display/verblevel': 0})
+    model.load_data(pu=pu, schools=schools)
+    model.preprocess()
+    model.build_model()
+    build_model = model.build_model
+
+    def slow_build():
+        time.sleep(0.5)
+        build_model()
+    model.build_model = slow_build
+    model.optimize(time_limit=0.3)
+    assert model.k_nearest == 2
+    assert model.solution is None
+
+
+@pytest.mark.parametrize('options', [{'k_nearest': 0}, {'radius': 0}, {'radius': -1}])
+def test_rejects_restrictions_that_cannot_widen(options):
+    with pytest.raises(ValueError):
+        CFLPModel(None, None, **options)
@@ -0,0 +1,380 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import shapely
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Shared'))
+from distance_cache import CACHE_DIR
+from distance_matrix import euclidean
+from geometry_context import GeometryContext
+
+MAX_ITER = 200
+
+
+class GravityEngine:
+    '''
+    Array-based adjusted-Voronoi assignment for the gravity model.
+
+    distances: (n_units, n_schools) array of planning unit centroid to school distances, computed once
+    basez, student_gen: per planning unit enrollment arrays, in the same order as the distance rows
+    capacities: per school capacities, in the same order as the distance columns
+    incremental: let the balancing loops re-check only the planning units whose assignment can change
+                 (see IncrementalAssignment) instead of reassigning every unit on every pass
+    '''
+    def __init__(self, distances, basez, student_gen, capacities, incremental=False):
+        self.distances = np.asarray(distances, dtype=float)
+        self.basez = np.asarray(basez, dtype=float)
+        self.student_gen = np.asarray(student_gen, dtype=float)
+        self.capacities = np.asarray(capacities, dtype=float)
+        self.n_units, self.n_schools = self.distances.shape
+        self.incremental = incremental
+
+    def assign(self, adjust):
+        # index of the school with the lowest adjusted distance for every planning unit
+        return np.argmin(self.distances + adjust, axis=1)
+
+    def counts(self, assign, sgr):
+        # students per school, truncated to whole students like the original per-school sums
+        base = np.bincount(assign, weights=self.basez, minlength=self.n_schools)
+        gen = np.bincount(assign, weights=self.student_gen, minlength=self.n_schools)
+        return (base + gen * sgr / 100).astype(int)
+
+    def _assign_counts(self, adjust, sgr, tracker):
+        # one assignment pass, either from scratch or by updating the incremental tracker
+        if tracker is None:
+            assign = self.assign(adjust)
+            self._rechecked = self.n_units
+            return assign, self.counts(assign, sgr)
+        tracker.update(adjust)
+        self._rechecked = tracker.rechecked[-1]
+        return tracker.assign.copy(), tracker.counts(sgr)
+
+    def balance(self, sgr, lower_bound, upper_bound, step=200, max_iter=MAX_ITER, adjust=None):
+        '''
+        Shift each school's adjust offset by a fixed step until every school is within
+        lower_bound-upper_bound percent of capacity, or max_iter iterations have run.
+        Returns (assign, counts, adjust, iterations); the run succeeded if iterations <= max_iter.
+        Per-iteration diagnostics are left in self.history. adjust can be given to start from existing offsets.
+        '''
+        adjust = np.zeros(self.n_schools) if adjust is None else np.array(adjust, dtype=float)
+        counts = np.zeros(self.n_schools, dtype=int)
+        assign = self.assign(adjust)
+        low = self.capacities * lower_bound / 100
+        high = self.capacities * upper_bound / 100
+        tracker = IncrementalAssignment(self, adjust) if self.incremental else None
+        self.history = []
+
+        i = 0
+        pct_capacity = counts / self.capacities
+        while ((pct_capacity < lower_bound / 100) | (pct_capacity > upper_bound / 100)).any() and i <= max_iter:
+            assign, counts = self._assign_counts(adjust, sgr, tracker)
+            self._record(i, counts, low, high, adjust, np.full(self.n_schools, step))
+
+            under = counts <= low
+            over = ~under & (counts >= high)
+            adjust[under] -= step
+            adjust[over] += step
+            pct_capacity = counts / self.capacities
+            i += 1
+
+        return assign, counts, adjust, i
+
+    def balance_adaptive(self, sgr, lower_bound, upper_bound, step=200, grow=1.5, shrink=0.5,
+                         min_step=1, max_step=20000, max_iter=MAX_ITER, refine=8, adjust=None):
+        '''
+        Same contract as balance, but every school has its own step size: it grows while the school
+        keeps moving in the same direction and shrinks when it overshoots the capacity range, so
+        offsets close in on the range instead of oscillating around it at a fixed +/- step.
+
+        Growing steps can overshoot to larger offsets than needed, so once every school is in range
+        the offsets are scaled back toward zero by bisection (refine extra assignment passes),
+        keeping the smallest scale that stays in range. The returned iterations only count the
+        passes needed to reach the range. adjust can be given to start from existing offsets.
+        '''
+        adjust = np.zeros(self.n_schools) if adjust is None else np.array(adjust, dtype=float)
+        steps = np.full(self.n_schools, float(step))
+        prev_direction = np.zeros(self.n_schools)
+        low = self.capacities * lower_bound / 100
+        high = self.capacities * upper_bound / 100
+        tracker = IncrementalAssignment(self, adjust) if self.incremental else None
+        self.history = []
+
+        i = 0
+        while True:
+            assign, counts = self._assign_counts(adjust, sgr, tracker)
+            self._record(i, counts, low, high, adjust, steps)
+            pct_capacity = counts / self.capacities
+
+            # -1 pulls students in (under capacity), +1 pushes them out (over capacity)
+            direction = np.where(pct_capacity < lower_bound / 100, -1.0,
+                                 np.where(pct_capacity > upper_bound / 100, 1.0, 0.0))
+            i += 1
+            if not direction.any() or i > max_iter:
+                break
+
+            steps[direction * prev_direction > 0] *= grow
+            steps[direction * prev_direction < 0] *= shrink
+            np.clip(steps, min_step, max_step, out=steps)
+            adjust += direction * steps
+            prev_direction = direction
+
+        if i <= max_iter and refine:
+            assign, counts, adjust = self._refine(assign, counts, adjust, sgr, lower_bound, upper_bound, refine, tracker)
+        return assign, counts, adjust, i
+
+    def _refine(self, assign, counts, adjust, sgr, lower_bound, upper_bound, passes, tracker=None):
+        # bisect on a scale factor for the (centered) offsets; scale 1 is known to be in range
+        adjust = adjust - adjust.mean()
+        low_scale, high_scale = 0.0, 1.0
+        low = self.capacities * lower_bound / 100
+        high = self.capacities * upper_bound / 100
+        for _ in range(passes):
+            scale = (low_scale + high_scale) / 2
+            trial_assign, trial_counts = self._assign_counts(scale * adjust, sgr, tracker)
+            self._record(len(self.history), trial_counts, low, high, scale * adjust, np.zeros(self.n_schools))
+
+            pct_capacity = trial_counts / self.capacities
+            if ((pct_capacity < lower_bound / 100) | (pct_capacity > upper_bound / 100)).any():
+                low_scale = scale
+            else:
+                high_scale = scale
+                assign, counts = trial_assign, trial_counts
+        return assign, counts, high_scale * adjust
+
+    def _record(self, i, counts, low, high, adjust, steps):
+        # students outside the capacity range, per school
+        violation = np.maximum(np.maximum(low - counts, counts - high), 0)
+        self.history.append({
+            'iteration': i,
+            'out_of_range': int((violation > 0).sum()),
+            'max_violation': float(violation.max()),
+            'total_violation': float(violation.sum()),
+            'max_adjust': float(np.abs(adjust).max()),
+            'max_step': float(steps.max()),
+            'rechecked': self._rechecked
+        })
+
+    def objective(self, assign, sgr, distances=None):
+        # enrollment-weighted distance to the assigned school, divided by 10**7 like the original score
+        distances = self.distances if distances is None else distances
+        weights = self.basez + sgr * self.student_gen / 100
+        return (weights * distances[np.arange(self.n_units), assign]).sum() / 10**7
+
+
+class IncrementalAssignment:
+    '''
+    Assignment state that is updated in place when school offsets change, instead of recomputed.
+
+    For every planning unit it keeps its assigned school, that school's adjusted distance (best) and
+    a lower bound on the adjusted distance to any other school (second). When offsets change by delta,
+    a unit can only switch schools if best + delta[assigned] is no longer strictly below
+    second + (the largest decrease among the other schools), so only those units are re-checked
+    against every school. Per-school enrollment totals are updated by the moved units only.
+    Results are identical to a full reassignment.
+    '''
+    def __init__(self, engine, adjust):
+        self.engine = engine
+        self.adjust = np.array(adjust, dtype=float)
+        self.rechecked = []
+
+        self.assign, self.best, self.second = self._rank(engine.distances + self.adjust)
+        self.base = np.bincount(self.assign, weights=engine.basez, minlength=engine.n_schools)
+        self.gen = np.bincount(self.assign, weights=engine.student_gen, minlength=engine.n_schools)
+
+    def _rank(self, scores):
+        # argmin (first index on ties, like np.argmin), lowest score and second lowest score per row
+        assign = np.argmin(scores, axis=1)
+        rows = np.arange(len(scores))
+        best = scores[rows, assign]
+        if scores.shape[1] == 1:
+            return assign, best, np.full(len(scores), np.inf)
+        scores[rows, assign] = np.inf
+        return assign, best, scores.min(axis=1)
+
+    def update(self, adjust):
+        adjust = np.asarray(adjust, dtype=float)
+        delta = adjust - self.adjust
+        self.adjust = adjust.copy()
+        if not delta.any():
+            self.rechecked.append(0)
+            return
+
+        # largest decrease among the schools other than each unit's own
+        order = np.argsort(delta)
+        lowest, second_lowest = delta[order[0]], delta[order[1]] if len(delta) > 1 else np.inf
+        other_drop = np.minimum(np.where(self.assign == order[0], second_lowest, lowest), 0)
+
+        self.best += delta[self.assign]
+        self.second += other_drop
+        rows = np.nonzero(self.best >= self.second)[0]
+        self.rechecked.append(len(rows))
+        if not len(rows):
+            return
+
+        new_assign, self.best[rows], self.second[rows] = self._rank(self.engine.distances[rows] + adjust)
+        moved = new_assign != self.assign[rows]
+        units, old, new = rows[moved], self.assign[rows][moved], new_assign[moved]
+
+        n = self.engine.n_schools
+        basez, student_gen = self.engine.basez[units], self.engine.student_gen[units]
+        self.base += np.bincount(new, weights=basez, minlength=n) - np.bincount(old, weights=basez, minlength=n)
+        self.gen += np.bincount(new, weights=student_gen, minlength=n) - np.bincount(old, weights=student_gen, minlength=n)
+        self.assign[rows] = new_assign
+
+    def counts(self, sgr):
+        return (self.base + self.gen * sgr / 100).astype(int)
+
+
+def _context(units, cache_dir, context=None):
+    # The centroid and distance arrays come from a GeometryContext. A shared one (e.g. from ResidentialPipeline, for
+    # every school level) already has them after its first use; otherwise one is built for these units alone.
+    if context is None:
+        return GeometryContext(units, cache_dir=cache_dir)
+    context.check(units)
+    return context
+
+
+class CandidateScorer:
+    '''
+    Scores planning units as the site of one new school next to a fixed set of existing schools.
+    Distances to the existing schools are built once here, so scoring a candidate only adds
+    the new school's column and runs GravityEngine.
+
+    units: GeoDataFrame of planning units in EPSG:3857 with basez and student_gen
+    schools: GeoSeries of the existing school points in EPSG:3857
+    capacities: capacities of the existing schools followed by the new school
+    incremental: passed on to GravityEngine
+    context: shared GeometryContext with the planning units of units (same order), see _context
+    '''
+    def __init__(self, units, schools, capacities, cache_dir=CACHE_DIR, incremental=False, context=None):
+        self.incremental = incremental
+        context = _context(units, cache_dir, context)
+        centroids = context.centroids()
+        self.fixed_distances = context.point_distances(schools)
+        self.x = centroids.x.to_numpy()
+        self.y = centroids.y.to_numpy()
+
+        # the original objective measures from the planning unit polygon, not its centroid
+        self.polygons = np.asarray(context.pu.geometry.values)
+        self.fixed_objective_distances = context.polygon_distances(schools)
+
+        self.basez = units['basez'].to_numpy(dtype=float)
+        self.student_gen = units['student_gen'].to_numpy(dtype=float)
+        self.capacities = np.asarray(capacities, dtype=float)
+
+    def score(self, candidate, sgr, lower_bound, upper_bound, method='fixed'):
+        # candidate is the row position of the planning unit whose centroid becomes the new school;
+        # method picks the balancing loop: the original 'fixed' +/-200 m step or 'adaptive' step sizes, which
+        # converges faster but can give a different (usually slightly worse) objective and so a different ranking
+        site_x, site_y = self.x[candidate:candidate + 1], self.y[candidate:candidate + 1]
+        distances = np.column_stack([self.fixed_distances, euclidean(self.x, self.y, site_x, site_y)])
+
+        engine = GravityEngine(distances, self.basez, self.student_gen, self.capacities, incremental=self.incremental)
+        balance = engine.balance_adaptive if method == 'adaptive' else engine.balance
+        assign, counts, adjust, iterations = balance(sgr, lower_bound, upper_bound)
+
+        objective_distances = np.column_stack([
+            self.fixed_objective_distances,
+            shapely.distance(self.polygons, shapely.points(site_x[0], site_y[0]))
+        ])
+        return {
+            'assign': assign,
+            'counts': counts,
+            'adjust': adjust,
+            'iterations': iterations,
+            'history': engine.history,
+            'feasible': iterations <= MAX_ITER,
+            'objective': engine.objective(assign, sgr, objective_distances)
+        }
+
+
+class ScenarioEngine:
+    '''
+    Evaluates capacity scenarios (SGR percent, lower/upper bound, capacities) for one fixed set of schools.
+    The distance arrays are built once for the school set, and each scenario starts from the previous
+    feasible scenario's adjust offsets, so nearby scenarios need only a few balancing passes.
+
+    units: GeoDataFrame of planning units in EPSG:3857 with basez and student_gen
+    schools: GeoSeries of every school point in EPSG:3857, any number of schools (including a new site, if any)
+    context: shared GeometryContext, as in CandidateScorer
+    method: 'fixed' or 'adaptive' balancing loop, as in CandidateScorer.score
+    '''
+    def __init__(self, units, schools, cache_dir=CACHE_DIR, incremental=False, context=None, method='fixed'):
+        self.incremental = incremental
+        # 'fixed' by default, so the objectives match heuristic_add.py and sweep.py
+        self.method = method
+        context = _context(units, cache_dir, context)
+        self.distances = context.point_distances(schools)
+        # the objective measures from the planning unit polygon, as in CandidateScorer
+        self.objective_distances = context.polygon_distances(schools)
+        self.basez = units['basez'].to_numpy(dtype=float)
+        self.student_gen = units['student_gen'].to_numpy(dtype=float)
+        self.n_schools = len(schools)
+
+    def evaluate(self, sgr, lower_bound, upper_bound, capacities, adjust=None, max_iter=MAX_ITER):
+        # one scenario with the engine's balancing loop, starting from the given offsets (or zero)
+        capacities = np.asarray(capacities, dtype=float)
+        if len(capacities) != self.n_schools:
+            raise ValueError(f'Expected {self.n_schools} capacities, got {len(capacities)}')
+        engine = GravityEngine(self.distances, self.basez, self.student_gen, capacities, incremental=self.incremental)
+        balance = engine.balance_adaptive if self.method == 'adaptive' else engine.balance
+        assign, counts, adjust, iterations = balance(sgr, lower_bound, upper_bound, adjust=adjust, max_iter=max_iter)
+        return {
+            'assign': assign,
+            'counts': counts,
+            'adjust': adjust,
+            'iterations': iterations,
+            'passes': len(engine.history),
+            'feasible': iterations <= max_iter,
+            'objective': engine.objective(assign, sgr, self.objective_distances)
+        }
+
+    def run(self, scenarios, warm_start=True, warm_iter=20):
+        '''
+        Evaluate scenarios in order; each is (sgr, lower_bound, upper_bound, capacities). Returns a table with
+        one row per scenario: feasibility, objective, balancing iterations and passes (including the refinement
+        passes), whether the warm start was kept, the lowest and highest percent of capacity, and the number of
+        planning units assigned differently than in the first scenario.
+        With warm_start=False every scenario starts from zero offsets. A warm-started scenario that isn't in range
+        after warm_iter iterations is retried from zero offsets, and its passes include both attempts.
+        Warm-started results depend on the order of scenarios: balancing can stop at a different in-range
+        assignment depending on where it starts. Only cold runs give each scenario the objective that
+        CandidateScorer.score gives it on its own.
+        '''
+        rows = []
+        adjust = reference = None
+        for sgr, lower_bound, upper_bound, capacities in scenarios:
+            warm = warm_start and adjust is not None
+            if warm:
+                result = self.evaluate(sgr, lower_bound, upper_bound, capacities, adjust=adjust, max_iter=warm_iter)
+            else:
+                result = self.evaluate(sgr, lower_bound, upper_bound, capacities)
+            if warm and not result['feasible']:
+                # offsets from a far-off scenario can be a worse start than zero, so retry cold before giving up
+                passes = result['passes']
+                result = self.evaluate(sgr, lower_bound, upper_bound, capacities)
+                result['passes'] += passes
+                warm = False
+            # an infeasible run ends with runaway offsets, so keep starting from the last feasible one
+            if result['feasible']:
+                adjust = result['adjust']
+            if reference is None:
+                reference = result['assign']
+            pct_capacity = 100 * result['counts'] / np.asarray(capacities, dtype=float)
+            rows.append({
+                'sgr': sgr,
+                'lower': lower_bound,
+                'upper': upper_bound,
+                'capacities': ','.join(str(c) for c in capacities),
+                'feasible': result['feasible'],
+                'objective': result['objective'],
+                'iterations': result['iterations'],
+                'passes': result['passes'],
+                'warm_start': warm,
+                'min_pct': pct_capacity.min(),
+                'max_pct': pct_capacity.max(),
+                'changed_units': int((result['assign'] != reference).sum())
+            })
+        return pd.DataFrame(rows)
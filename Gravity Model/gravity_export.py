@@ -0,0 +1,49 @@
+import os
+import sys
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Shared'))
+from stage_io import export_geojson, write_stage
+
+
+def export_candidate(result, units, schools, capacities, out_dir='.', plot=True, geojson=False):
+    '''
+    Write the outputs for one scored candidate (a result from CandidateScorer.score):
+    school_geo.parquet (planning units with their assigned school), counts.json (students per school),
+    school_geo.geojson too if geojson is True, and assignment_map.png if plot is True.
+
+    schools: GeoDataFrame with the name and geometry of every school, ending with the new school
+    '''
+    os.makedirs(out_dir, exist_ok=True)
+    school_names = schools['name'].tolist()
+
+    units = units.copy()
+    units['assign'] = np.array(school_names)[result['assign']]
+    write_stage(units, os.path.join(out_dir, 'school_geo.parquet'))
+    if geojson:
+        export_geojson(units, os.path.join(out_dir, 'school_geo.geojson'))
+
+    counts = pd.DataFrame({'school': school_names,
+                           'capacity': capacities,
+                           'count': result['counts']})
+    counts['pct_capacity'] = counts['count']/counts['capacity']
+    counts.to_json(os.path.join(out_dir, 'counts.json'), orient='records', indent=2)
+
+    if plot:
+        fig, ax = plt.subplots(figsize=(7, 9))
+        units.plot(
+            column='assign',
+            ax=ax,
+            cmap='viridis',
+            legend=True
+        )
+        ax.set_xticks([])
+        ax.set_yticks([])
+        schools.plot(ax=ax, color='white')
+        ax.set_title('Expanded HS Boundaries')
+
+        fig.savefig(os.path.join(out_dir, 'assignment_map.png'), dpi=300)
+        plt.close(fig)
@@ -4,10 +4,13 @@
 # In[65]:
 
 
+import os
+import sys
 import pandas as pd
-import geopandas as gpd
-import numpy as np
-import matplotlib.pyplot as plt
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Shared'))
+from gravity_engine import CandidateScorer
+from gravity_export import export_candidate
+from stage_io import read_stage
 
 
 # In[66]:
@@ -15,7 +18,7 @@ import matplotlib.pyplot as plt
 
 #filepath: C:\Users\olubl\OneDrive\College\Data+\DPS-Planning\GIS_files\hs_full_geo.geojson
 filepath = input('Please input the filepath to student counts shapefile: ')
-hs_full_geo = gpd.read_file(filepath).to_crs(epsg=3857)
+hs_full_geo = read_stage(filepath, crs='EPSG:3857') # GeoParquet, Feather or GeoJSON
 
 
 # In[67]:
@@ -23,7 +26,7 @@ hs_full_geo = gpd.read_file(filepath).to_crs(epsg=3857)
 
 #filepath2: C:\Users\olubl\OneDrive\College\Data+\DPS-Planning\dps_base_2324.geojson
 filepath2 = input('Please input the filepath to the DPS schools shapefile: ')
-dps_base = gpd.read_file(filepath2).to_crs(epsg = 3857)
+dps_base = read_stage(filepath2, crs='EPSG:3857')
 
 
 # In[68]:
@@ -61,76 +64,17 @@ capacities = [int(s) for s in capacities_input.split(',')]
 local_hs_full_geo = hs_full_geo.copy()
 local_dps_base_hs = schools_model.copy()
 
+# distance arrays to the existing schools are built once here and reused for every candidate
+scorer = CandidateScorer(local_hs_full_geo, local_dps_base_hs.geometry.iloc[:school_count], capacities)
+
 
 # In[72]:
 
 
 def score_candidate(candidate,sgr,lower_bound,upper_bound):
-    i=0
-    counts = pd.DataFrame({'school':school_names,
-                           'capacity':capacities,
-                           'count':[0,0,0,0,0,0],
-                           'adjust':[0,0,0,0,0,0]
-                            })                              
-
-    
-    candidate_geom = candidate['geometry']
-    local_dps_base_hs.loc[school_count,'geometry']=candidate_geom.centroid
-    counts['pct_capacity'] = counts['count']/counts['capacity']
-    
-    
-    while ((counts['pct_capacity']<lower_bound/100)|(counts['pct_capacity']>upper_bound/100)).any() and i<=200:                                    
-        assignments = []
-        for pu in local_hs_full_geo.itertuples(index=False):                   
-            centroid = pu.geometry.centroid
-            pu_scores = []
-            for j in range(school_count+1):    
-                dist = centroid.distance(local_dps_base_hs.loc[j,'geometry'])
-                score = dist + counts.loc[j,'adjust']
-                pu_scores.append(score)
-            assign = school_names[pu_scores.index(min(pu_scores))]
-            assignments.append(assign)
-        local_hs_full_geo['assign'] = assignments
-    
-        for j,school in enumerate(school_names):
-            assigned_students = int(local_hs_full_geo.loc[local_hs_full_geo['assign'] == school, 'basez'].sum() + local_hs_full_geo.loc[local_hs_full_geo['assign'] == school, 'student_gen'].sum()*sgr/100)
-            counts.loc[j, 'count'] = assigned_students  
-                
-            if counts.loc[j,'count'] <= counts.loc[j,'capacity']*lower_bound/100:
-                counts.loc[j,'adjust'] -= 200
-            elif counts.loc[j,'count'] >= counts.loc[j,'capacity']*upper_bound/100:
-                counts.loc[j,'adjust'] += 200
-            else:
-                pass
-        counts['pct_capacity'] = counts['count']/counts['capacity']
-        i+=1
-
-    local_hs_full_geo.to_file('school_geo.geojson')
-    counts.drop(columns=['adjust']).to_file('counts.json')
-
-    if i<=200:
-        objective=local_hs_full_geo.merge(local_dps_base_hs,left_on='assign',right_on='name',how='left')
-        objective['distance']=objective['geometry_x'].distance(objective['geometry_y'])
-        objective_score = ((objective['basez']+sgr*objective['student_gen']/100)*objective['distance']).sum()/(10**7)
-        fig,ax = plt.subplots(figsize = (7,9))
-
-        local_hs_full_geo.plot(
-            column='assign',
-            ax = ax,
-            cmap = 'viridis',
-            legend = True
-        )
-
-        ax.set_xticks([])
-        ax.set_yticks([])
-        local_dps_base_hs.plot(ax=plt.gca(), color = 'white')
-
-        plt.savefig('assignment_map.png',dpi=300)
-        plt.title('Expanded HS Boundaries')
-    else:
-        print('Error: Unable to find satisfactory solution within 200 attempts')
-
-
+    # candidate is the row of the planning unit to site the new school at;
+    # returns assignments, counts per school and the objective as arrays without writing any files
+    return scorer.score(candidate,sgr,lower_bound,upper_bound)
 
 
 # In[73]:
@@ -145,5 +89,21 @@ up = int(input('What upper bound of capacity? '))
 # In[74]:
 
 
-candidate = local_hs_full_geo.loc[pu]
-score_candidate(candidate,sgr,low,up)
\ No newline at end of file
+candidate = local_hs_full_geo.index.get_loc(pu)
+result = score_candidate(candidate,sgr,low,up)
+if result['feasible']:
+    print(f"Objective score: {result['objective']:.4f} after {result['iterations']} iterations")
+else:
+    print('Error: Unable to find satisfactory solution within 200 attempts')
+
+# convergence diagnostics for every assignment pass (students outside the capacity range, offsets, step sizes)
+print(pd.DataFrame(result['history']).to_string(index=False))
+
+
+# In[75]:
+
+
+# exporting is optional: school_geo (GeoParquet and GeoJSON) and counts.json, plus assignment_map.png if the run succeeded
+if input('Export boundaries, counts and map? (y/n) ').strip().lower() == 'y':
+    local_dps_base_hs.loc[school_count,'geometry'] = local_hs_full_geo.loc[pu,'geometry'].centroid
+    export_candidate(result, local_hs_full_geo, local_dps_base_hs, capacities, plot=result['feasible'], geojson=True)
@@ -0,0 +1,80 @@
+'''
+Evaluate the gravity model over a grid of capacity scenarios (SGR percent, lower and upper bound, capacities)
+for one fixed set of schools, and write a single table of feasibility and objective per scenario.
+
+Every combination of the given values is run. Each scenario starts from the previous scenario's offsets, so its
+result can depend on the scenarios before it; --cold runs each one on its own, as heuristic_add.py and sweep.py do.
+Run from the Gravity Model folder, e.g.:
+    python sensitivity.py --schools "Southern High School,Hillside High School,Northern High School,Riverside High School,Jordan High School"
+                          --site 100 --capacities 1600,1510,1600,1540,1240,1600 1700,1600,1700,1640,1340,1700
+                          --sgr 0 30 50 100 --lower 70 80 --upper 105 110
+A CSV with sgr, lower, upper and capacities columns (capacities comma separated, in quotes) can be given
+with --grid instead.
+'''
+import argparse
+import itertools
+
+import geopandas as gpd
+import pandas as pd
+
+from gravity_engine import ScenarioEngine
+from stage_io import read_stage
+
+
+def scenario_grid(sgrs, lowers, uppers, capacity_sets):
+    # SGR varies fastest, so consecutive scenarios differ the least and warm starts help the most
+    return [(sgr, low, up, capacities) for capacities, low, up, sgr
+            in itertools.product(capacity_sets, lowers, uppers, sgrs) if low < up]
+
+
+def parse_capacities(text):
+    return [int(c) for c in str(text).split(',')]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--units', default='../data/hs_full_geo.geojson',
+                        help='student counts by planning unit (GeoParquet, Feather or GeoJSON)')
+    parser.add_argument('--schools-file', default='../data/dps_base_2324.geojson', help='DPS schools file')
+    parser.add_argument('--schools', required=True, help='comma separated names of the existing schools to include')
+    parser.add_argument('--site', type=int, help='planning unit row to site a new school at (its centroid)')
+    parser.add_argument('--capacities', nargs='+', type=parse_capacities,
+                        help='one or more comma separated capacity vectors, in school order (new school last)')
+    parser.add_argument('--sgr', nargs='+', type=int, default=[0], help='percents of SGR to include')
+    parser.add_argument('--lower', nargs='+', type=int, default=[70], help='lower bounds of capacity (percent)')
+    parser.add_argument('--upper', nargs='+', type=int, default=[110], help='upper bounds of capacity (percent)')
+    parser.add_argument('--grid', help='CSV of scenarios (sgr, lower, upper, capacities) instead of the lists above')
+    parser.add_argument('--cold', action='store_true',
+                        help="start every scenario from zero offsets, so results don't depend on the scenario order")
+    parser.add_argument('--method', default='fixed', choices=['fixed', 'adaptive'],
+                        help='balancing loop: the original fixed 200 m step or adaptive step sizes (faster, '
+                             'but objectives can differ)')
+    parser.add_argument('--incremental', action='store_true',
+                        help='re-check only planning units whose assignment can change on each pass')
+    parser.add_argument('--out', default='sensitivity_results.csv', help='output table')
+    args = parser.parse_args()
+
+    units = read_stage(args.units, crs='EPSG:3857')
+    dps_base = read_stage(args.schools_file, crs='EPSG:3857')
+    selected_schools = [s.strip() for s in args.schools.split(',')]
+    schools = dps_base.set_index('name').loc[selected_schools, 'geometry']
+    if args.site is not None:
+        schools = gpd.GeoSeries(list(schools) + [units.geometry.iloc[args.site].centroid], crs=units.crs)
+
+    if args.grid:
+        grid = pd.read_csv(args.grid)
+        scenarios = [(row.sgr, row.lower, row.upper, parse_capacities(row.capacities)) for row in grid.itertuples()]
+    elif args.capacities:
+        scenarios = scenario_grid(args.sgr, args.lower, args.upper, args.capacities)
+    else:
+        parser.error('give --capacities or --grid')
+
+    engine = ScenarioEngine(units, schools, incremental=args.incremental, method=args.method)
+    table = engine.run(scenarios, warm_start=not args.cold)
+    table.to_csv(args.out, index=False)
+    print(f'Evaluated {len(table)} scenarios ({table["feasible"].sum()} feasible). Output saved to {args.out}.')
+    print(table.to_string(index=False))
+
+
+if __name__ == '__main__':
+    main()
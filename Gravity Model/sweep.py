@@ -0,0 +1,125 @@
+'''
+Score every candidate planning unit (or a filtered subset) as the site of the new high school
+and write a single table ranked by objective score.
+
+Run from the Gravity Model folder, e.g.:
+    python sweep.py --schools "Southern High School,Hillside High School,Northern High School,Riverside High School,Jordan High School"
+                    --capacities 1600,1510,1600,1540,1240,1600 --sgr 30 --lower 70 --upper 110
+'''
+import argparse
+import os
+from multiprocessing import Pool
+
+import geopandas as gpd
+import pandas as pd
+
+from gravity_engine import CandidateScorer
+from gravity_export import export_candidate
+from stage_io import read_stage
+
+# set once per worker process by _init_worker, so the scorer's arrays are not pickled for every task
+_scorer = None
+_params = None
+
+
+def _init_worker(scorer, params):
+    global _scorer, _params
+    _scorer = scorer
+    _params = params
+
+
+def _score(candidate):
+    result = _scorer.score(candidate, *_params)
+    return candidate, result['objective'], result['iterations'], result['feasible']
+
+
+def sweep(scorer, units, sgr, lower_bound, upper_bound, candidates=None, processes=None, method='fixed'):
+    '''
+    Score each candidate row of units with a process pool and return a ranked DataFrame
+    (feasible candidates first, then by objective score). Nothing is written to disk.
+    '''
+    if candidates is None:
+        candidates = range(len(units))
+    candidates = list(candidates)
+    # a -1 from Index.get_indexer (a label not in units) would otherwise score an empty site in a worker
+    outside = [c for c in candidates if not 0 <= c < len(units)]
+    if outside:
+        raise ValueError(f'Candidate rows not in units: {outside}')
+
+    params = (sgr, lower_bound, upper_bound, method)
+    # Pool(None) starts one worker per CPU, so the chunks are sized for that many workers too
+    processes = processes or os.cpu_count() or 1
+    chunksize = max(1, len(candidates) // (4 * processes))
+    with Pool(processes, initializer=_init_worker, initargs=(scorer, params)) as pool:
+        rows = list(pool.imap(_score, candidates, chunksize=chunksize))
+
+    table = pd.DataFrame(rows, columns=['candidate', 'objective', 'iterations', 'feasible'])
+    table.insert(1, 'pu_2324_84', units['pu_2324_84'].to_numpy()[table['candidate']])
+    table = table.sort_values(['feasible', 'objective'], ascending=[False, True]).reset_index(drop=True)
+    table.insert(0, 'rank', range(1, len(table) + 1))
+    return table
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--units', default='../data/hs_full_geo.geojson',
+                        help='student counts by planning unit (GeoParquet, Feather or GeoJSON)')
+    parser.add_argument('--schools-file', default='../data/dps_base_2324.geojson', help='DPS schools file')
+    parser.add_argument('--schools', required=True, help='comma separated names of the existing schools to include')
+    parser.add_argument('--capacities', required=True,
+                        help='comma separated capacities of the schools in order, ending with the new school')
+    parser.add_argument('--sgr', type=int, default=0, help='percent of SGR to include')
+    parser.add_argument('--lower', type=int, default=70, help='lower bound of capacity (percent)')
+    parser.add_argument('--upper', type=int, default=110, help='upper bound of capacity (percent)')
+    parser.add_argument('--method', default='fixed', choices=['fixed', 'adaptive'],
+                        help='balancing loop: the original fixed 200 m step or adaptive step sizes (faster, '
+                             'but objectives can differ)')
+    parser.add_argument('--incremental', action='store_true',
+                        help='re-check only planning units whose assignment can change on each pass')
+    parser.add_argument('--region', nargs='+', help='only consider candidates in these regions')
+    parser.add_argument('--candidates', nargs='+', type=int,
+                        help="only consider the planning units with these index labels (the units file's row "
+                             "numbers, counting from 0)")
+    parser.add_argument('--processes', type=int, default=None, help='worker processes (default: one per CPU)')
+    parser.add_argument('--out', default='sweep_results.csv', help='ranked output table')
+    parser.add_argument('--export-top', type=int, default=0,
+                        help='also write boundaries, counts and a map for the N best candidates')
+    parser.add_argument('--geojson', action='store_true', help='also export the boundaries of --export-top as GeoJSON')
+    args = parser.parse_args()
+
+    units = read_stage(args.units, crs='EPSG:3857')
+    dps_base = read_stage(args.schools_file, crs='EPSG:3857')
+    selected_schools = [s.strip() for s in args.schools.split(',')]
+    schools = dps_base.set_index('name').loc[selected_schools, 'geometry']
+    capacities = [int(c) for c in args.capacities.split(',')]
+    if len(capacities) != len(selected_schools) + 1:
+        raise ValueError('Expected one capacity per school plus one for the new school')
+
+    candidates = units.index if args.candidates is None else pd.Index(args.candidates)
+    missing = candidates[units.index.get_indexer(candidates) == -1]
+    if len(missing):
+        raise ValueError(f'--candidates not in {args.units}: {missing.tolist()}')
+    if args.region:
+        candidates = candidates[units.loc[candidates, 'Region'].isin(args.region)]
+
+    scorer = CandidateScorer(units, schools, capacities, incremental=args.incremental)
+    table = sweep(scorer, units, args.sgr, args.lower, args.upper,
+                  candidates=units.index.get_indexer(candidates), processes=args.processes, method=args.method)
+    table.to_csv(args.out, index=False)
+    print(f'Scored {len(table)} candidates ({table["feasible"].sum()} feasible). Output saved to {args.out}.')
+    print(table.head(10).to_string(index=False))
+
+    # only the kept candidates are re-scored and exported
+    for candidate in table['candidate'].head(args.export_top):
+        result = scorer.score(candidate, args.sgr, args.lower, args.upper, method=args.method)
+        schools_model = gpd.GeoDataFrame({'name': selected_schools + ['New High School'],
+                                          'geometry': list(schools) + [units.geometry.iloc[candidate].centroid]},
+                                         crs=units.crs)
+        out_dir = os.path.join(os.path.dirname(args.out) or '.', f'candidate_{candidate}')
+        export_candidate(result, units, schools_model, capacities, out_dir=out_dir, plot=result['feasible'],
+                         geojson=args.geojson)
+        print(f'Exported candidate {candidate} to {out_dir}')
+
+
+if __name__ == '__main__':
+    main()
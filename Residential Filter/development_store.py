@@ -0,0 +1,188 @@
+'''
+Incremental ingestion of the Durham developments shapefile.
+
+DevelopmentStore keeps every case it has seen, keyed on the case number (A_NUMBER) and status date (A_STATUS_D),
+together with its filter result, housing unit counts, planning unit and students generated. When the county
+publishes a new shapefile, only the cases that are new or whose status date changed are filtered and extracted
+again, and the students generated by planning unit are updated by the difference instead of summed from scratch.
+
+Store layout (a folder, e.g. ../data/development_store):
+    cases.parquet              one row per case version seen, filtered out or not
+    student_gen_by_pu.parquet  running totals by planning unit, one column per SGR rate column
+    changes.csv                change log: one row per case added to or removed from the store, with its deltas
+    inputs.txt                 fingerprint of the SGR table, regions and planning units the totals were built with
+'''
+import hashlib
+import os
+import sys
+
+import pandas as pd
+
+from res_dev_filter import broad_filter, extract_unit_counts
+from student_generation import SGR_COLUMNS, student_generation
+from unit_extractor import HOUSING_TYPES
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Shared'))
+from distance_cache import geometry_hash
+from spatial_join import assign_polygons
+
+KEY = ['A_NUMBER', 'A_STATUS_D']
+
+
+def parse_developments(res_cases, regions, sgr_data, processes=None):
+    '''
+    Filter the raw cases, extract housing units and add the region and students generated at every SGR rate.
+    processes: parse the descriptions in a process pool of this size (same result as serial)
+    '''
+    res_filtered = broad_filter(res_cases)
+    counts = extract_unit_counts(res_filtered['A_DESCRIPT'], processes=processes)
+    housing_counts = pd.DataFrame(counts, index=res_filtered.index, columns=HOUSING_TYPES)
+    developments = pd.concat([res_filtered, housing_counts], axis=1).to_crs(epsg=3857)
+
+    developments['region'] = assign_polygons(developments, regions, 'region')
+    student_gen = student_generation(developments, sgr_data, list(SGR_COLUMNS.values()))
+    return pd.concat([developments, student_gen], axis=1)
+
+
+def case_keys(res_cases):
+    '''
+    Key of each case version: case number, status date and, for cases listed more than once with the same date,
+    the occurrence number. The status date is normalized so text and date fields compare equal.
+    '''
+    status_date = pd.to_datetime(res_cases['A_STATUS_D'], errors='coerce').dt.strftime('%Y-%m-%d').fillna('')
+    cases = pd.DataFrame({'A_NUMBER': res_cases['A_NUMBER'].astype(str), 'A_STATUS_D': status_date},
+                         index=res_cases.index)
+    occurrence = cases.groupby(KEY).cumcount().astype(str)
+    return cases['A_NUMBER'] + '|' + cases['A_STATUS_D'] + '|' + occurrence, cases
+
+
+def inputs_fingerprint(regions, sgr_data, dps_pu):
+    # the stored planning units and student counts are only valid for the inputs they were computed with
+    h = hashlib.sha256()
+    h.update(sgr_data.sort_index().to_csv().encode())
+    h.update(geometry_hash(regions.geometry).encode())
+    h.update(regions['region'].astype(str).str.cat(sep='|').encode())
+    h.update(geometry_hash(dps_pu.geometry).encode())
+    h.update(dps_pu['pu_2324_84'].astype(str).str.cat(sep='|').encode())
+    return h.hexdigest()
+
+
+class DevelopmentStore:
+    '''
+    Local store of parsed development cases in store_dir. update() brings it up to date with a new shapefile
+    and student_gen_by_pu() gives the running totals.
+
+    Cases are matched on A_NUMBER and A_STATUS_D only, so an edit that doesn't change the status date
+    (e.g. a corrected description) is not picked up; rebuild=True reprocesses every case. The store is also
+    rebuilt automatically when the SGR table, regions or planning units differ from the ones it was built with.
+    '''
+    def __init__(self, store_dir, processes=None):
+        self.store_dir = store_dir
+        self.processes = processes
+        self.student_gen_columns = list(SGR_COLUMNS.values())
+
+    def _file(self, name):
+        return os.path.join(self.store_dir, name)
+
+    def _load(self, fingerprint):
+        try:
+            with open(self._file('inputs.txt')) as f:
+                stored_fingerprint = f.read().strip()
+        except FileNotFoundError:
+            stored_fingerprint = None
+        if stored_fingerprint != fingerprint:
+            return None, None
+        cases = pd.read_parquet(self._file('cases.parquet')).set_index('key')
+        totals = pd.read_parquet(self._file('student_gen_by_pu.parquet')).set_index('pu_2324_84')
+        return cases, totals
+
+    def _empty(self):
+        columns = KEY + ['included', 'region', 'pu_2324_84'] + HOUSING_TYPES + self.student_gen_columns
+        cases = pd.DataFrame(columns=columns, index=pd.Index([], name='key'))
+        totals = pd.DataFrame(columns=self.student_gen_columns, index=pd.Index([], name='pu_2324_84'), dtype=float)
+        return cases, totals
+
+    def _parse(self, res_cases, cases):
+        # filter/extract only the given raw rows; rows broad_filter drops are kept with included=False
+        columns = ['region', 'pu_2324_84'] + HOUSING_TYPES + self.student_gen_columns
+        if len(res_cases):
+            developments = parse_developments(res_cases, self.regions, self.sgr_data, processes=self.processes)
+            developments['pu_2324_84'] = assign_polygons(developments, self.dps_pu, 'pu_2324_84')
+            developments = developments[columns]
+        else:
+            developments = pd.DataFrame(columns=columns)
+
+        parsed = cases.join(developments)
+        parsed.insert(len(KEY), 'included', parsed.index.isin(developments.index))
+        parsed[HOUSING_TYPES + self.student_gen_columns] = parsed[HOUSING_TYPES + self.student_gen_columns].fillna(0)
+        return parsed
+
+    def _by_pu(self, cases):
+        counted = cases[cases['included'].astype(bool) & cases['pu_2324_84'].notna()]
+        student_gen = counted[self.student_gen_columns].astype(float)
+        return student_gen.groupby(counted['pu_2324_84'].astype(int).rename('pu_2324_84')).sum()
+
+    def update(self, res_cases, regions, sgr_data, dps_pu, rebuild=False):
+        '''
+        Bring the store up to date with res_cases (every case in the shapefile, or only those read_developments
+        keeps, in which case cases that stop passing the filter are removed). regions, sgr_data and dps_pu are
+        as loaded by ResidentialPipeline (regions and planning units in EPSG:3857).
+        Returns the number of new, updated, removed, unchanged and reparsed cases.
+        '''
+        self.regions, self.sgr_data, self.dps_pu = regions, sgr_data, dps_pu
+        fingerprint = inputs_fingerprint(regions, sgr_data, dps_pu)
+        stored, totals = (None, None) if rebuild else self._load(fingerprint)
+        rebuilt = stored is None
+        if rebuilt:
+            stored, totals = self._empty()
+
+        keys, cases = case_keys(res_cases)
+        is_new = ~keys.isin(stored.index).to_numpy()
+        removed = stored[~stored.index.isin(keys)]
+
+        new_keys = pd.Index(keys[is_new], name='key')
+        added = self._parse(res_cases[is_new].set_axis(new_keys), cases[is_new].set_axis(new_keys))
+
+        totals = totals.sub(self._by_pu(removed), fill_value=0).add(self._by_pu(added), fill_value=0)
+        stored = pd.concat([stored.drop(index=removed.index), added]) if len(stored) else added
+
+        self._save(stored, totals, fingerprint)
+        summary = self._log(added, removed)
+        summary['unchanged'] = int((~is_new).sum())
+        summary['reparsed'] = len(added)
+        summary['rebuilt'] = rebuilt
+        self.cases = stored
+        self.totals = totals
+        return summary
+
+    def _save(self, stored, totals, fingerprint):
+        os.makedirs(self.store_dir, exist_ok=True)
+        stored = stored.astype({'included': bool, 'pu_2324_84': float})
+        stored.reset_index().to_parquet(self._file('cases.parquet'), index=False)
+        totals.rename_axis('pu_2324_84').reset_index().to_parquet(self._file('student_gen_by_pu.parquet'), index=False)
+        with open(self._file('inputs.txt'), 'w') as f:
+            f.write(fingerprint + '\n')
+
+    def _log(self, added, removed):
+        # a case number both added and removed is a new status date for an existing case
+        updated = set(added['A_NUMBER']) & set(removed['A_NUMBER'])
+        added = added.assign(change=added['A_NUMBER'].isin(updated).map({True: 'updated', False: 'new'}))
+        removed = removed.assign(change=removed['A_NUMBER'].isin(updated).map({True: 'superseded', False: 'removed'}))
+        removed[self.student_gen_columns] = -removed[self.student_gen_columns]
+
+        columns = ['change'] + KEY + ['included', 'pu_2324_84'] + self.student_gen_columns
+        log = pd.concat([added[columns], removed[columns]], ignore_index=True)
+        log.insert(0, 'logged', pd.Timestamp.now().strftime('%Y-%m-%d %H:%M:%S'))
+        path = self._file('changes.csv')
+        log.to_csv(path, mode='a', header=not os.path.exists(path), index=False)
+
+        counts = log['change'].value_counts()
+        return {
+            'new': int(counts.get('new', 0)),
+            'updated': len(updated),
+            'removed': int(counts.get('removed', 0))
+        }
+
+    def student_gen_by_pu(self):
+        '''Students generated by planning unit from the last update, one column per SGR rate column (unrounded).'''
+        return self.totals
@@ -0,0 +1,200 @@
+'''
+Non-interactive version of sgr_htype_region.py: filters the Durham developments, extracts housing units,
+computes student generation and current enrollment by planning unit, and builds the planning unit file the
+CFLP and gravity models read (like hs_full_geo.geojson) for ES, MS and HS in one run.
+
+Run from the Residential Filter folder, e.g.:
+    python pipeline.py --developments durham_developments/Development_Cases.shp --enrollment enrollment_by_pu.csv
+'''
+import argparse
+import os
+import sys
+
+import pandas as pd
+
+from development_store import DevelopmentStore, parse_developments
+from res_dev_filter import read_developments
+from student_generation import SGR_COLUMNS
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Shared'))
+from geometry_context import GeometryContext
+from spatial_join import sum_by_polygon
+from stage_io import STAGE_CRS, export_geojson, read_stage, write_stage
+
+LEVELS = ('es', 'ms', 'hs')
+GRADES = {
+    'es': [0, 1, 2, 3, 4, 5],
+    'ms': [6, 7, 8],
+    'hs': [9, 10, 11, 12]
+}
+
+# planning unit 774 was split in two; its enrollment is shared with the new unit 851
+SPLIT_PU_SHARES = {774: 30.0/81.0, 851: 51.0/81.0}
+
+
+class ResidentialPipeline:
+    '''
+    File names are relative to data_dir. Each input is read once, and the developments are filtered,
+    extracted and assigned once for all school levels.
+
+    rates: 'k12' uses the K-12 student generation rates for every level (as sgr_htype_region.py does),
+           'level' uses the ES, MS or HS rates of each level
+    method: how developments drawn as polygons are counted in planning units (see Shared/spatial_join.py)
+    processes: parse development descriptions in a process pool of this size
+    store_dir: keep parsed cases in a DevelopmentStore there, so a new shapefile only has its new or changed
+               cases filtered and extracted, and student_gen is updated by deltas (representative method only)
+    context: a GeometryContext (Shared/geometry_context.py) of the planning units to use instead of reading pu_path.
+             Without one, load() builds it from pu_path; either way it is self.context afterwards, for the models.
+    '''
+    def __init__(self, developments_path, sgr_path, pu_path, enrollment_path, regions_path='durham_regions.geojson',
+                 data_dir='../data', rates='k12', method='representative', years=(2022, 2023, 2024), processes=None,
+                 store_dir=None, context=None):
+        if rates not in ('k12', 'level'):
+            raise ValueError(f"Unknown rates {rates!r}, expected 'k12' or 'level'")
+        if store_dir is not None and method != 'representative':
+            raise ValueError('The development store only supports the representative method')
+        self.paths = {
+            'developments': developments_path,
+            'sgr': sgr_path,
+            'pu': pu_path,
+            'enrollment': enrollment_path,
+            'regions': regions_path
+        }
+        self.data_dir = data_dir
+        self.rates = rates
+        self.method = method
+        self.years = list(years)
+        self.processes = processes
+        self.store_dir = store_dir
+        self.store_summary = None
+        self.context = context
+        self._developments = None
+        self._student_gen_by_pu = None
+
+    def _path(self, name):
+        return os.path.join(self.data_dir, self.paths[name])
+
+    def load(self):
+        # only the cases that pass broad_filter are read (see read_developments)
+        self.res_cases = read_developments(self._path('developments'))
+
+        sgr_data = read_stage(self._path('sgr'), geometry=False)
+        sgr_data = sgr_data[sgr_data['region'] != '']
+        sgr_data = sgr_data.rename(columns={'sgr_dps_2324_all.1': 'sgr_dps_avg_k12'})
+        sgr_columns = list(SGR_COLUMNS.values())
+        sgr_data = sgr_data[['housing_type', 'region'] + sgr_columns].set_index(['region', 'housing_type'])
+        self.sgr_data = sgr_data.apply(pd.to_numeric, errors='coerce')
+
+        self.regions = read_stage(self._path('regions'), columns=['region'], crs=STAGE_CRS)[['region', 'geometry']]
+
+        # the planning units are reprojected once here, and their spatial index and centroids are built once in
+        # the context for every school level and model
+        if self.context is None:
+            # GeoParquet/Feather stage files (see stage_io.py) are read as they are, GeoJSON with geopandas
+            dps_pu = read_stage(self._path('pu')).rename(columns={'pu_2324_848': 'pu_2324_84'})
+            self.context = GeometryContext(dps_pu.sort_values(by='pu_2324_84'))
+        self.dps_pu = self.context.pu
+
+        enrollment = read_stage(self._path('enrollment'), geometry=False).rename(columns={'pu_2324_848': 'pu_2324_84'})
+        enrollment = enrollment[['pu_2324_84', 'grade', 'fall_year', 'basez']].replace('', 0)
+        self.enrollment = enrollment.apply(pd.to_numeric, errors='coerce')
+        return self
+
+    def developments(self):
+        '''Filtered developments with housing unit counts, region and students generated at every SGR rate.'''
+        if self._developments is None:
+            self._developments = parse_developments(self.res_cases, self.regions, self.sgr_data,
+                                                    processes=self.processes)
+        return self._developments
+
+    def student_gen_by_pu(self):
+        '''Students generated by planning unit, one column per SGR rate column, rounded as in sgr_htype_region.py.'''
+        if self._student_gen_by_pu is None:
+            if self.store_dir is not None:
+                store = DevelopmentStore(self.store_dir, processes=self.processes)
+                self.store_summary = store.update(self.res_cases, self.regions, self.sgr_data, self.dps_pu)
+                by_pu = store.student_gen_by_pu()
+            else:
+                developments = self.developments()
+                columns = list(SGR_COLUMNS.values())
+                by_pu = sum_by_polygon(developments, developments[columns], self.dps_pu, 'pu_2324_84',
+                                       method=self.method)
+            pu_ids = pd.Index(self.dps_pu['pu_2324_84'].unique(), name='pu_2324_84')
+            self._student_gen_by_pu = by_pu.reindex(pu_ids, fill_value=0).round(0).astype(int)
+        return self._student_gen_by_pu
+
+    def basez(self, level):
+        '''Current enrollment of a school level by planning unit: the grades' 3-year averages, summed.'''
+        enrollment = self.enrollment
+        by_level = enrollment[enrollment['grade'].isin(GRADES[level]) & enrollment['fall_year'].isin(self.years)]
+
+        averaged = by_level.groupby(['pu_2324_84', 'grade'], as_index=False).mean()
+        averaged = averaged.groupby(['pu_2324_84'], as_index=False).sum().drop(columns=['grade', 'fall_year'])
+
+        pu_ids = sorted(set(self.dps_pu['pu_2324_84']) | set(SPLIT_PU_SHARES))
+        full_basez = pd.DataFrame({'pu_2324_84': pu_ids}).merge(averaged, on='pu_2324_84', how='left').fillna(0)
+        full_basez = full_basez.set_index('pu_2324_84')
+
+        # both halves of the split unit come from the original unit's enrollment
+        original = full_basez.loc[min(SPLIT_PU_SHARES), 'basez']
+        for pu, share in SPLIT_PU_SHARES.items():
+            full_basez.loc[pu, 'basez'] = original * share
+        full_basez['basez'] = full_basez['basez'].round(0).astype(int)
+        return full_basez.reset_index()
+
+    def planning_units(self, level):
+        '''Planning units with Region, geometry, basez and student_gen for one school level (EPSG:3857).'''
+        column = SGR_COLUMNS['k12'] if self.rates == 'k12' else SGR_COLUMNS[level]
+        student_gen = self.student_gen_by_pu()[column].rename('student_gen').reset_index()
+
+        full_geo = self.dps_pu.merge(self.basez(level), on='pu_2324_84')[['pu_2324_84', 'Region', 'geometry', 'basez']]
+        return full_geo.merge(student_gen, on='pu_2324_84')
+
+    def run(self, levels=LEVELS):
+        '''Planning unit GeoDataFrames by school level, e.g. {'hs': ...}, ready for CFLPModel or CandidateScorer.'''
+        return {level: self.planning_units(level) for level in levels}
+
+
+def export(outputs, out_dir='.', geojson=False):
+    # one GeoParquet file per school level, named like the hs_full_geo file the models read
+    paths = []
+    for level, full_geo in outputs.items():
+        paths.append(write_stage(full_geo, os.path.join(out_dir, f'{level}_full_geo.parquet')))
+        if geojson:
+            paths.append(export_geojson(full_geo, os.path.join(out_dir, f'{level}_full_geo.geojson')))
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--developments', required=True, help='Durham developments shapefile')
+    parser.add_argument('--enrollment', required=True,
+                        help='current enrollment by planning unit, grade and fall year')
+    parser.add_argument('--sgr', default='sgr_tables_htype_reg.csv', help='SGRs by housing type and region')
+    parser.add_argument('--pu', default='pu_2324_SPLIT.geojson', help='planning units')
+    parser.add_argument('--regions', default='durham_regions.geojson', help='Durham County regions')
+    parser.add_argument('--data-dir', default='../data', help='folder the file names above are relative to')
+    parser.add_argument('--levels', nargs='+', default=list(LEVELS), choices=LEVELS)
+    parser.add_argument('--rates', default='k12', choices=['k12', 'level'],
+                        help="student generation rates: K-12 for every level, or each level's own rates")
+    parser.add_argument('--method', default='representative', choices=['representative', 'overlay'],
+                        help='how polygon developments are counted in planning units')
+    parser.add_argument('--processes', type=int, help='parse development descriptions in this many processes')
+    parser.add_argument('--store', help='folder of the development store for incremental runs (relative to --data-dir)')
+    parser.add_argument('--out-dir', default='../outputs/Residential Filter')
+    parser.add_argument('--geojson', action='store_true', help='also export each output as GeoJSON')
+    args = parser.parse_args()
+
+    pipeline = ResidentialPipeline(args.developments, args.sgr, args.pu, args.enrollment, regions_path=args.regions,
+                                   data_dir=args.data_dir, rates=args.rates, method=args.method,
+                                   processes=args.processes,
+                                   store_dir=args.store and os.path.join(args.data_dir, args.store)).load()
+    outputs = pipeline.run(args.levels)
+    if pipeline.store_summary is not None:
+        print('Development store: ' + ', '.join(f'{k} {v}' for k, v in pipeline.store_summary.items()))
+    for path in export(outputs, args.out_dir, geojson=args.geojson):
+        print(f'Output saved to {path}')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,16 +1,29 @@
 import pandas as pd
 import geopandas as gpd
 import numpy as np
-import re
+import os
+import sys
+import pyogrio
+from unit_extractor import HOUSING_TYPES, UnitExtractor, unit_counts
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Shared'))
+from stage_io import write_stage
+
+# case types and statuses broad_filter keeps or drops, and the oldest status year it keeps
+CASE_TYPES = ['PL_MINSP', 'PL_SSP_SM', 'PL_SSM_SM2', 'PL_CPAA', 'PL_MINPP', 'PL_MAJSP', 'PL_MAJSUP', 'PL_PPA', 'PL_MAJPP']
+EXCLUDED_STATUS = ['WITH', 'VOID', 'DEN', 'DISAP', 'EXP']
+MIN_STATUS_YEAR = 2020
+
+# the only columns broad_filter and the later stages use
+CASE_COLUMNS = ['A_NUMBER', 'A_TYPE', 'A_STATUS', 'A_STATUS_D', 'A_DESCRIPT']
 
 def broad_filter(res_cases):
     # filter out cases with irrelevant type codes
-    types = ['PL_MINSP', 'PL_SSP_SM', 'PL_SSM_SM2', 'PL_CPAA', 'PL_MINPP', 'PL_MAJSP', 'PL_MAJSUP', 'PL_PPA', 'PL_MAJPP']
-    filter_cases_type = res_cases[res_cases['A_TYPE'].isin(types)]
+    filter_cases_type = res_cases[res_cases['A_TYPE'].isin(CASE_TYPES)]
 
     # filter out cases with out of date status
     status = res_cases['A_STATUS'].unique()
-    status = status[~np.isin(status, ['WITH', 'VOID','DEN','DISAP','EXP'])]
+    status = status[~np.isin(status, EXCLUDED_STATUS)]
     filter_cases_status = filter_cases_type[filter_cases_type['A_STATUS'].isin(status)]
 
     # keep entries with keywords
@@ -26,137 +39,64 @@ def broad_filter(res_cases):
     # filter out entries that were last updated over 5 years ago
     filtered_words = filtered_words.copy()
     filtered_words['A_STATUS_D'] = pd.to_datetime(filtered_words['A_STATUS_D'])
-    filtered_final = filtered_words[filtered_words['A_STATUS_D'].dt.year>=2020]
+    filtered_final = filtered_words[filtered_words['A_STATUS_D'].dt.year>=MIN_STATUS_YEAR]
 
     return filtered_final
 
 
-def normalize_for_regex(term):
-    # makes it so string returns a match whether a term has spaces, dashes, both, or neither
-    return re.sub(r'[-\s]+', r'\\s*-?\\s*', term)
+def _where_clause(info):
+    # attribute filters from broad_filter that the driver can apply while reading (OGR SQL)
+    types = ', '.join(f"'{t}'" for t in CASE_TYPES)
+    excluded = ', '.join(f"'{s}'" for s in EXCLUDED_STATUS)
+    clauses = [f'A_TYPE IN ({types})', f'(A_STATUS IS NULL OR A_STATUS NOT IN ({excluded}))']
+    # only compare dates when the field is a real date; text dates may not sort in date order
+    dtypes = dict(zip(info['fields'], info['dtypes']))
+    if str(dtypes.get('A_STATUS_D', '')).startswith('datetime'):
+        clauses.append(f"A_STATUS_D >= '{MIN_STATUS_YEAR}-01-01'")
+    return ' AND '.join(clauses)
+
+
+def read_developments(path, columns=CASE_COLUMNS):
+    '''
+    Read only the developments that pass broad_filter, instead of gpd.read_file on the whole shapefile.
+    Only `columns` are read, the type/status/date filters are applied by the driver while reading (pyogrio
+    `where`), and geometries are read afterwards for the rows that pass the full filter only.
+    Returns the same rows and values as broad_filter(gpd.read_file(path)[columns + ['geometry']]).
+    '''
+    info = pyogrio.read_info(path)
+    attributes = pyogrio.read_dataframe(path, columns=columns, read_geometry=False, where=_where_clause(info),
+                                        fid_as_index=True)
+    filtered = broad_filter(attributes)
+
+    # second pass: geometry only, for the surviving feature IDs
+    geometry = pyogrio.read_dataframe(path, columns=[], fids=filtered.index.to_numpy(), fid_as_index=True)
+    return gpd.GeoDataFrame(filtered, geometry=geometry.geometry.reindex(filtered.index), crs=geometry.crs)
+
+
+# compiled once; results are cached by description, so repeated descriptions are only parsed once
+_extractor = UnitExtractor()
 
 def extract_units(description):
-    # remove square footage references
-    description = re.sub(
-        r'(\d+|\d{1,3}(,\d{3})*)(\s+[A-Za-z-]+){0,2}?\s*(SF|square feet|sq\.?\s*ft\.?|sqft)',
-        '', description, flags=re.IGNORECASE
-    )
-
-    # map variations to standardized types
-    term_map = {
-        "home": "home", "homes": "home", "house": "home", "houses": "home",
-        "duplex": "duplex", "duplexes": "duplex",
-        "condo": "condo", "condominium": "condo", "condominiums": "condo", "condos": "condo", 
-        "apartment": "apartment", "apartments": "apartment",
-        "townhome": "townhouse", "townhomes": "townhouse",
-        "townhouse": "townhouse", "townhouses": "townhouse",
-        "town home": "townhouse", "town homes": "townhouse",
-        "town house": "townhouse", "town houses": "townhouse",
-        "multifamily": "multifamily", "multi-family": "multifamily", 
-        "multi - family": "multifamily", "multi family": "multifamily",
-        "mutifamily": "multifamily", "MF": "multifamily",
-        "single family": "single family", "single-family": "single family", 
-        "single - family": "single family", "s-f": "single family", "s - f": "single family", "s f": "single family"
-    }
-
-    modifiers = ["attached", "detached"]
-    suffixes = ["units", "lots", "homes", "houses"]
-
-    housing_pattern = "|".join([normalize_for_regex(term) for term in term_map])
-    modifier_pattern = "|".join(modifiers)
-    suffix_pattern = "|".join(suffixes)
-
-    # extended match pattern to support both "qty before type" and "type before qty"
-    match_pattern = rf'''
-    (?:
-        # Qty before type
-        (?P<qty>\(?\d{{1,4}}\)?)
-        (?:\s*[-+&/]?\s*)?
-        (?:({modifier_pattern})\s*){{0,2}}?
-        (?:\w+\s*){{0,4}}?
-        (?P<type>{housing_pattern})
-        (?:\s+({modifier_pattern}))?
-        (?:\s+(?P<suffix>{suffix_pattern}))?
-
-    |
-        # Type before qty
-        (?P<type2>{housing_pattern})
-        (?:\s+({modifier_pattern}))?
-        (?:\s*[-+&/]?\s*)?
-        (?:\w+\s*){{0,4}}?
-        (?P<qty2>\(?\d{{1,4}}\)?)
-        (?:\s+(?P<suffix2>{suffix_pattern}))?
-
-    |
-        # Type with quantity in parentheses
-        (?P<type3>{housing_pattern})
-        (?:\s+\w+){{0,4}}?
-        \(\s*(?P<qty3>\d{{1,4}})\s+(?P<suffix3>{suffix_pattern})\s*\)
-    )
-'''
-
-    matches = re.finditer(match_pattern, description, flags=re.IGNORECASE | re.VERBOSE)
-    
-    result = []
-    for match in matches:
-        qty = match.group("qty") or match.group("qty2")
-        raw_type = match.group("type") or match.group("type2")
-        raw_mod = match.group(2)  # first modifier (position varies)
-        raw_suffix = match.group("suffix") or match.group("suffix2")
-
-        if not qty or not raw_type:
-            continue  # skip malformed matches
-
-        # normalize type
-        norm_key = re.sub(r'[-\s]+', ' ', raw_type.lower()).strip()
-        normalized_type = term_map.get(norm_key, norm_key)
-
-        result.append((
-            int(qty.strip("()")),
-            raw_mod.lower() if raw_mod else None,
-            normalized_type,
-            raw_suffix.lower() if raw_suffix else None
-        ))
-
-    return result
+    return _extractor.extract(description)
 
 # function to fill in housing type columns in residential development dataframe
 def fill_types(match_results):
-    housing_types = ['sf_detached', 'sf_attached', 'duplex/triplex', 'multifamily', 'condo']
-    housing_type_dict = {
-        'townhouse': 'sf_attached',
-        'home': 'sf_detached', 'single family': 'sf_detached',
-        'duplex': 'duplex/triplex',
-        'apartment': 'multifamily', 'multifamily': 'multifamily',
-        'condo': 'condo'
-    }
-
-    row_data = {h_type: 0 for h_type in housing_types}
-    for group in match_results:
-        quantity = group[0]
-        mod = group[1]
-        housing = group[2]
+    return pd.Series(unit_counts(match_results), index=HOUSING_TYPES)
 
-        if housing == 'single family' and mod == 'attached':
-            row_data['sf_attached'] += quantity
-        elif housing in housing_type_dict:
-            row_data[housing_type_dict[housing]] += quantity
-
-    return pd.Series(row_data)
+def extract_unit_counts(descriptions, processes=None):
+    # batch extract_units + fill_types: int32 matrix of unit counts, one row per description, columns HOUSING_TYPES
+    return _extractor.count_matrix(descriptions, processes=processes)
 
 
 def main():
     filepath = input('Please input the name of Durham developments shapefile: ').strip() # use durham_developments from data folder
-    res_cases_raw = gpd.read_file(f'../data/{filepath}')
-
-    res_filtered = broad_filter(res_cases_raw)
-    res_filtered['match_results'] = res_filtered['A_DESCRIPT'].apply(extract_units)
-    housing_counts = res_filtered['match_results'].apply(fill_types)
+    res_filtered = read_developments(f'../data/{filepath}')
+    counts = extract_unit_counts(res_filtered['A_DESCRIPT'])
+    housing_counts = pd.DataFrame(counts, index=res_filtered.index, columns=HOUSING_TYPES)
 
     filtered_final = pd.concat([res_filtered, housing_counts], axis=1)
-    filtered_final = res_filtered.to_crs('EPSG:4326')
-    filtered_final.to_file('../outputs/Residential Filter/resdev_filtered.geojson', driver='GeoJSON')
-    print("Finished processing. Output saved to 'resdev_filtered.geojson'.")
+    write_stage(filtered_final, '../outputs/Residential Filter/resdev_filtered.parquet')
+    print("Finished processing. Output saved to 'resdev_filtered.parquet'.")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -8,7 +8,13 @@ import numpy as np
 import pandas as pd
 import geopandas as gpd
 import matplotlib.pyplot as plt
-import re
+import os
+import sys
+from unit_extractor import UnitExtractor
+from student_generation import SGR_COLUMNS, student_generation
+
+sys.path.append(os.path.join(os.path.abspath(''), '..', 'Shared'))
+from spatial_join import assign_polygons, sum_by_polygon
 
 
 # In[279]:
@@ -45,98 +51,8 @@ def broad_filter(res_cases):
 # In[280]:
 
 
-def normalize_for_regex(term):
-    # makes it so string returns a match whether a term has spaces, dashes, both, or neither
-    return re.sub(r'[-\s]+', r'\\s*-?\\s*', term)
-
-
-# In[281]:
-
-
-def extract_units(description):
-    # remove square footage references
-    description = re.sub(
-        r'(\d+|\d{1,3}(,\d{3})*)(\s+[A-Za-z-]+){0,2}?\s*(SF|square feet|sq\.?\s*ft\.?|sqft)',
-        '', description, flags=re.IGNORECASE
-    )
-
-    # map variations to standardized types
-    term_map = {
-        "home": "home", "homes": "home", "house": "home", "houses": "home",
-        "duplex": "duplex", "duplexes": "duplex",
-        "condo": "condo", "condominium": "condo", "condominiums": "condo", "condos": "condo", 
-        "apartment": "apartment", "apartments": "apartment",
-        "townhome": "townhouse", "townhomes": "townhouse",
-        "townhouse": "townhouse", "townhouses": "townhouse",
-        "town home": "townhouse", "town homes": "townhouse",
-        "town house": "townhouse", "town houses": "townhouse",
-        "multifamily": "multifamily", "multi-family": "multifamily", 
-        "multi - family": "multifamily", "multi family": "multifamily",
-        "mutifamily": "multifamily", "MF": "multifamily",
-        "single family": "single family", "single-family": "single family", 
-        "single - family": "single family", "s-f": "single family", "s - f": "single family", "s f": "single family"
-    }
-
-    modifiers = ["attached", "detached"]
-    suffixes = ["units", "lots", "homes", "houses"]
-
-    housing_pattern = "|".join([normalize_for_regex(term) for term in term_map])
-    modifier_pattern = "|".join(modifiers)
-    suffix_pattern = "|".join(suffixes)
-
-    # extended match pattern to support both "qty before type" and "type before qty"
-    match_pattern = rf'''
-    (?:
-        # Qty before type
-        (?P<qty>\(?\d{{1,4}}\)?)
-        (?:\s*[-+&/]?\s*)?
-        (?:({modifier_pattern})\s*){{0,2}}?
-        (?:\w+\s*){{0,4}}?
-        (?P<type>{housing_pattern})
-        (?:\s+({modifier_pattern}))?
-        (?:\s+(?P<suffix>{suffix_pattern}))?
-
-    |
-        # Type before qty
-        (?P<type2>{housing_pattern})
-        (?:\s+({modifier_pattern}))?
-        (?:\s*[-+&/]?\s*)?
-        (?:\w+\s*){{0,4}}?
-        (?P<qty2>\(?\d{{1,4}}\)?)
-        (?:\s+(?P<suffix2>{suffix_pattern}))?
-
-    |
-        # Type with quantity in parentheses
-        (?P<type3>{housing_pattern})
-        (?:\s+\w+){{0,4}}?
-        \(\s*(?P<qty3>\d{{1,4}})\s+(?P<suffix3>{suffix_pattern})\s*\)
-    )
-'''
-
-    matches = re.finditer(match_pattern, description, flags=re.IGNORECASE | re.VERBOSE)
-
-    result = []
-    for match in matches:
-        qty = match.group("qty") or match.group("qty2")
-        raw_type = match.group("type") or match.group("type2")
-        raw_mod = match.group(2)  # first modifier (position varies)
-        raw_suffix = match.group("suffix") or match.group("suffix2")
-
-        if not qty or not raw_type:
-            continue  # skip malformed matches
-
-        # normalize type
-        norm_key = re.sub(r'[-\s]+', ' ', raw_type.lower()).strip()
-        normalized_type = term_map.get(norm_key, norm_key)
-
-        result.append((
-            int(qty.strip("()")),
-            raw_mod.lower() if raw_mod else None,
-            normalized_type,
-            raw_suffix.lower() if raw_suffix else None
-        ))
-
-    return result
+# compiled once; results are cached by description (see unit_extractor.py)
+extract_units = UnitExtractor()
 
 
 # In[282]:
@@ -196,10 +112,11 @@ sgr_data = sgr_data[sgr_data['region']!='']
 
 # remove null values and shorten to only use relevant columns
 sgr_data.rename(columns={'sgr_dps_2324_all.1': 'sgr_dps_avg_k12'}, inplace=True) # because there might be a typo in the file?
-sgr_data = sgr_data[['housing_type','region','sgr_dps_avg_k12']]
-sgr_data['sgr_dps_avg_k12'] = sgr_data['sgr_dps_avg_k12'].round(4)
+sgr_columns = list(SGR_COLUMNS.values()) # K-12 plus the ES, MS and HS rates
+sgr_data = sgr_data[['housing_type','region'] + sgr_columns]
+sgr_data[sgr_columns] = sgr_data[sgr_columns].round(4)
 sgr_data.set_index(['region', 'housing_type'], inplace=True)
-sgr_data['sgr_dps_avg_k12'] = pd.to_numeric(sgr_data['sgr_dps_avg_k12'],errors='coerce')
+sgr_data[sgr_columns] = sgr_data[sgr_columns].apply(pd.to_numeric, errors='coerce')
 
 
 # In[286]:
@@ -215,48 +132,19 @@ regions = regions.to_crs(epsg = 3857)
 # In[287]:
 
 
+# polygon developments are placed by their representative point
 filtered_final = filtered_final.copy()
-for i,geometry in enumerate(regions['geometry']):
-    in_geometry = geometry.contains(filtered_final['geometry'])
-
-    region = regions.loc[i,'region']
-    filtered_final.loc[in_geometry,'region'] = region
+filtered_final['region'] = assign_polygons(filtered_final, regions, 'region')
 
 
 # In[288]:
 
 
-# function to count number of students in each row
-def count_students(row): 
-
-    htype_map = {
-        'sf_detached': 'sf_detach',
-        'sf_attached': 'sf_attach',
-        'duplex/triplex': 'du_tri',
-        'multifamily': 'mf_apt',
-        'condo': 'condo'
-    }
-
-    region = row['region']
-
-    total = 0
-    for col_name, sgr_col in htype_map.items():
-        count = row.get(col_name, 0)
-
-        try:
-            multiplier = sgr_data.loc[(region, sgr_col), 'sgr_dps_avg_k12']
-        except KeyError:
-            multiplier = 0
-
-        total += count * multiplier
-
-    return total
-
-
-# In[289]:
-
-
-filtered_final['student_gen'] = filtered_final.apply(count_students, axis=1)
+# students generated by each development, for every school level in one pass
+student_gen = student_generation(filtered_final, sgr_data, sgr_columns)
+filtered_final['student_gen'] = student_gen[SGR_COLUMNS['k12']]
+for level in ['es', 'ms', 'hs']:
+    filtered_final[f'student_gen_{level}'] = student_gen[SGR_COLUMNS[level]]
 
 
 # In[290]:
@@ -277,12 +165,9 @@ dps_pu = dps_pu.to_crs(epsg = 3857).sort_values(by='pu_2324_84')
 # In[292]:
 
 
-filtered_final = filtered_final.copy()
-for i,geometry in enumerate(dps_pu['geometry']):
-    in_geometry = geometry.contains(filtered_final['geometry'])
-    pu = dps_pu.loc[i,'pu_2324_84']
-    filtered_final.loc[in_geometry,'pu_2324_84'] = pu
-filtered_final = filtered_final.groupby('pu_2324_84')['student_gen'].sum().round(0).astype(int)
+# use method='overlay' to split polygon developments between planning units by area
+filtered_final = sum_by_polygon(filtered_final, filtered_final['student_gen'], dps_pu, 'pu_2324_84')
+filtered_final = filtered_final.round(0).astype(int)
 
 full_index = pd.Index(range(1, 851), dtype=float)
 filtered_final = filtered_final.reindex(full_index, fill_value=0)
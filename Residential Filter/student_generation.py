@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+
+# housing type columns filled by fill_types -> housing_type codes in the SGR table
+HTYPE_MAP = {
+    'sf_detached': 'sf_detach',
+    'sf_attached': 'sf_attach',
+    'duplex/triplex': 'du_tri',
+    'multifamily': 'mf_apt',
+    'condo': 'condo'
+}
+
+# student generation rate column in the SGR table for each school level
+SGR_COLUMNS = {
+    'k12': 'sgr_dps_avg_k12',
+    'es': 'sgr_dps_avg_k12_es',
+    'ms': 'sgr_dps_avg_k12_ms',
+    'hs': 'sgr_dps_avg_k12_hs'
+}
+
+
+def rate_matrix(sgr_data, column, regions):
+    '''
+    Rates of one SGR column as a (len(regions) + 1, housing types) array in HTYPE_MAP order, with a last row
+    of zeros for developments outside every region. Region/housing type pairs missing from the table get 0;
+    blank rates in the table stay NaN.
+
+    sgr_data: SGR table indexed by (region, housing_type)
+    '''
+    keys = pd.MultiIndex.from_product([regions, list(HTYPE_MAP.values())])
+    rates = sgr_data[column].reindex(keys, fill_value=0).to_numpy(dtype=float).reshape(len(regions), len(HTYPE_MAP))
+    return np.vstack([rates, np.zeros(len(HTYPE_MAP))])
+
+
+def student_generation(developments, sgr_data, columns=(SGR_COLUMNS['k12'],)):
+    '''
+    Students generated by each development: unit counts by housing type times the SGR rates of its region.
+    Every SGR column in `columns` is computed in the same pass. Returns a DataFrame aligned with developments
+    with one column per SGR column.
+
+    developments: needs the housing type columns of HTYPE_MAP (missing ones count as 0) and a region column
+    sgr_data: SGR table indexed by (region, housing_type), with numeric rate columns
+    '''
+    counts = developments.reindex(columns=list(HTYPE_MAP), fill_value=0).to_numpy(dtype=float)
+
+    # region of each development as a row of the rate matrices; -1 (no region) picks the zero row
+    codes, regions = pd.factorize(developments['region'])
+
+    result = {}
+    for column in columns:
+        rates = rate_matrix(sgr_data, column, regions)[codes]
+        # summed type by type, in the same order as the old per-row loop
+        total = np.zeros(len(developments))
+        for k in range(len(HTYPE_MAP)):
+            total = total + counts[:, k] * rates[:, k]
+        result[column] = total
+    return pd.DataFrame(result, index=developments.index)
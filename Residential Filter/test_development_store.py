@@ -0,0 +1,87 @@
+'''
+Checks that DevelopmentStore.update, which only parses new or changed cases and adjusts the running totals,
+gives the same students generated by planning unit as parsing every case from scratch.
+Run from the Residential Filter folder: python -m pytest test_development_store.py
+'''
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+from development_store import DevelopmentStore, parse_developments
+from student_generation import SGR_COLUMNS
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'benchmarks'))
+from spatial_join import sum_by_polygon
+from stage_io import read_stage
+from synthetic_data import development_points, planning_unit_grid, region_polygons
+
+DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data')
+COLUMNS = list(SGR_COLUMNS.values())
+
+
+@pytest.fixture(scope='module')
+def inputs():
+    # synthetic planning units and regions, and the SGR table as ResidentialPipeline.load prepares it
+    units = planning_unit_grid(120, seed=3)
+    sgr_data = read_stage(os.path.join(DATA, 'sgr_tables_htype_reg.csv'), geometry=False)
+    sgr_data = sgr_data[sgr_data['region'] != ''].rename(columns={'sgr_dps_2324_all.1': 'sgr_dps_avg_k12'})
+    sgr_data = sgr_data[['housing_type', 'region'] + COLUMNS].set_index(['region', 'housing_type'])
+    return region_polygons(units), sgr_data.apply(pd.to_numeric, errors='coerce'), units[['pu_2324_84', 'geometry']]
+
+
+def from_scratch(res_cases, regions, sgr_data, dps_pu):
+    developments = parse_developments(res_cases, regions, sgr_data)
+    return sum_by_polygon(developments, developments[COLUMNS], dps_pu, 'pu_2324_84')
+
+
+def assert_same_totals(store_totals, scratch):
+    # the store keeps planning units whose total went back to zero; the sums differ only by float rounding
+    pu_ids = store_totals.index.union(scratch.index)
+    pd.testing.assert_frame_equal(store_totals.reindex(pu_ids, fill_value=0).astype(float),
+                                  scratch.reindex(pu_ids, fill_value=0).astype(float),
+                                  check_names=False, check_exact=False, atol=1e-9)
+
+
+def next_shapefile(first):
+    # 30 cases get a new status date and description, 40 are dropped and 50 new cases are added
+    second = first.iloc[40:].copy()
+    changed = second.index[:30]
+    second.loc[changed, 'A_STATUS_D'] = '2026-06-01'
+    second.loc[changed, 'A_TYPE'] = 'PL_MAJSP'
+    second.loc[changed, 'A_STATUS'] = 'APPR'
+    second.loc[changed, 'A_DESCRIPT'] = 'Site plan for 120 townhomes and 40 single-family detached homes'
+
+    added = development_points(50, seed=2)
+    added['A_NUMBER'] = [f'N{k:07d}' for k in range(len(added))]
+    return pd.concat([second, added], ignore_index=True)
+
+
+def test_update_matches_a_full_recompute(inputs, tmp_path):
+    regions, sgr_data, dps_pu = inputs
+    first = development_points(400, seed=1)
+    summary = DevelopmentStore(tmp_path).update(first, regions, sgr_data, dps_pu)
+    assert summary['rebuilt'] and summary['reparsed'] == len(first)
+
+    second = next_shapefile(first)
+    # a fresh store object, so the second update starts from the files on disk
+    store = DevelopmentStore(tmp_path)
+    summary = store.update(second, regions, sgr_data, dps_pu)
+    assert not summary['rebuilt']
+    assert (summary['new'], summary['updated'], summary['removed']) == (50, 30, 40)
+    assert summary['reparsed'] == 80
+    assert summary['unchanged'] == len(second) - 80
+    assert_same_totals(store.student_gen_by_pu(), from_scratch(second, regions, sgr_data, dps_pu))
+
+
+def test_changed_inputs_rebuild_the_store(inputs, tmp_path):
+    regions, sgr_data, dps_pu = inputs
+    cases = development_points(200, seed=4)
+    DevelopmentStore(tmp_path).update(cases, regions, sgr_data, dps_pu)
+
+    doubled = sgr_data * 2
+    store = DevelopmentStore(tmp_path)
+    summary = store.update(cases, regions, doubled, dps_pu)
+    assert summary['rebuilt'] and summary['reparsed'] == len(cases)
+    assert_same_totals(store.student_gen_by_pu(), from_scratch(cases, regions, doubled, dps_pu))
@@ -0,0 +1,369 @@
+import re
+from multiprocessing import Pool
+
+import numpy as np
+import pandas as pd
+
+# map variations to standardized types
+TERM_MAP = {
+    "home": "home", "homes": "home", "house": "home", "houses": "home",
+    "duplex": "duplex", "duplexes": "duplex",
+    "condo": "condo", "condominium": "condo", "condominiums": "condo", "condos": "condo",
+    "apartment": "apartment", "apartments": "apartment",
+    "townhome": "townhouse", "townhomes": "townhouse",
+    "townhouse": "townhouse", "townhouses": "townhouse",
+    "town home": "townhouse", "town homes": "townhouse",
+    "town house": "townhouse", "town houses": "townhouse",
+    "multifamily": "multifamily", "multi-family": "multifamily",
+    "multi - family": "multifamily", "multi family": "multifamily",
+    "mutifamily": "multifamily", "MF": "multifamily",
+    "single family": "single family", "single-family": "single family",
+    "single - family": "single family", "s-f": "single family", "s - f": "single family", "s f": "single family"
+}
+
+MODIFIERS = ["attached", "detached"]
+SUFFIXES = ["units", "lots", "homes", "houses"]
+
+METHODS = ('regex', 'tokens')
+
+# columns of the unit count matrix, and the column each standardized type counts toward (as in fill_types)
+HOUSING_TYPES = ['sf_detached', 'sf_attached', 'duplex/triplex', 'multifamily', 'condo']
+HOUSING_TYPE_DICT = {
+    'townhouse': 'sf_attached',
+    'home': 'sf_detached', 'single family': 'sf_detached',
+    'duplex': 'duplex/triplex',
+    'apartment': 'multifamily', 'multifamily': 'multifamily',
+    'condo': 'condo'
+}
+
+
+def normalize_for_regex(term):
+    # makes it so string returns a match whether a term has spaces, dashes, both, or neither
+    return re.sub(r'[-\s]+', r'\\s*-?\\s*', term)
+
+
+HOUSING_PATTERN = "|".join([normalize_for_regex(term) for term in TERM_MAP])
+MODIFIER_PATTERN = "|".join(MODIFIERS)
+SUFFIX_PATTERN = "|".join(SUFFIXES)
+
+# remove square footage references
+SQFT_RE = re.compile(r'(\d+|\d{1,3}(,\d{3})*)(\s+[A-Za-z-]+){0,2}?\s*(SF|square feet|sq\.?\s*ft\.?|sqft)', re.IGNORECASE)
+
+# extended match pattern to support both "qty before type" and "type before qty"
+MATCH_RE = re.compile(rf'''
+    (?:
+        # Qty before type
+        (?P<qty>\(?\d{{1,4}}\)?)
+        (?:\s*[-+&/]?\s*)?
+        (?:({MODIFIER_PATTERN})\s*){{0,2}}?
+        (?:\w+\s*){{0,4}}?
+        (?P<type>{HOUSING_PATTERN})
+        (?:\s+({MODIFIER_PATTERN}))?
+        (?:\s+(?P<suffix>{SUFFIX_PATTERN}))?
+
+    |
+        # Type before qty
+        (?P<type2>{HOUSING_PATTERN})
+        (?:\s+({MODIFIER_PATTERN}))?
+        (?:\s*[-+&/]?\s*)?
+        (?:\w+\s*){{0,4}}?
+        (?P<qty2>\(?\d{{1,4}}\)?)
+        (?:\s+(?P<suffix2>{SUFFIX_PATTERN}))?
+
+    |
+        # Type with quantity in parentheses
+        (?P<type3>{HOUSING_PATTERN})
+        (?:\s+\w+){{0,4}}?
+        \(\s*(?P<qty3>\d{{1,4}})\s+(?P<suffix3>{SUFFIX_PATTERN})\s*\)
+    )
+''', re.IGNORECASE | re.VERBOSE)
+
+# pieces of MATCH_RE for the token matcher, each anchored at one position and free of nested repeats
+_TYPE_RE = re.compile(HOUSING_PATTERN, re.IGNORECASE)
+_TYPE_ALTERNATIVES = [re.compile(normalize_for_regex(term), re.IGNORECASE) for term in TERM_MAP]
+_MODIFIER_RE = re.compile(MODIFIER_PATTERN, re.IGNORECASE)
+_TYPE_TAIL_RE = re.compile(rf'(?:\s+({MODIFIER_PATTERN}))?(?:\s+({SUFFIX_PATTERN}))?', re.IGNORECASE)
+_MODIFIER_AFTER_RE = re.compile(rf'\s+({MODIFIER_PATTERN})', re.IGNORECASE)
+_QTY_RE = re.compile(r'\(?\d{1,4}\)?')
+_DIGITS_RE = re.compile(r'\d{1,4}')
+_QTY_TAIL_RE = re.compile(rf'(?:\s+({SUFFIX_PATTERN}))?', re.IGNORECASE)
+_PAREN_QTY_RE = re.compile(rf'\(\s*(\d{{1,4}})\s+({SUFFIX_PATTERN})\s*\)', re.IGNORECASE)
+_SEPARATOR_RE = re.compile(r'\s*(?:[-+&/]\s*)?')
+_TOKEN_RE = re.compile(r'(\w+)|(\s+)')
+
+# up to this many words may sit between the quantity and the housing type
+MAX_GAP_WORDS = 4
+
+
+def _normalize_match(qty, raw_mod, raw_type, raw_suffix):
+    # normalize type
+    norm_key = re.sub(r'[-\s]+', ' ', raw_type.lower()).strip()
+    normalized_type = TERM_MAP.get(norm_key, norm_key)
+
+    return (
+        int(qty.strip("()")),
+        raw_mod.lower() if raw_mod else None,
+        normalized_type,
+        raw_suffix.lower() if raw_suffix else None
+    )
+
+
+def extract_units_regex(description):
+    '''
+    The original extractor: one regex over the whole description.
+    Returns a list of (quantity, modifier, housing type, suffix) tuples.
+    '''
+    description = SQFT_RE.sub('', description)
+
+    result = []
+    for match in MATCH_RE.finditer(description):
+        qty = match.group("qty") or match.group("qty2")
+        raw_type = match.group("type") or match.group("type2")
+        raw_mod = match.group(2)  # first modifier (position varies)
+        raw_suffix = match.group("suffix") or match.group("suffix2")
+
+        if not qty or not raw_type:
+            continue  # skip malformed matches
+
+        result.append(_normalize_match(qty, raw_mod, raw_type, raw_suffix))
+
+    return result
+
+
+class _TokenMatcher:
+    '''
+    Finds the same matches as MATCH_RE.finditer on one description without the regex engine's backtracking.
+
+    The description is split into runs of word characters and whitespace. The "up to 4 words" gaps
+    of MATCH_RE are searched in the same order as the regex engine would, but each (position, words left)
+    state is tried only once, so a long description costs a few passes over its characters instead of
+    trying every way of splitting its words into up to 4 pieces.
+    '''
+    def __init__(self, text):
+        self.text = text
+        self.word_end = {}
+        self.space_end = {}
+        for token in _TOKEN_RE.finditer(text):
+            start, end = token.span()
+            if token.group(1):
+                for i in range(start, end):
+                    self.word_end[i] = end
+            else:
+                self.space_end[start] = end
+        self._type_at = {}
+        self._qty_at = {}
+        self._gap_memo = {}
+
+    def _skip_space(self, i):
+        return self.space_end.get(i, i)
+
+    def _type_match(self, i):
+        if i not in self._type_at:
+            self._type_at[i] = _TYPE_RE.match(self.text, i)
+        return self._type_at[i]
+
+    def _qty_match(self, i):
+        if i not in self._qty_at:
+            self._qty_at[i] = _QTY_RE.match(self.text, i)
+        return self._qty_at[i]
+
+    def _gap(self, target, i, words):
+        # (?:\w+\s*){0,words}? followed by target: returns the first position the regex engine would settle on
+        key = (target, i, words)
+        if key not in self._gap_memo:
+            self._gap_memo[key] = self._search_gap(target, i, words)
+        return self._gap_memo[key]
+
+    def _search_gap(self, target, i, words):
+        if target(i):
+            return i
+        if words == 0 or i not in self.word_end:
+            return None
+        # the whole word and the whitespace after it first, then ever shorter pieces of the word
+        end = self.word_end[i]
+        found = self._gap(target, self._skip_space(end), words - 1)
+        if found is not None:
+            return found
+        for piece_end in range(end - 1, i, -1):
+            found = self._gap(target, piece_end, words - 1)
+            if found is not None:
+                return found
+        return None
+
+    def _qty_before_type(self, start):
+        text = self.text
+        digits_at = start + 1 if text.startswith('(', start) else start
+        digits = _DIGITS_RE.match(text, digits_at)
+        if not digits:
+            return None
+
+        for qty_end in range(digits.end(), digits_at, -1):
+            if text.startswith(')', qty_end):
+                qty_end += 1
+            i = _SEPARATOR_RE.match(text, qty_end).end()
+
+            # up to two modifiers, fewest first
+            modifier = None
+            for _ in range(3):
+                found = self._gap(self._type_match, i, MAX_GAP_WORDS)
+                if found is not None:
+                    housing = self._type_match(found)
+                    tail = _TYPE_TAIL_RE.match(text, housing.end())
+                    return tail.end(), (text[start:qty_end], modifier, housing.group(), tail.group(2))
+                mod = _MODIFIER_RE.match(text, i)
+                if not mod:
+                    break
+                modifier = mod.group()
+                i = self._skip_space(mod.end())
+        return None
+
+    def _type_before_qty(self, start):
+        text = self.text
+        for alternative in _TYPE_ALTERNATIVES:
+            housing = alternative.match(text, start)
+            if not housing:
+                continue
+            ends = [housing.end()]
+            mod = _MODIFIER_AFTER_RE.match(text, housing.end())
+            if mod:
+                ends.insert(0, mod.end())
+            for end in ends:
+                i = _SEPARATOR_RE.match(text, end).end()
+                found = self._gap(self._qty_match, i, MAX_GAP_WORDS)
+                if found is not None:
+                    qty = self._qty_match(found)
+                    tail = _QTY_TAIL_RE.match(text, qty.end())
+                    return tail.end(), (qty.group(), None, housing.group(), tail.group(1))
+        return None
+
+    def _type_paren_qty(self, start):
+        text = self.text
+        for alternative in _TYPE_ALTERNATIVES:
+            housing = alternative.match(text, start)
+            if not housing:
+                continue
+            # (?:\s+\w+){0,4}? only stops at the end of whole words
+            i = housing.end()
+            for _ in range(MAX_GAP_WORDS + 1):
+                paren = _PAREN_QTY_RE.match(text, i)
+                if paren:
+                    return paren.end()
+                word_start = self.space_end.get(i)
+                if word_start is None or word_start not in self.word_end:
+                    break
+                i = self.word_end[word_start]
+        return None
+
+    def finditer(self):
+        text = self.text
+        start = 0
+        while start < len(text):
+            char = text[start]
+            found = None
+            if char == '(' or char.isdigit():
+                found = self._qty_before_type(start)
+            if found is None and self._type_match(start):
+                found = self._type_before_qty(start)
+                if found is None:
+                    end = self._type_paren_qty(start)
+                    if end is not None:
+                        # matched, but has no usable quantity/type pair
+                        start = end
+                        continue
+            if found is None:
+                start += 1
+                continue
+            end, groups = found
+            yield groups
+            start = end
+
+
+def extract_units_tokens(description):
+    '''
+    Same output as extract_units_regex, found with _TokenMatcher so that long descriptions
+    can't trigger heavy regex backtracking.
+    '''
+    description = SQFT_RE.sub('', description)
+    return [_normalize_match(*groups) for groups in _TokenMatcher(description).finditer()]
+
+
+class UnitExtractor:
+    '''
+    Housing unit extractor with compiled patterns and a cache of results by description,
+    so repeated descriptions are only parsed once.
+
+    method: 'tokens' (backtracking-safe matcher) or 'regex' (the original single pattern); both give the same output
+    '''
+    def __init__(self, method='tokens'):
+        if method not in METHODS:
+            raise ValueError(f'Unknown method {method!r}, expected one of {METHODS}')
+        self.method = method
+        self._extract = extract_units_regex if method == 'regex' else extract_units_tokens
+        self._cache = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __call__(self, description):
+        return self.extract(description)
+
+    def extract(self, description):
+        result = self._cache.get(description)
+        if result is None:
+            self.misses += 1
+            result = self._cache[description] = tuple(self._extract(description))
+        else:
+            self.hits += 1
+        # a new list each time, like the original function
+        return list(result)
+
+    def clear_cache(self):
+        self._cache.clear()
+        self.hits = self.misses = 0
+
+    def count_matrix(self, descriptions, processes=None, chunksize=500):
+        '''
+        Batch version of extract + fill_types: an int32 array of shape (len(descriptions), len(HOUSING_TYPES))
+        with the unit counts of each description, in input order. Missing descriptions count as no units.
+
+        Each distinct description is parsed once (and cached). With processes > 1 the descriptions not in the
+        cache yet are parsed in a process pool, in chunks of chunksize; results come back in submission
+        order, so the matrix is exactly the serial one.
+        '''
+        descriptions = pd.Series(descriptions, dtype=object).fillna('')
+        codes, uniques = pd.factorize(descriptions)
+
+        missing = [d for d in uniques if d not in self._cache]
+        if processes is not None and processes > 1 and len(missing) > chunksize:
+            chunks = [missing[k:k + chunksize] for k in range(0, len(missing), chunksize)]
+            with Pool(processes, initializer=_init_worker, initargs=(self.method,)) as pool:
+                for chunk, results in zip(chunks, pool.map(_extract_chunk, chunks)):
+                    self._cache.update(zip(chunk, results))
+            self.misses += len(missing)
+
+        counts = np.array([unit_counts(self._cache[d] if d in self._cache else self.extract(d)) for d in uniques],
+                          dtype=np.int32)
+        return counts.reshape(len(uniques), len(HOUSING_TYPES))[codes]
+
+
+def unit_counts(match_results):
+    # the fill_types sums as a plain list in HOUSING_TYPES order
+    row = dict.fromkeys(HOUSING_TYPES, 0)
+    for quantity, mod, housing, _ in match_results:
+        if housing == 'single family' and mod == 'attached':
+            row['sf_attached'] += quantity
+        elif housing in HOUSING_TYPE_DICT:
+            row[HOUSING_TYPE_DICT[housing]] += quantity
+    return list(row.values())
+
+
+# pool worker state, set once per process by _init_worker
+_worker_extract = None
+
+
+def _init_worker(method):
+    global _worker_extract
+    _worker_extract = extract_units_regex if method == 'regex' else extract_units_tokens
+
+
+def _extract_chunk(descriptions):
+    return [tuple(_worker_extract(d)) for d in descriptions]
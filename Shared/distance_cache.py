@@ -0,0 +1,79 @@
+import hashlib
+import os
+import shutil
+import tempfile
+
+import geopandas as gpd
+import numpy as np
+
+from distance_matrix import distance_matrix
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'cache')
+
+# bump when the layout of cached files changes so old entries are ignored
+CACHE_VERSION = 1
+
+
+def geometry_hash(geoms):
+    # content hash of the geometries (in order) and their CRS
+    h = hashlib.sha256()
+    h.update(geoms.crs.to_wkt().encode() if geoms.crs is not None else b'')
+    for wkb in geoms.to_wkb():
+        h.update(wkb)
+    return h.hexdigest()
+
+
+def _cache_key(*parts):
+    return hashlib.sha256('|'.join(str(p) for p in (CACHE_VERSION,) + parts).encode()).hexdigest()[:32]
+
+
+def _load_or_build(path, build):
+    # memory-map a cached array, building and saving it first if it isn't there yet
+    if not os.path.exists(path):
+        arr = np.ascontiguousarray(build())
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        # write to a temp file and rename so parallel runs never see a partial file
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.npy.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            np.save(f, arr)
+        os.replace(tmp, path)
+    return np.load(path, mmap_mode='r')
+
+
+def cached_centroids(geoms, cache_dir=CACHE_DIR):
+    '''
+    Centroids of geoms as a GeoSeries with the same index and CRS, read from the cache when the geometries are unchanged.
+    Pass cache_dir=None to skip the cache.
+    '''
+    if cache_dir is None:
+        return geoms.centroid
+
+    key = _cache_key('centroids', geometry_hash(geoms))
+    path = os.path.join(cache_dir, f'centroids_{key}.npy')
+
+    def build():
+        centroids = geoms.centroid
+        return np.column_stack([centroids.x.to_numpy(), centroids.y.to_numpy()])
+
+    xy = _load_or_build(path, build)
+    return gpd.GeoSeries(gpd.points_from_xy(xy[:, 0], xy[:, 1]), index=geoms.index, crs=geoms.crs)
+
+
+def cached_distance_matrix(origins, destinations, metric='geodesic', units='miles', cache_dir=CACHE_DIR):
+    '''
+    Same as distance_matrix, but the result is stored on disk and memory-mapped (read-only) on later calls.
+    The cache key covers the origin and destination geometries, their CRS, the metric and the units,
+    so any change to the input data builds a new entry. Pass cache_dir=None to skip the cache.
+    '''
+    if cache_dir is None:
+        return distance_matrix(origins, destinations, metric=metric, units=units)
+
+    key = _cache_key('distances', geometry_hash(origins), geometry_hash(destinations), metric, units)
+    path = os.path.join(cache_dir, f'distances_{key}.npy')
+    return _load_or_build(path, lambda: distance_matrix(origins, destinations, metric=metric, units=units))
+
+
+def clear_cache(cache_dir=CACHE_DIR):
+    # remove every cached centroid and distance array
+    shutil.rmtree(cache_dir, ignore_errors=True)
@@ -0,0 +1,68 @@
+import numpy as np
+from pyproj import Geod
+
+# mean earth radius, same value geopy uses for great_circle
+EARTH_RADIUS_KM = 6371.009
+METERS_PER_MILE = 1609.344
+
+METRICS = ('haversine', 'geodesic', 'euclidean')
+UNITS = {'meters': 1.0, 'km': 1000.0, 'miles': METERS_PER_MILE}
+
+_geod = Geod(ellps='WGS84')
+
+
+def _coords(points, crs):
+    # pull x/y arrays out of a GeoSeries of points, reprojecting only if needed
+    if points.crs is not None and not points.crs.equals(crs):
+        points = points.to_crs(crs)
+    return points.x.to_numpy(dtype=float), points.y.to_numpy(dtype=float)
+
+
+def haversine(lat1, lon1, lat2, lon2):
+    # great-circle distance in meters on a sphere, broadcast origins x destinations
+    lat1, lon1 = np.radians(lat1)[:, None], np.radians(lon1)[:, None]
+    lat2, lon2 = np.radians(lat2)[None, :], np.radians(lon2)[None, :]
+
+    a = np.sin((lat2 - lat1) / 2)**2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2)**2
+    return 2 * EARTH_RADIUS_KM * 1000 * np.arcsin(np.sqrt(a))
+
+
+def geodesic(lat1, lon1, lat2, lon2):
+    # ellipsoidal distance in meters on WGS84 (Karney's algorithm, same one geopy.distance.geodesic uses)
+    n, m = len(lat1), len(lat2)
+    _, _, dist = _geod.inv(
+        np.repeat(lon1, m), np.repeat(lat1, m),
+        np.tile(lon2, n), np.tile(lat2, n)
+    )
+    return np.asarray(dist).reshape(n, m)
+
+
+def euclidean(x1, y1, x2, y2):
+    # planar distance in the units of the input coordinates
+    return np.hypot(x1[:, None] - x2[None, :], y1[:, None] - y2[None, :])
+
+
+def distance_matrix(origins, destinations, metric='geodesic', units='miles'):
+    '''
+    Distances from every origin point to every destination point as an (n_origins, n_destinations) array.
+
+    origins, destinations: GeoSeries of points (e.g. planning unit centroids and candidate sites)
+    metric: 'haversine' (sphere), 'geodesic' (WGS84 ellipsoid) or 'euclidean' (planar EPSG:3857)
+    units: 'meters', 'km' or 'miles'
+    '''
+    if metric not in METRICS:
+        raise ValueError(f"metric must be one of {METRICS}, got {metric!r}")
+    if units not in UNITS:
+        raise ValueError(f"units must be one of {tuple(UNITS)}, got {units!r}")
+
+    if metric == 'euclidean':
+        x1, y1 = _coords(origins, 'EPSG:3857')
+        x2, y2 = _coords(destinations, 'EPSG:3857')
+        dist = euclidean(x1, y1, x2, y2)
+    else:
+        lon1, lat1 = _coords(origins, 'EPSG:4326')
+        lon2, lat2 = _coords(destinations, 'EPSG:4326')
+        func = haversine if metric == 'haversine' else geodesic
+        dist = func(lat1, lon1, lat2, lon2)
+
+    return dist / UNITS[units]
@@ -0,0 +1,120 @@
+'''
+Planning unit geometry shared by every stage and school level in one process.
+
+The Residential Filter, CFLP and gravity runs for ES, MS and HS all work on the same planning unit polygons. Run one
+level at a time and each run reads and reprojects them again, recomputes the centroids and rebuilds the distance
+arrays and spatial index. A GeometryContext holds all of that and builds each piece the first time it is asked for.
+'''
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import shapely
+from pyproj import CRS
+
+from distance_cache import CACHE_DIR, cached_centroids, cached_distance_matrix, geometry_hash
+from spatial_join import assign_polygons
+from stage_io import STAGE_CRS, read_stage
+
+
+def _crs_key(crs):
+    return CRS.from_user_input(crs).to_string()
+
+
+class GeometryContext:
+    '''
+    pu: GeoDataFrame of planning units with pu_2324_84 (or pu_2324_848, as in pu_2324_SPLIT.geojson), in any CRS.
+        The rows keep their order; context.pu is the same frame in STAGE_CRS (EPSG:3857).
+    cache_dir: on-disk cache of the centroids and distance matrices (see distance_cache.py), None to skip it
+
+    Frames passed along with a context (e.g. ResidentialPipeline.planning_units) must have its planning units in
+    the same order; check() raises a ValueError otherwise.
+    '''
+    def __init__(self, pu, cache_dir=CACHE_DIR):
+        pu = pu.rename(columns={'pu_2324_848': 'pu_2324_84'})
+        self.cache_dir = cache_dir
+        self.ids = pu['pu_2324_84'].to_numpy()
+        # the frame as given is kept under its own CRS, so asking for that CRS never reprojects
+        self._source = pu
+        self._projected = {_crs_key(pu.crs): pu}
+        self._centroids = {}
+        self._unit_distances = {}
+        self._point_distances = {}
+        self._polygon_distances = {}
+        self.pu = self.projected(STAGE_CRS)
+
+    @classmethod
+    def from_file(cls, path, cache_dir=CACHE_DIR):
+        # any file read_stage reads (GeoParquet, Feather, GeoJSON)
+        return cls(read_stage(path), cache_dir=cache_dir)
+
+    def projected(self, crs):
+        '''The planning units in crs, reprojected once.'''
+        key = _crs_key(crs)
+        if key not in self._projected:
+            self._projected[key] = self._source.to_crs(crs)
+        return self._projected[key]
+
+    def check(self, units):
+        # units must list the context's planning units in the same order, so arrays can be shared by row
+        if not np.array_equal(np.asarray(units['pu_2324_84']), self.ids):
+            raise ValueError("units are not the context's planning units in the context's order")
+
+    def attach(self, units, crs=STAGE_CRS):
+        '''units' columns (rows in the context's order) on the context's geometry in crs, without reprojecting units.'''
+        self.check(units)
+        geometry = self.projected(crs).geometry
+        columns = pd.DataFrame(units.drop(columns=units.geometry.name) if isinstance(units, gpd.GeoDataFrame) else units)
+        return gpd.GeoDataFrame(columns, geometry=geometry.values, crs=geometry.crs)
+
+    @property
+    def sindex(self):
+        # built by geopandas on first use and kept with context.pu, so every assign() reuses it
+        return self.pu.sindex
+
+    def assign(self, features, column='pu_2324_84'):
+        '''Planning unit of each feature (see spatial_join.assign_polygons), with the context's spatial index.'''
+        return assign_polygons(features, self.projected(features.crs), column)
+
+    def centroids(self, crs=STAGE_CRS):
+        '''Planning unit centroids computed in crs, a GeoSeries indexed by pu_2324_84 in row order.'''
+        key = _crs_key(crs)
+        if key not in self._centroids:
+            centroids = cached_centroids(self.projected(crs).geometry, cache_dir=self.cache_dir)
+            self._centroids[key] = centroids.set_axis(pd.Index(self.ids, name='pu_2324_84'))
+        return self._centroids[key]
+
+    def unit_distances(self, origins, destinations, crs='EPSG:4326', metric='geodesic', units='miles'):
+        '''
+        Centroid-to-centroid distances from the origin to the destination planning units (lists of pu_2324_84),
+        sliced from one matrix between every planning unit that is built the first time crs, metric and units
+        are asked for. Where a pu_2324_84 is on several rows, the last row's centroid is used.
+        '''
+        key = (_crs_key(crs), metric, units)
+        centroids = self.centroids(crs)
+        centroids = centroids[~centroids.index.duplicated(keep='last')]
+        if key not in self._unit_distances:
+            self._unit_distances[key] = np.asarray(cached_distance_matrix(
+                centroids, centroids, metric=metric, units=units, cache_dir=self.cache_dir))
+        rows = centroids.index.get_indexer(origins)
+        columns = centroids.index.get_indexer(destinations)
+        return self._unit_distances[key][np.ix_(rows, columns)]
+
+    def point_distances(self, points, metric='euclidean', units='meters'):
+        '''
+        Distances from every planning unit's centroid (by row) to points, a GeoSeries such as school locations.
+        Centroids are computed in STAGE_CRS, as the gravity model does.
+        '''
+        key = (geometry_hash(points), metric, units)
+        if key not in self._point_distances:
+            self._point_distances[key] = np.asarray(cached_distance_matrix(
+                self.centroids(), points, metric=metric, units=units, cache_dir=self.cache_dir))
+        return self._point_distances[key]
+
+    def polygon_distances(self, points):
+        '''Shortest distances from every planning unit polygon (by row) to points, in STAGE_CRS units (meters).'''
+        key = geometry_hash(points)
+        if key not in self._polygon_distances:
+            points = points.to_crs(STAGE_CRS) if points.crs is not None else points
+            self._polygon_distances[key] = shapely.distance(np.asarray(self.pu.geometry.values)[:, None],
+                                                            np.asarray(points.values)[None, :])
+        return self._polygon_distances[key]
@@ -0,0 +1,93 @@
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+
+METHODS = ('representative', 'overlay')
+
+
+def _match_crs(polygons, crs):
+    return polygons if polygons.crs == crs else polygons.to_crs(crs)
+
+
+def _as_points(features):
+    # points stay as they are; polygons and lines use a point that is guaranteed to lie inside them
+    geoms = features.geometry
+    is_point = geoms.geom_type == 'Point'
+    if is_point.all():
+        return geoms
+    return geoms.where(is_point, geoms.representative_point())
+
+
+def assign_polygons(features, polygons, column):
+    '''
+    Label each feature with the `column` value of the polygon it lies in, using a spatial index
+    instead of testing every polygon against every feature.
+
+    Points on a polygon boundary or outside every polygon get NaN, as with polygon.contains(point).
+    Non-point features are placed by their representative point. Where polygons overlap, the last one
+    wins, like assigning polygon by polygon in order. Returns a Series aligned with features.
+
+    The index is the polygons' own sindex, which geopandas builds once per GeoDataFrame and keeps, so every
+    call with the same polygons (e.g. a GeometryContext's planning units) reuses it.
+    '''
+    points = _as_points(features).values
+    polygons = _match_crs(polygons, features.crs)
+
+    point_rows, polygon_rows = polygons.sindex.query(points, predicate='within')
+    # the last polygon containing each point
+    last = np.full(len(features), -1)
+    np.maximum.at(last, point_rows, polygon_rows)
+    found = np.flatnonzero(last >= 0)
+
+    values = pd.Series(polygons[column].values[last[found]], index=found)
+    result = values.reindex(range(len(features)))
+    result.index = features.index
+    return result.rename(column)
+
+
+def area_weights(features, polygons, column):
+    '''
+    Share of each feature's area that falls in each polygon, as a long table with the feature's index label,
+    the polygon's `column` value and the weight. Weights of a feature sum to 1 when it lies fully inside the polygons.
+    Point features get weight 1 in the polygon that contains them.
+    '''
+    polygons = _match_crs(polygons, features.crs)
+    is_area = features.geom_type.isin(['Polygon', 'MultiPolygon']) & (features.area > 0)
+
+    rows = []
+    point_labels = assign_polygons(features[~is_area], polygons, column).dropna()
+    rows.append(pd.DataFrame({'feature': point_labels.index, column: point_labels.values, 'weight': 1.0}))
+
+    if is_area.any():
+        areas = features.loc[is_area]
+        left = gpd.GeoDataFrame({'feature': areas.index, '_area': areas.area.values},
+                                geometry=areas.geometry.values, crs=features.crs)
+        right = gpd.GeoDataFrame({column: polygons[column].values}, geometry=polygons.geometry.values, crs=polygons.crs)
+        pieces = gpd.overlay(left, right, how='intersection', keep_geom_type=True)
+        pieces['weight'] = pieces.area / pieces['_area']
+        rows.append(pd.DataFrame(pieces[['feature', column, 'weight']]))
+
+    return pd.concat(rows, ignore_index=True)
+
+
+def sum_by_polygon(features, values, polygons, column, method='representative'):
+    '''
+    Total of `values` (a Series, or a DataFrame to sum several columns from one join, aligned with features)
+    for each polygon, indexed by the polygon's `column` value.
+
+    method:
+        'representative': each feature counts fully in the polygon containing it (its representative point)
+        'overlay': polygon features are split between polygons by area share
+    Polygons with no features are left out; reindex the result to fill them.
+    '''
+    if method not in METHODS:
+        raise ValueError(f'Unknown method {method!r}, expected one of {METHODS}')
+
+    if method == 'representative':
+        labels = assign_polygons(features, polygons, column)
+        return values.groupby(labels).sum()
+
+    weights = area_weights(features, polygons, column)
+    weighted = values.loc[weights['feature']].reset_index(drop=True)
+    weighted = weighted.mul(weights['weight'], axis=0)
+    return weighted.groupby(weights[column].to_numpy()).sum().rename_axis(column)
@@ -0,0 +1,87 @@
+'''
+Reading and writing the files passed between stages (planning units, filtered developments, assignments).
+
+Intermediate files are GeoParquet (.parquet) or Feather (.feather): binary, columnar, with the geometry stored once
+in STAGE_CRS, so a stage reads only the columns it needs and doesn't reproject on load. GeoJSON is for exports
+(QGIS, sharing) only, but read_stage still reads it so existing files keep working.
+
+Convert existing GeoJSON files from the command line:
+    python Shared/stage_io.py data/hs_full_geo.geojson data/pu_2324_SPLIT.geojson
+'''
+import argparse
+import os
+
+import geopandas as gpd
+import pandas as pd
+
+# the CRS the planning unit files and the gravity model already use
+STAGE_CRS = 'EPSG:3857'
+COLUMNAR = ('.parquet', '.feather')
+
+
+def _extension(path):
+    return os.path.splitext(path)[1].lower()
+
+
+def write_stage(gdf, path, crs=STAGE_CRS):
+    '''Write a stage output as GeoParquet or Feather (chosen by extension), reprojected to crs if needed.'''
+    extension = _extension(path)
+    if extension not in COLUMNAR:
+        raise ValueError(f'Stage files must be one of {COLUMNAR}; use export_geojson for GeoJSON')
+    if crs is not None and gdf.crs is not None and gdf.crs != crs:
+        gdf = gdf.to_crs(crs)
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    if extension == '.parquet':
+        gdf.to_parquet(path, index=False)
+    else:
+        gdf.reset_index(drop=True).to_feather(path)
+    return path
+
+
+def read_stage(path, columns=None, crs=None, geometry=True):
+    '''
+    Read a stage file. columns: only read these (the geometry is added unless geometry=False, which returns
+    a plain DataFrame without decoding any geometry). crs: reproject if the file is stored in another CRS.
+    Files that aren't GeoParquet/Feather (e.g. GeoJSON) are read with geopandas.read_file.
+    '''
+    extension = _extension(path)
+    if extension in COLUMNAR:
+        if not geometry:
+            reader = pd.read_parquet if extension == '.parquet' else pd.read_feather
+            return reader(path, columns=columns)
+        if columns is not None and 'geometry' not in columns:
+            columns = list(columns) + ['geometry']
+        reader = gpd.read_parquet if extension == '.parquet' else gpd.read_feather
+        gdf = reader(path, columns=columns)
+    else:
+        gdf = gpd.read_file(path, columns=columns, read_geometry=geometry)
+        if not geometry:
+            return pd.DataFrame(gdf)
+
+    if crs is not None and gdf.crs != crs:
+        gdf = gdf.to_crs(crs)
+    return gdf
+
+
+def export_geojson(gdf, path, crs=None):
+    '''GeoJSON export for viewing or sharing, optionally reprojected (e.g. crs='EPSG:4326' for web maps).'''
+    if crs is not None and gdf.crs is not None and gdf.crs != crs:
+        gdf = gdf.to_crs(crs)
+    gdf.to_file(path, driver='GeoJSON')
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('files', nargs='+', help='GeoJSON (or any file geopandas reads) to convert')
+    parser.add_argument('--format', default='parquet', choices=['parquet', 'feather'])
+    args = parser.parse_args()
+
+    for path in args.files:
+        out = os.path.splitext(path)[0] + '.' + args.format
+        write_stage(gpd.read_file(path), out)
+        print(f'{path} -> {out}')
+
+
+if __name__ == '__main__':
+    main()
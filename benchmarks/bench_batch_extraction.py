@@ -0,0 +1,56 @@
+'''
+Time turning development descriptions into housing unit counts: the per-row extract_units + fill_types applies
+(one pd.Series per row) vs UnitExtractor.count_matrix, serial and with a process pool, and check that all three
+give identical counts. Each run starts with an empty cache.
+
+Run from the repository root:
+    python benchmarks/bench_batch_extraction.py [--sizes 20000 100000] [--processes 4] [--repeat 0.3]
+'''
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.append(os.path.join(ROOT, 'Residential Filter'))
+from res_dev_filter import fill_types
+from unit_extractor import UnitExtractor
+
+from synthetic_data import description_corpus
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', nargs='+', type=int, default=[20000, 100000])
+    parser.add_argument('--processes', type=int, default=os.cpu_count())
+    parser.add_argument('--repeat', type=float, default=0.3, help='share of repeated descriptions in the corpus')
+    args = parser.parse_args()
+
+    print(f"{'descriptions':>12} {'per-row apply':>14} {'count_matrix':>13} {f'{args.processes} processes':>12} "
+          f"{'speedup':>8}  identical")
+    for n in args.sizes:
+        descriptions = pd.Series(description_corpus(n, repeat=args.repeat))
+
+        extractor = UnitExtractor()
+        start = time.perf_counter()
+        reference = descriptions.apply(extractor).apply(fill_types).to_numpy()
+        apply_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        serial = UnitExtractor().count_matrix(descriptions)
+        serial_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        parallel = UnitExtractor().count_matrix(descriptions, processes=args.processes)
+        parallel_time = time.perf_counter() - start
+
+        identical = np.array_equal(reference, serial) and np.array_equal(serial, parallel)
+        print(f'{n:>12} {apply_time:>13.2f}s {serial_time:>12.2f}s {parallel_time:>11.2f}s '
+              f'{apply_time / min(serial_time, parallel_time):>7.1f}x  {identical}')
+
+
+if __name__ == '__main__':
+    main()
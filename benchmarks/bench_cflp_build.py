@@ -0,0 +1,139 @@
+'''
+Build time, solution extraction time and peak memory of the CFLP model: the previous build (a Python dict of
+PySCIPOpt variables and one quicksum constraint at a time, with a getSolVal call for every arc to read a solution)
+vs CFLPModel.build_model (the model written from the arc arrays and read by SCIP in one call, with the solution
+values read back as dense arrays).
+
+Extraction is timed on a fixed solution (every unit assigned to its nearest existing school), so the model does not
+have to be solved. Each build runs in a fresh process so peak memory is its own.
+
+Run from the repository root:
+    python benchmarks/bench_cflp_build.py [--k 20 80 all]
+'''
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+from itertools import product
+
+import numpy as np
+from pyscipopt import Model, quicksum
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+CFLP_DIR = os.path.join(ROOT, 'CFLP Model')
+sys.path.append(CFLP_DIR)
+from CFLP import CFLPModel
+
+
+def dict_build(model):
+    # build_model and its cost dict as they were before the array-backed build
+    c = dict(zip(product(model.I, model.J), np.asarray(model.dist).ravel().tolist()))
+    arcs = [(model.I[a], model.J[b]) for a, b in zip(model.arc_rows.tolist(), model.arc_cols.tolist())]
+    scip = Model('CFLP')
+    x, y = {}, {}
+    for j in model.J:
+        y[j] = scip.addVar(vtype='B', name=f'y({j})')
+    sites_for, units_for = {i: [] for i in model.I}, {j: [] for j in model.J}
+    for i, j in arcs:
+        x[i, j] = scip.addVar(vtype='C', name=f'x({i},{j})')
+        sites_for[i].append(j)
+        units_for[j].append(i)
+    for i in model.I:
+        scip.addCons(quicksum(x[i, j] for j in sites_for[i]) == model.d[i])
+    for j in model.M:
+        scip.addCons(quicksum(x[i, j] for i in units_for[j]) <= model.M[j] * y[j] * model.upper_band)
+        scip.addCons(quicksum(x[i, j] for i in units_for[j]) >= model.M[j] * y[j] * model.lower_band)
+    for i, j in x:
+        scip.addCons(x[i, j] <= model.d[i] * y[j])
+    for j in model.existing_sites:
+        scip.addCons(y[j] == 1)
+    scip.addCons(quicksum(y[j] for j in model.J) <= model.facility_cap)
+    scip.setObjective(quicksum(c[i, j] * x[i, j] for i, j in x), 'minimize')
+    return scip, x, y
+
+
+def nearest_existing(model):
+    # every unit to its nearest existing school: (unit, site) pairs
+    existing = [b for b, j in enumerate(model.J) if j in model.existing_sites]
+    nearest = np.asarray(model.dist)[:, existing].argmin(axis=1)
+    return [(i, model.J[existing[b]]) for i, b in zip(model.I, nearest.tolist())]
+
+
+def run_build(builder, k):
+    model = CFLPModel('hs_full_geo.geojson', 'dps_hs_locations.geojson', 'none', k_nearest=k)
+    model.load_data()
+    model.preprocess()
+    assignment = nearest_existing(model)
+
+    start = time.perf_counter()
+    if builder == 'dict':
+        scip, x, y = dict_build(model)
+    else:
+        model.build_model()
+        scip = model.model
+    build_time = time.perf_counter() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    # set the fixed solution (not timed)
+    sol = scip.createSol()
+    if builder == 'dict':
+        for i, j in assignment:
+            scip.setSolVal(sol, x[i, j], model.d[i])
+            scip.setSolVal(sol, y[j], 1)
+    else:
+        variables = scip.getVars()
+        arcs = dict(zip(zip(np.asarray(model.I)[model.arc_rows].tolist(), np.asarray(model.J)[model.arc_cols].tolist()),
+                        range(len(model.arc_rows))))
+        for i, j in assignment:
+            scip.setSolVal(sol, variables[len(model.J) + arcs[i, j]], model.d[i])
+            scip.setSolVal(sol, variables[model.J.index(j)], 1)
+
+    start = time.perf_counter()
+    if builder == 'dict':
+        assignments = {}
+        for (i, j) in x:
+            if scip.getSolVal(sol, x[i, j]) > 0.5:
+                assignments.setdefault(j, []).append(i)
+    else:
+        model.model = scip
+        assignments = model._solution_from(sol)['assignments']
+    extract_time = time.perf_counter() - start
+
+    print(json.dumps({'build': build_time, 'extract': extract_time, 'rss_mb': peak / 1024,
+                      'vars': scip.getNVars(), 'cons': scip.getNConss(),
+                      'assigned': sum(len(units) for units in assignments.values())}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--k', nargs='+', default=['20', '80', 'all'], help="values of K; 'all' keeps every arc")
+    parser.add_argument('--child', nargs=2, metavar=('BUILDER', 'K'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    # CFLPModel reads its inputs relative to the CFLP Model folder
+    os.chdir(CFLP_DIR)
+
+    if args.child:
+        builder, k = args.child
+        run_build(builder, None if k == 'all' else int(k))
+        return
+
+    print(f"{'k':>5} {'vars':>8} | {'dict build':>10} {'extract':>8} {'peak RSS':>9} {'cons':>8} | "
+          f"{'array build':>11} {'extract':>8} {'peak RSS':>9} {'cons':>8} | same")
+    for k in args.k:
+        results = {}
+        for builder in ('dict', 'array'):
+            out = subprocess.run([sys.executable, os.path.abspath(__file__), '--child', builder, k],
+                                 capture_output=True, text=True, check=True)
+            results[builder] = json.loads(out.stdout.strip().splitlines()[-1])
+        old, new = results['dict'], results['array']
+        print(f"{k:>5} {new['vars']:>8} | {old['build']:>9.2f}s {old['extract']:>7.2f}s {old['rss_mb']:>7.0f}MB "
+              f"{old['cons']:>8} | {new['build']:>10.2f}s {new['extract']:>7.2f}s {new['rss_mb']:>7.0f}MB "
+              f"{new['cons']:>8} | {old['assigned'] == new['assigned']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+'''
+Compare the SCIP and Lagrangian backends of the CFLP model on the same data: time to first feasible solution,
+time to the gap target, objective, lower bound and open facilities. SCIP runs are limited to the K values given
+with --scip-k (the full model does not fit in memory on small machines); the Lagrangian backend runs for every K.
+
+Run from the repository root:
+    python benchmarks/bench_cflp_lagrangian.py [--k 80 all] [--scip-k 80] [--gap 0.01] [--time-limit 1800]
+'''
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+CFLP_DIR = os.path.join(ROOT, 'CFLP Model')
+sys.path.append(CFLP_DIR)
+from CFLP import CFLPModel
+
+
+def solve(args, k, backend):
+    model = CFLPModel(args.pu, args.schools, args.sgr, k_nearest=k, backend=backend,
+                      solver_params={'display/verblevel': 0} if backend == 'scip' else {})
+    model.load_data()
+    model.preprocess()
+
+    start = time.perf_counter()
+    model.build_model()
+    build_time = time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as tmp:
+        log_path = os.path.join(tmp, 'log.jsonl')
+        start = time.perf_counter()
+        model.optimize(log_path=log_path, gap=args.gap, time_limit=args.time_limit)
+        solve_time = time.perf_counter() - start
+        with open(log_path) as f:
+            records = [json.loads(line) for line in f]
+
+    incumbents = [r for r in records if r['event'] == 'incumbent']
+    end = records[-1]
+    return {
+        'k': 'all' if k is None else k,
+        'backend': backend,
+        'build_s': build_time,
+        'first_s': incumbents[0]['time'] if incumbents else float('nan'),
+        'solve_s': solve_time,
+        'status': end['status'],
+        'objective': end['primal'] if end['primal'] is not None else float('nan'),
+        'bound': end['dual'] if end['dual'] is not None else float('nan'),
+        'gap': end['gap'] if end['gap'] is not None else float('nan'),
+        'facilities': sorted(model.solution['facilities']) if model.solution else [],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pu', default='hs_full_geo.geojson', help='planning units file in data/')
+    parser.add_argument('--schools', default='dps_hs_locations.geojson', help='schools file in data/')
+    parser.add_argument('--sgr', default='none', help='SGR level (none, half, full)')
+    parser.add_argument('--k', nargs='+', default=['80', 'all'], help="values of K; 'all' keeps every arc")
+    parser.add_argument('--scip-k', nargs='*', default=['80'], help='values of K to also solve with SCIP')
+    parser.add_argument('--gap', type=float, default=0.01, help='relative gap target for both backends')
+    parser.add_argument('--time-limit', type=float, default=1800, help='time limit per solve in seconds')
+    args = parser.parse_args()
+
+    # CFLPModel reads its inputs relative to the CFLP Model folder
+    os.chdir(CFLP_DIR)
+
+    print(f"{'k':>5} {'backend':>10} {'build s':>8} {'first s':>8} {'solve s':>8} {'status':>10} "
+          f"{'objective':>10} {'bound':>10} {'gap':>7}  facilities")
+    for k in args.k:
+        backends = (['scip'] if k in args.scip_k else []) + ['lagrangian']
+        for backend in backends:
+            r = solve(args, None if k == 'all' else int(k), backend)
+            print(f"{r['k']:>5} {r['backend']:>10} {r['build_s']:>8.1f} {r['first_s']:>8.1f} {r['solve_s']:>8.1f} "
+                  f"{r['status']:>10} {r['objective']:>10.1f} {r['bound']:>10.1f} {r['gap']:>7.2%}  {r['facilities']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+'''
+Solve the CFLP model with the candidate sites pre-screened to the top N (plus the existing schools), for several
+values of N and both screening methods, and compare screening time, solve time and objective.
+Every arc to the kept sites is in the model unless --k is given.
+
+Run from the repository root:
+    python benchmarks/bench_cflp_screening.py [--methods voronoi lagrangian] [--top 5 10 20 50 100 all]
+'''
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+CFLP_DIR = os.path.join(ROOT, 'CFLP Model')
+sys.path.append(CFLP_DIR)
+from CFLP import CFLPModel
+
+
+def run(method, top, args):
+    model = CFLPModel(args.pu, args.schools, args.sgr, k_nearest=args.k, screen=method, screen_top=top,
+                      solver_params={'display/verblevel': 0})
+    model.load_data()
+
+    start = time.perf_counter()
+    model.preprocess()
+    screen_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    model.build_model()
+    model.optimize(gap=args.gap, time_limit=args.time_limit)
+    solve_time = time.perf_counter() - start
+
+    scip = model.model
+    pruned = model.screening[~model.screening['kept']]['reason']
+    return {
+        'method': method,
+        'top': 'all' if top is None else top,
+        'sites': len(model.J),
+        'proven': int(pruned.str.contains('exceeds').sum()),
+        'screen_s': screen_time,
+        'solve_s': solve_time,
+        'status': scip.getStatus(),
+        'objective': model.solution['objective'] if model.solution else float('nan'),
+        'gap': scip.getGap(),
+        'facilities': sorted(model.solution['facilities']) if model.solution else [],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pu', default='hs_full_geo.geojson', help='planning units file in data/')
+    parser.add_argument('--schools', default='dps_hs_locations.geojson', help='schools file in data/')
+    parser.add_argument('--sgr', default='none', help='SGR level (none, half, full)')
+    parser.add_argument('--methods', nargs='+', default=['voronoi', 'lagrangian'])
+    parser.add_argument('--top', nargs='+', default=['5', '10', '20', '50', '100'],
+                        help="values of N; 'all' keeps every site the screen does not prove to be worse")
+    parser.add_argument('--k', type=int, help='also restrict each unit to its k nearest kept sites')
+    parser.add_argument('--gap', type=float, default=0.01, help='relative gap target of the SCIP solve')
+    parser.add_argument('--time-limit', type=float, default=1800, help='SCIP time limit per solve in seconds')
+    args = parser.parse_args()
+
+    # CFLPModel reads its inputs relative to the CFLP Model folder
+    os.chdir(CFLP_DIR)
+
+    print(f"{'method':>10} {'N':>5} {'sites':>6} {'proven':>7} {'screen s':>9} {'solve s':>8} {'status':>10} "
+          f"{'objective':>10} {'gap':>7}  facilities")
+    for method in args.methods:
+        for top in args.top:
+            if top == 'all' and method == 'voronoi':
+                continue
+            r = run(method, None if top == 'all' else int(top), args)
+            print(f"{r['method']:>10} {r['top']:>5} {r['sites']:>6} {r['proven']:>7} {r['screen_s']:>9.2f} "
+                  f"{r['solve_s']:>8.1f} {r['status']:>10} {r['objective']:>10.1f} {r['gap']:>7.2%}  {r['facilities']}")
+
+
+if __name__ == '__main__':
+    main()
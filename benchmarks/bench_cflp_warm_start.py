@@ -0,0 +1,73 @@
+'''
+Solve the CFLP model at one SGR level, then re-solve other SGR levels with and without that solution
+as a MIP start, and compare time to first feasible solution, final gap and objective.
+
+Run from the repository root:
+    python benchmarks/bench_cflp_warm_start.py [--source none] [--targets half full] [--k 80] [--time-limit 600]
+'''
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+CFLP_DIR = os.path.join(ROOT, 'CFLP Model')
+sys.path.append(CFLP_DIR)
+from CFLP import CFLPModel
+
+
+def solve(args, sgr, warm_start=None, open_hint=None):
+    model = CFLPModel(args.pu, args.schools, sgr, k_nearest=args.k, open_hint=open_hint,
+                      solver_params={'limits/time': args.time_limit, 'limits/solutions': -1,
+                                     'display/verblevel': 0})
+    model.load_data()
+    model.preprocess()
+    if warm_start is not None:
+        model.load_warm_start(warm_start)
+    model.build_model()
+
+    start = time.perf_counter()
+    model.optimize()
+    elapsed = time.perf_counter() - start
+
+    scip = model.model
+    first = min(scip.getSolTime(sol) for sol in scip.getSols()) if scip.getNSols() else float('nan')
+    return model, {'first_feasible_s': first, 'total_s': elapsed, 'gap': scip.getGap(),
+                   'objective': scip.getObjVal() if scip.getNSols() else float('nan')}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pu', default='hs_full_geo.geojson', help='planning units file in data/')
+    parser.add_argument('--schools', default='dps_hs_locations.geojson', help='schools file in data/')
+    parser.add_argument('--source', default='none', help='SGR level whose solution is used as the warm start')
+    parser.add_argument('--targets', nargs='+', default=['half', 'full'], help='SGR levels to re-solve')
+    parser.add_argument('--k', type=int, default=80, help='k-nearest sites per planning unit (keeps the model in memory)')
+    parser.add_argument('--time-limit', type=float, default=600, help='SCIP time limit per solve in seconds')
+    args = parser.parse_args()
+
+    # CFLPModel reads its inputs relative to the CFLP Model folder
+    os.chdir(CFLP_DIR)
+
+    source, stats = solve(args, args.source)
+    print(f"source '{args.source}': objective {stats['objective']:.1f}, gap {stats['gap']:.2%}, "
+          f"{stats['total_s']:.1f} s, open {sorted(source.solution['facilities'])}")
+    with tempfile.NamedTemporaryFile('w', suffix='.json', delete=False) as f:
+        json.dump(source.solution, f)
+
+    print(f"{'target':>7} {'start':>10} {'first feasible':>15} {'total':>8} {'gap':>7} {'objective':>10}")
+    for target in args.targets:
+        runs = [('none', {}),
+                ('solution', {'warm_start': f.name}),
+                ('open hint', {'open_hint': source.solution['facilities']})]
+        for label, kwargs in runs:
+            _, stats = solve(args, target, **kwargs)
+            print(f"{target:>7} {label:>10} {stats['first_feasible_s']:>14.2f}s {stats['total_s']:>7.1f}s "
+                  f"{stats['gap']:>7.2%} {stats['objective']:>10.1f}")
+    os.remove(f.name)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+'''
+Time and peak memory of reading the developments shapefile and applying broad_filter: gpd.read_file on the
+whole file vs read_developments (column pruning, pyogrio `where` push-down, geometry for surviving rows only).
+
+The shipped shapefile has no attributes, so its points get a synthetic attribute table, repeated `scale` times
+to stand in for a longer history of cases. Each reader runs in a fresh process so peak memory is its own.
+
+Run from the repository root:
+    python benchmarks/bench_developments_reader.py [--scales 1 5 20]
+'''
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import geopandas as gpd
+import pandas as pd
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.append(os.path.join(ROOT, 'Residential Filter'))
+from res_dev_filter import broad_filter, read_developments
+
+from synthetic_data import development_cases
+
+
+def build_shapefile(path, scale):
+    points = gpd.read_file(os.path.join(ROOT, 'data', 'durham_developments', 'Development_Cases.shp'))
+    geometry = gpd.GeoSeries(pd.concat([points.geometry] * scale, ignore_index=True), crs=points.crs)
+    # extra columns like the ones in the county file that the filter never uses
+    cases = development_cases(geometry)
+    for column in ['A_PROJNAME', 'A_ADDRESS', 'A_PLANNER', 'A_NOTES']:
+        cases[column] = cases['A_DESCRIPT'].str[:40]
+    cases.to_file(path)
+    return len(cases)
+
+
+def run_reader(reader, path):
+    # peak RSS of the whole process, imports included (about 200 MB)
+    start = time.perf_counter()
+    if reader == 'read_file':
+        filtered = broad_filter(gpd.read_file(path))
+    else:
+        filtered = read_developments(path)
+    elapsed = time.perf_counter() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({'time': elapsed, 'rss_mb': peak / 1024, 'rows': len(filtered)}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scales', nargs='+', type=int, default=[1, 5, 20])
+    parser.add_argument('--child', nargs=2, metavar=('READER', 'PATH'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_reader(*args.child)
+        return
+
+    print(f"{'cases':>9} {'kept':>8} | {'read_file':>9} {'peak RSS':>9} | "
+          f"{'read_developments':>17} {'peak RSS':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for scale in args.scales:
+            path = os.path.join(tmp, f'cases_{scale}.shp')
+            n = build_shapefile(path, scale)
+            results = {}
+            for reader in ('read_file', 'read_developments'):
+                out = subprocess.run([sys.executable, __file__, '--child', reader, path],
+                                     capture_output=True, text=True, check=True)
+                results[reader] = json.loads(out.stdout.strip().splitlines()[-1])
+            old, new = results['read_file'], results['read_developments']
+            print(f"{n:>9} {new['rows']:>8} | {old['time']:>8.2f}s {old['rss_mb']:>7.0f}MB | "
+                  f"{new['time']:>16.2f}s {new['rss_mb']:>7.0f}MB")
+
+
+if __name__ == '__main__':
+    main()
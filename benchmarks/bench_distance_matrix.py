@@ -0,0 +1,69 @@
+'''
+Benchmark the vectorized distance matrix against the per-pair geopy loop CFLPModel.preprocess used to run.
+
+Run from the repository root:
+    python benchmarks/bench_distance_matrix.py [--pu hs_full_geo.geojson] [--sample 200]
+'''
+import argparse
+import os
+import sys
+import time
+
+import geopandas as gpd
+import numpy as np
+from geopy.distance import geodesic
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.append(os.path.join(ROOT, 'Shared'))
+from distance_matrix import distance_matrix
+
+
+def load_points(pu_file):
+    pu = gpd.read_file(os.path.join(ROOT, 'data', pu_file)).set_index('pu_2324_84').to_crs('EPSG:4326')
+    centroids = pu.geometry.centroid
+    # same candidate site set as CFLPModel.preprocess: every non-Central planning unit
+    sites = centroids[pu['Region'] != 'Central']
+    return centroids, sites
+
+
+def geopy_loop(centroids, sites):
+    # the original dict comprehension from CFLPModel.preprocess
+    pts_i = {idx: (geom.y, geom.x) for idx, geom in centroids.items()}
+    pts_j = {idx: (geom.y, geom.x) for idx, geom in sites.items()}
+    return {
+        (i, j): geodesic(pts_i[i], pts_j[j]).miles
+        for i in pts_i for j in pts_j
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pu', default='hs_full_geo.geojson', help='planning units file in data/')
+    parser.add_argument('--sample', type=int, default=None,
+                        help='only time the geopy loop on the first N planning units (it is slow)')
+    args = parser.parse_args()
+
+    centroids, sites = load_points(args.pu)
+    baseline_centroids = centroids if args.sample is None else centroids.iloc[:args.sample]
+    print(f'{len(centroids)} planning units x {len(sites)} candidate sites')
+
+    start = time.perf_counter()
+    reference = geopy_loop(baseline_centroids, sites)
+    geopy_time = time.perf_counter() - start
+    reference = np.array(list(reference.values())).reshape(len(baseline_centroids), len(sites))
+    # scale the sampled loop up to the full problem so speedups are comparable
+    geopy_time *= len(centroids) / len(baseline_centroids)
+    print(f'{"geopy loop":<12} {geopy_time:10.3f} s')
+
+    for metric in ('geodesic', 'haversine', 'euclidean'):
+        start = time.perf_counter()
+        dist = distance_matrix(centroids, sites, metric=metric, units='miles')
+        elapsed = time.perf_counter() - start
+
+        err = np.abs(dist[:len(baseline_centroids)] - reference)
+        print(f'{metric:<12} {elapsed:10.3f} s   speedup {geopy_time / elapsed:8.0f}x   '
+              f'max abs error {err.max():.2e} mi   max rel error {(err / np.maximum(reference, 1e-9)).max():.2e}')
+
+
+if __name__ == '__main__':
+    main()
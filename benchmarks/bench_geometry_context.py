@@ -0,0 +1,125 @@
+'''
+Geometry work of the ES, MS and HS runs: every level on its own (read and reproject the planning units, assign the
+developments to them, CFLP load_data + preprocess and the gravity CandidateScorer arrays) vs one GeometryContext
+shared by all three levels. The model solves are not timed; they don't depend on where the arrays came from.
+
+Each way runs with a fresh on-disk distance cache, where the separate runs after the first one read the cached
+arrays (and still hash the geometry to find them), and with no cache (cache_dir=None), where every separate run
+computes them again. The planning unit values are the same for every level (hs_full_geo), and the developments are
+the shipped shapefile's points.
+
+Run from the repository root:
+    python benchmarks/bench_geometry_context.py [--repeat 3]
+'''
+import argparse
+import os
+import sys
+import tempfile
+import time
+import warnings
+
+import geopandas as gpd
+import numpy as np
+import pyogrio
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+for folder in ('Shared', 'CFLP Model', 'Gravity Model'):
+    sys.path.append(os.path.join(ROOT, folder))
+from CFLP import CFLPModel
+from geometry_context import GeometryContext
+from gravity_engine import CandidateScorer
+from spatial_join import assign_polygons
+
+LEVELS = ('es', 'ms', 'hs')
+HIGH_SCHOOLS = ['Southern High School', 'Hillside High School', 'Northern High School', 'Riverside High School',
+                'Jordan High School']
+CAPACITIES = [1600, 1510, 1600, 1540, 1240, 1600]
+
+
+def load_inputs():
+    values = gpd.read_file(os.path.join(ROOT, 'data', 'hs_full_geo.geojson')).drop(columns='geometry')
+    developments = pyogrio.read_dataframe(os.path.join(ROOT, 'data', 'durham_developments', 'Development_Cases.shp'),
+                                          columns=[]).to_crs(epsg=3857)
+    dps_base = gpd.read_file(os.path.join(ROOT, 'data', 'dps_base_2324.geojson')).to_crs(epsg=3857)
+    schools = dps_base.set_index('name').loc[HIGH_SCHOOLS, 'geometry']
+    sites = gpd.read_file(os.path.join(ROOT, 'data', 'dps_hs_locations.geojson'))
+    return values, developments, schools, sites
+
+
+def read_pu():
+    # as ResidentialPipeline.load did for every run
+    pu = gpd.read_file(os.path.join(ROOT, 'data', 'pu_2324_SPLIT.geojson'))
+    pu = pu.rename(columns={'pu_2324_848': 'pu_2324_84'})
+    return pu.sort_values(by='pu_2324_84').to_crs(epsg=3857)
+
+
+def level_units(pu, values):
+    # a level's planning units: the pipeline's geometry with basez and student_gen
+    return pu[['pu_2324_84', 'geometry']].merge(values, on='pu_2324_84')
+
+
+def run(shared, inputs, cache_dir):
+    values, developments, schools, sites = inputs
+    times = dict.fromkeys(['load', 'assign', 'cflp', 'gravity'], 0.0)
+    results = []
+    context = None
+    for _ in LEVELS:
+        start = time.perf_counter()
+        if not shared:
+            pu = read_pu()
+        elif context is None:
+            context = GeometryContext(read_pu(), cache_dir=cache_dir)
+            pu = context.pu
+        times['load'] += time.perf_counter() - start
+
+        start = time.perf_counter()
+        labels = context.assign(developments) if shared else assign_polygons(developments, pu, 'pu_2324_84')
+        times['assign'] += time.perf_counter() - start
+
+        units = level_units(pu, values)
+        start = time.perf_counter()
+        model = CFLPModel(None, None, 'full', cache_dir=cache_dir, context=context)
+        model.load_data(pu=units, schools=sites)
+        model.preprocess()
+        times['cflp'] += time.perf_counter() - start
+
+        start = time.perf_counter()
+        scorer = CandidateScorer(units, schools, CAPACITIES, cache_dir=cache_dir, context=context)
+        times['gravity'] += time.perf_counter() - start
+        results.append((labels, np.asarray(model.dist), scorer.fixed_distances, scorer.fixed_objective_distances))
+    return times, results
+
+
+def same(a, b):
+    return all(x[0].equals(y[0]) and all(np.array_equal(u, v) for u, v in zip(x[1:], y[1:])) for x, y in zip(a, b))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=3, help='runs of each way; the fastest is reported')
+    args = parser.parse_args()
+
+    # the EPSG:4326 centroids warn about the geographic CRS, as the CFLP model always has
+    warnings.filterwarnings('ignore', message='Geometry is in a geographic CRS')
+    inputs = load_inputs()
+    best = {}
+    for _ in range(args.repeat):
+        for cache in ('disk', 'none'):
+            for shared in (False, True):
+                with tempfile.TemporaryDirectory() as cache_dir:
+                    times, results = run(shared, inputs, cache_dir if cache == 'disk' else None)
+                key = (cache, shared)
+                if key not in best or sum(times.values()) < sum(best[key][0].values()):
+                    best[key] = (times, results)
+
+    print(f"{'cache':>5} {'3 levels':>9} {'load':>7} {'assign':>7} {'cflp':>7} {'gravity':>8} {'total':>7}  identical")
+    for cache in ('disk', 'none'):
+        for shared, label in ((False, 'separate'), (True, 'shared')):
+            times = best[cache, shared][0]
+            identical = same(best[cache, False][1], best[cache, shared][1])
+            print(f"{cache:>5} {label:>9} {times['load']:>6.2f}s {times['assign']:>6.2f}s {times['cflp']:>6.2f}s "
+                  f"{times['gravity']:>7.2f}s {sum(times.values()):>6.2f}s  {identical}")
+
+
+if __name__ == '__main__':
+    main()
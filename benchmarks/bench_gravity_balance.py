@@ -0,0 +1,65 @@
+'''
+Compare the fixed-step and adaptive-step balancing loops of the gravity model across every candidate planning unit.
+
+Run from the repository root:
+    python benchmarks/bench_gravity_balance.py [--sgr 30] [--lower 70] [--upper 110]
+'''
+import argparse
+import os
+import sys
+import time
+
+import geopandas as gpd
+import numpy as np
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.append(os.path.join(ROOT, 'Gravity Model'))
+from gravity_engine import CandidateScorer
+
+SCHOOLS = ['Southern High School', 'Hillside High School', 'Northern High School',
+           'Riverside High School', 'Jordan High School']
+CAPACITIES = [1600, 1510, 1600, 1540, 1240, 1600]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sgr', type=int, default=30)
+    parser.add_argument('--lower', type=int, default=70)
+    parser.add_argument('--upper', type=int, default=110)
+    args = parser.parse_args()
+
+    units = gpd.read_file(os.path.join(ROOT, 'data', 'hs_full_geo.geojson')).to_crs(epsg=3857)
+    schools = gpd.read_file(os.path.join(ROOT, 'data', 'dps_base_2324.geojson')).to_crs(epsg=3857)
+    schools = schools.set_index('name').loc[SCHOOLS, 'geometry']
+    scorer = CandidateScorer(units, schools, CAPACITIES)
+
+    print(f'{len(units)} candidates, SGR {args.sgr}%, capacity range {args.lower}-{args.upper}%')
+    print(f"{'method':<10} {'success':>8} {'mean it':>8} {'median it':>10} {'max it':>7} {'passes':>7} {'time':>8}")
+    results = {}
+    for method in ('fixed', 'adaptive'):
+        start = time.perf_counter()
+        results[method] = [scorer.score(k, args.sgr, args.lower, args.upper, method=method) for k in range(len(units))]
+        elapsed = time.perf_counter() - start
+
+        feasible = np.array([r['feasible'] for r in results[method]])
+        iters = np.array([r['iterations'] for r in results[method]])
+        # total assignment passes, including the adaptive refinement passes
+        passes = np.array([len(r['history']) for r in results[method]])
+        if not feasible.any():
+            print(f'{method:<10} {0:>8.1%}')
+            continue
+        print(f'{method:<10} {feasible.mean():>8.1%} {iters[feasible].mean():>8.1f} {np.median(iters[feasible]):>10.0f} '
+              f'{iters[feasible].max():>7} {passes[feasible].mean():>7.1f} {elapsed:>7.2f}s')
+
+    both = [k for k in range(len(units)) if results['fixed'][k]['feasible'] and results['adaptive'][k]['feasible']]
+    diff = np.array([results['adaptive'][k]['objective'] - results['fixed'][k]['objective'] for k in both])
+    rescued = sum(results['adaptive'][k]['feasible'] and not results['fixed'][k]['feasible'] for k in range(len(units)))
+    lost = sum(results['fixed'][k]['feasible'] and not results['adaptive'][k]['feasible'] for k in range(len(units)))
+    print(f'adaptive solves {rescued} candidates the fixed loop fails on and fails {lost} it solves')
+    if both:
+        print(f'objective change where both succeed: mean {diff.mean():+.4f} (fixed mean '
+              f'{np.mean([results["fixed"][k]["objective"] for k in both]):.4f}), max |change| {np.abs(diff).max():.4f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+'''
+Time one gravity-model candidate evaluation: the original per-unit itertuples loop vs GravityEngine.
+
+Run from the repository root:
+    python benchmarks/bench_gravity_engine.py [--candidate 100] [--sgr 30] [--lower 70] [--upper 110]
+'''
+import argparse
+import os
+import sys
+import time
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.append(os.path.join(ROOT, 'Shared'))
+sys.path.append(os.path.join(ROOT, 'Gravity Model'))
+from distance_matrix import distance_matrix
+from gravity_engine import GravityEngine
+
+SCHOOLS = ['Southern High School', 'Hillside High School', 'Northern High School',
+           'Riverside High School', 'Jordan High School']
+CAPACITIES = [1600, 1510, 1600, 1540, 1240, 1600]
+
+
+def load(candidate):
+    units = gpd.read_file(os.path.join(ROOT, 'data', 'hs_full_geo.geojson')).to_crs(epsg=3857)
+    schools = gpd.read_file(os.path.join(ROOT, 'data', 'dps_base_2324.geojson')).to_crs(epsg=3857)
+    schools = schools.set_index('name').loc[SCHOOLS].reset_index()[['name', 'geometry']]
+    schools.loc[len(schools), 'name'] = 'New High School'
+    schools.loc[len(schools) - 1, 'geometry'] = units.loc[candidate, 'geometry'].centroid
+    return units, schools
+
+
+def legacy_loop(units, schools, sgr, lower_bound, upper_bound):
+    # the original score_candidate loop from heuristic_add.py
+    school_names = schools['name'].tolist()
+    counts = pd.DataFrame({'school': school_names, 'capacity': CAPACITIES,
+                           'count': 0, 'adjust': 0})
+    counts['pct_capacity'] = counts['count'] / counts['capacity']
+    i = 0
+    while ((counts['pct_capacity'] < lower_bound / 100) | (counts['pct_capacity'] > upper_bound / 100)).any() and i <= 200:
+        assignments = []
+        for pu in units.itertuples(index=False):
+            centroid = pu.geometry.centroid
+            pu_scores = []
+            for j in range(len(schools)):
+                dist = centroid.distance(schools.loc[j, 'geometry'])
+                pu_scores.append(dist + counts.loc[j, 'adjust'])
+            assignments.append(school_names[pu_scores.index(min(pu_scores))])
+        units['assign'] = assignments
+
+        for j, school in enumerate(school_names):
+            counts.loc[j, 'count'] = int(units.loc[units['assign'] == school, 'basez'].sum()
+                                         + units.loc[units['assign'] == school, 'student_gen'].sum() * sgr / 100)
+            if counts.loc[j, 'count'] <= counts.loc[j, 'capacity'] * lower_bound / 100:
+                counts.loc[j, 'adjust'] -= 200
+            elif counts.loc[j, 'count'] >= counts.loc[j, 'capacity'] * upper_bound / 100:
+                counts.loc[j, 'adjust'] += 200
+        counts['pct_capacity'] = counts['count'] / counts['capacity']
+        i += 1
+    return np.array(assignments), i
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--candidate', type=int, default=100, help='row of the planning unit to site the new school at')
+    parser.add_argument('--sgr', type=int, default=30)
+    parser.add_argument('--lower', type=int, default=70)
+    parser.add_argument('--upper', type=int, default=110)
+    args = parser.parse_args()
+
+    units, schools = load(args.candidate)
+
+    start = time.perf_counter()
+    legacy_assign, legacy_iters = legacy_loop(units, schools, args.sgr, args.lower, args.upper)
+    legacy_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    distances = distance_matrix(units.geometry.centroid, schools.geometry, metric='euclidean', units='meters')
+    setup_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    engine = GravityEngine(distances, units['basez'], units['student_gen'], CAPACITIES)
+    assign, counts, adjust, iters = engine.balance(args.sgr, args.lower, args.upper)
+    engine_time = time.perf_counter() - start
+
+    same = (schools['name'].to_numpy()[assign] == legacy_assign).all() and iters == legacy_iters
+    print(f'{len(units)} planning units x {len(schools)} schools, {iters} iterations')
+    print(f'legacy loop     {legacy_time * 1000:10.1f} ms')
+    print(f'distance array  {setup_time * 1000:10.1f} ms (once per candidate)')
+    print(f'GravityEngine   {engine_time * 1000:10.1f} ms   speedup {legacy_time / engine_time:,.0f}x')
+    print(f'identical assignments: {same}')
+
+
+if __name__ == '__main__':
+    main()
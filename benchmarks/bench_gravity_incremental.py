@@ -0,0 +1,64 @@
+'''
+Time the gravity balancing loop with full reassignment on every pass vs incremental reassignment,
+on random planning units and schools at several sizes, and check that both give the same result.
+
+Run from the repository root:
+    python benchmarks/bench_gravity_incremental.py [--sizes 851x6 8510x30 85100x30]
+'''
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.append(os.path.join(ROOT, 'Gravity Model'))
+from gravity_engine import GravityEngine
+from distance_matrix import euclidean
+
+
+def random_problem(n_units, n_schools, seed=0):
+    # units and schools scattered over a Durham-sized box (40 x 50 km), capacities near an even split
+    rng = np.random.default_rng(seed)
+    x, y = rng.uniform(0, 40000, n_units), rng.uniform(0, 50000, n_units)
+    sx, sy = rng.uniform(5000, 35000, n_schools), rng.uniform(5000, 45000, n_schools)
+    basez = rng.poisson(6, n_units).astype(float)
+    student_gen = rng.poisson(1, n_units).astype(float)
+    capacities = basez.sum() / n_schools * rng.uniform(0.9, 1.1, n_schools)
+    return euclidean(x, y, sx, sy), basez, student_gen, capacities
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', nargs='+', default=['851x6', '851x30', '8510x30', '85100x30'],
+                        help='problem sizes as <units>x<schools>')
+    parser.add_argument('--sgr', type=int, default=30)
+    parser.add_argument('--lower', type=int, default=80)
+    parser.add_argument('--upper', type=int, default=110)
+    args = parser.parse_args()
+
+    print(f"{'size':>10} {'passes':>7} {'full':>9} {'incremental':>12} {'speedup':>8} {'rechecked':>10}  identical")
+    for size in args.sizes:
+        n_units, n_schools = (int(v) for v in size.split('x'))
+        problem = random_problem(n_units, n_schools)
+
+        times, results = [], []
+        for incremental in (False, True):
+            engine = GravityEngine(*problem, incremental=incremental)
+            start = time.perf_counter()
+            results.append(engine.balance_adaptive(args.sgr, args.lower, args.upper))
+            times.append(time.perf_counter() - start)
+        passes = len(engine.history)
+
+        # share of units re-checked per pass by the incremental run
+        rechecked = np.mean([h['rechecked'] for h in engine.history]) / n_units
+
+        (a1, c1, _, i1), (a2, c2, _, i2) = results
+        identical = (a1 == a2).all() and (c1 == c2).all() and i1 == i2
+        print(f'{size:>10} {passes:>7} {times[0]:>8.3f}s {times[1]:>11.3f}s {times[0] / times[1]:>7.2f}x '
+              f'{rechecked:>10.1%}  {identical}')
+
+
+if __name__ == '__main__':
+    main()
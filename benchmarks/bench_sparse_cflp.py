@@ -0,0 +1,70 @@
+'''
+Compare model size, build time and solve time of the CFLP model restricted to each planning unit's K nearest sites.
+
+Run from the repository root:
+    python benchmarks/bench_sparse_cflp.py --k 5 10 20 40 all --time-limit 1800
+'''
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+CFLP_DIR = os.path.join(ROOT, 'CFLP Model')
+sys.path.append(CFLP_DIR)
+from CFLP import CFLPModel
+
+
+def run(k, args):
+    model = CFLPModel(args.pu, args.schools, args.sgr, k_nearest=k,
+                      solver_params={'limits/time': args.time_limit, 'limits/solutions': args.solutions,
+                                     'display/verblevel': 0})
+    model.load_data()
+    model.preprocess()
+
+    start = time.perf_counter()
+    model.build_model()
+    build_time = time.perf_counter() - start
+    n_vars, n_cons = model.model.getNVars(), model.model.getNConss()
+
+    start = time.perf_counter()
+    model.optimize()
+    solve_time = time.perf_counter() - start
+
+    status = model.model.getStatus()
+    obj = model.model.getObjVal() if model.model.getNSols() > 0 else float('nan')
+    return {
+        'k': 'all' if k is None else k,
+        'final_k': 'all' if model.k_nearest is None or not model.pruned else model.k_nearest,
+        'vars': n_vars, 'cons': n_cons,
+        'build_s': build_time, 'solve_s': solve_time,
+        'status': status, 'objective': obj, 'gap': model.model.getGap(),
+        'facilities': sorted(model.solution['facilities']),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pu', default='hs_full_geo.geojson', help='planning units file in data/')
+    parser.add_argument('--schools', default='dps_hs_locations.geojson', help='schools file in data/')
+    parser.add_argument('--sgr', default='none', help='SGR level (none, half, full)')
+    parser.add_argument('--k', nargs='+', default=['5', '10', '20', '40'],
+                        help="values of K to try; 'all' builds the full model")
+    parser.add_argument('--time-limit', type=float, default=1800, help='SCIP time limit per run in seconds')
+    parser.add_argument('--solutions', type=int, default=-1,
+                        help='SCIP solution limit; the model itself stops at the first solution (1), -1 solves to the 1%% gap')
+    args = parser.parse_args()
+
+    # CFLPModel reads its inputs relative to the CFLP Model folder
+    os.chdir(CFLP_DIR)
+
+    header = f"{'k':>5} {'final k':>8} {'vars':>9} {'cons':>9} {'build s':>8} {'solve s':>9} {'status':>10} {'objective':>12} {'gap':>7}  facilities"
+    print(header)
+    for k in args.k:
+        r = run(None if k == 'all' else int(k), args)
+        print(f"{r['k']:>5} {r['final_k']:>8} {r['vars']:>9} {r['cons']:>9} {r['build_s']:>8.1f} {r['solve_s']:>9.1f} "
+              f"{r['status']:>10} {r['objective']:>12.1f} {r['gap']:>7.2%}  {r['facilities']}")
+
+
+if __name__ == '__main__':
+    main()
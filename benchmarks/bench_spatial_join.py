@@ -0,0 +1,82 @@
+'''
+Time the region and planning unit assignment of developments: the per-polygon contains loops from
+sgr_htype_region.py vs the spatial index in Shared/spatial_join.py, and check that they agree.
+
+Run from the repository root:
+    python benchmarks/bench_spatial_join.py [--buffer 50]
+'''
+import argparse
+import os
+import sys
+import time
+
+import geopandas as gpd
+import numpy as np
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.append(os.path.join(ROOT, 'Shared'))
+from spatial_join import assign_polygons, sum_by_polygon
+
+
+def contains_loop(developments, polygons, column, by_label=False):
+    # the loops from sgr_htype_region.py; by_label reproduces the planning unit loop, which looks up
+    # the id with .loc[i] after sorting, so it can pair a geometry with another row's id
+    developments = developments.copy()
+    for i, geometry in enumerate(polygons['geometry']):
+        in_geometry = geometry.contains(developments['geometry'])
+        value = polygons.loc[i, column] if by_label else polygons[column].iloc[i]
+        developments.loc[in_geometry, column] = value
+    return developments[column]
+
+
+def timed(f, *args, **kwargs):
+    start = time.perf_counter()
+    result = f(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--developments', default=os.path.join('durham_developments', 'Development_Cases.shp'))
+    parser.add_argument('--pu', default='pu_2324_SPLIT.geojson')
+    parser.add_argument('--buffer', type=float, default=50,
+                        help='radius in meters of the polygons built around each development for the overlay timing')
+    args = parser.parse_args()
+
+    developments = gpd.read_file(os.path.join(ROOT, 'data', args.developments)).to_crs(epsg=3857)
+    regions = gpd.read_file(os.path.join(ROOT, 'data', 'durham_regions.geojson'))[['region', 'geometry']].to_crs(epsg=3857)
+    dps_pu = gpd.read_file(os.path.join(ROOT, 'data', args.pu)).rename(columns={'pu_2324_848': 'pu_2324_84'})
+    dps_pu = dps_pu.to_crs(epsg=3857).sort_values(by='pu_2324_84')
+    developments['student_gen'] = np.random.default_rng(0).uniform(0, 5, len(developments))
+    print(f'{len(developments)} developments, {len(regions)} regions, {len(dps_pu)} planning units')
+
+    print(f"{'lookup':<16} {'loop':>8} {'sindex':>8} {'speedup':>8}  result")
+    loop, loop_time = timed(contains_loop, developments, regions, 'region')
+    fast, fast_time = timed(assign_polygons, developments, regions, 'region')
+    same = loop.fillna('').astype(str).equals(fast.fillna('').astype(str))
+    print(f"{'region':<16} {loop_time:>7.2f}s {fast_time:>7.2f}s {loop_time / fast_time:>7.0f}x  identical: {same}")
+
+    original, loop_time = timed(contains_loop, developments, dps_pu.reset_index(drop=True), 'pu_2324_84')
+    fast, fast_time = timed(assign_polygons, developments, dps_pu, 'pu_2324_84')
+    same = original.astype(float).equals(fast.astype(float))
+    print(f"{'planning unit':<16} {loop_time:>7.2f}s {fast_time:>7.2f}s {loop_time / fast_time:>7.0f}x  identical: {same}")
+
+    # the original loop with the id looked up by label rather than position
+    by_label = contains_loop(developments, dps_pu, 'pu_2324_84', by_label=True)
+    differ = (by_label.astype(float) != fast.astype(float)) & by_label.notna()
+    print(f'the original label lookup assigns {differ.sum()} of {by_label.notna().sum()} developments '
+          f'to a different planning unit than the one containing them')
+
+    _, sum_time = timed(sum_by_polygon, developments, developments['student_gen'], dps_pu, 'pu_2324_84')
+    print(f'student_gen by planning unit (points): {sum_time:.2f}s')
+
+    polygons = developments.copy()
+    polygons['geometry'] = polygons.buffer(args.buffer)
+    for method in ('representative', 'overlay'):
+        totals, elapsed = timed(sum_by_polygon, polygons, polygons['student_gen'], dps_pu, 'pu_2324_84', method=method)
+        print(f'student_gen by planning unit ({args.buffer:g} m polygons, {method}): {elapsed:.2f}s, '
+              f'total {totals.sum():.1f} of {polygons["student_gen"].sum():.1f}')
+
+
+if __name__ == '__main__':
+    main()
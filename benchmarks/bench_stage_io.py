@@ -0,0 +1,73 @@
+'''
+Time loading and saving the files passed between stages as GeoJSON (reprojected on every load, as the models do)
+and as GeoParquet/Feather written by Shared/stage_io.py, plus a column-projected read and the file sizes.
+
+Run from the repository root:
+    python benchmarks/bench_stage_io.py [--repeat 5]
+'''
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import geopandas as gpd
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.append(os.path.join(ROOT, 'Shared'))
+from stage_io import STAGE_CRS, read_stage, write_stage
+
+from synthetic_data import development_cases
+
+# file, columns a later stage reads
+INPUTS = {
+    'hs_full_geo': ('hs_full_geo.geojson', ['pu_2324_84', 'basez', 'student_gen']),
+    'pu_2324_SPLIT': ('pu_2324_SPLIT.geojson', ['pu_2324_84']),
+}
+
+
+def best_of(repeat, fn):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def size_mb(path):
+    return os.path.getsize(path) / 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=5, help='report the best of this many runs')
+    args = parser.parse_args()
+
+    frames = {name: (gpd.read_file(os.path.join(ROOT, 'data', path)), columns)
+              for name, (path, columns) in INPUTS.items()}
+    # the shipped shapefile has no attributes, so give its points a synthetic attribute table
+    points = gpd.read_file(os.path.join(ROOT, 'data', 'durham_developments', 'Development_Cases.shp'))
+    frames['developments'] = (development_cases(points.geometry), ['A_NUMBER', 'A_STATUS_D'])
+
+    print(f"{'file':>14} {'format':>8} {'size':>9} {'write':>8} {'read':>8} {'read cols':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, (gdf, columns) in frames.items():
+            geojson = os.path.join(tmp, name + '.geojson')
+            gdf.to_file(geojson, driver='GeoJSON')
+            write = best_of(args.repeat, lambda: gdf.to_file(geojson, driver='GeoJSON'))
+            read = best_of(args.repeat, lambda: gpd.read_file(geojson).to_crs(STAGE_CRS))
+            read_cols = best_of(args.repeat, lambda: gpd.read_file(geojson, columns=columns).to_crs(STAGE_CRS))
+            print(f'{name:>14} {"geojson":>8} {size_mb(geojson):>7.2f}MB {write:>7.3f}s {read:>7.3f}s {read_cols:>9.3f}s')
+
+            for extension in ('parquet', 'feather'):
+                path = os.path.join(tmp, f'{name}.{extension}')
+                write = best_of(args.repeat, lambda: write_stage(gdf, path))
+                read = best_of(args.repeat, lambda: read_stage(path, crs=STAGE_CRS))
+                read_cols = best_of(args.repeat, lambda: read_stage(path, columns=columns, crs=STAGE_CRS))
+                print(f'{name:>14} {extension:>8} {size_mb(path):>7.2f}MB {write:>7.3f}s {read:>7.3f}s '
+                      f'{read_cols:>9.3f}s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+'''
+Time student generation per development: the count_students row apply from sgr_htype_region.py vs the
+vectorized student_generation, on random developments with the real SGR table, and check that they agree.
+
+Run from the repository root:
+    python benchmarks/bench_student_generation.py [--sizes 1000 10000 100000]
+'''
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.append(os.path.join(ROOT, 'Residential Filter'))
+from student_generation import HTYPE_MAP, SGR_COLUMNS, student_generation
+
+
+def load_sgr_data():
+    # read as in sgr_htype_region.py
+    sgr_data = pd.read_csv(os.path.join(ROOT, 'data', 'sgr_tables_htype_reg.csv'), dtype=str, keep_default_na=False)
+    sgr_data = sgr_data[sgr_data['region'] != '']
+    sgr_columns = list(SGR_COLUMNS.values())
+    sgr_data = sgr_data[['housing_type', 'region'] + sgr_columns].set_index(['region', 'housing_type'])
+    return sgr_data.apply(pd.to_numeric, errors='coerce')
+
+
+def count_students(row, sgr_data, column):
+    # the original row function from sgr_htype_region.py
+    region = row['region']
+    total = 0
+    for col_name, sgr_col in HTYPE_MAP.items():
+        count = row.get(col_name, 0)
+        try:
+            multiplier = sgr_data.loc[(region, sgr_col), column]
+        except KeyError:
+            multiplier = 0
+        total += count * multiplier
+    return total
+
+
+def random_developments(n, regions, seed=0):
+    rng = np.random.default_rng(seed)
+    developments = pd.DataFrame({h: rng.poisson(0.5, n) * rng.integers(1, 200, n) for h in HTYPE_MAP})
+    # a few developments outside every region
+    developments['region'] = pd.Series(rng.choice(list(regions) + [None], n, p=[0.19] * 5 + [0.05]))
+    return developments
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', nargs='+', type=int, default=[1000, 10000, 100000])
+    args = parser.parse_args()
+
+    sgr_data = load_sgr_data()
+    regions = sgr_data.index.get_level_values('region').unique()
+    columns = list(SGR_COLUMNS.values())
+
+    print(f"{'developments':>12} {'row apply (k12)':>16} {'row apply (4 levels)':>21} {'vectorized (4 levels)':>22} "
+          f"{'speedup':>8}  identical")
+    for n in args.sizes:
+        developments = random_developments(n, regions)
+
+        start = time.perf_counter()
+        reference = developments.apply(count_students, axis=1, args=(sgr_data, SGR_COLUMNS['k12']))
+        apply_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        result = student_generation(developments, sgr_data, columns)
+        vector_time = time.perf_counter() - start
+
+        identical = np.array_equal(reference.to_numpy(dtype=float), result[SGR_COLUMNS['k12']].to_numpy(), equal_nan=True)
+        # the old code needs one apply per school level
+        print(f'{n:>12} {apply_time:>15.2f}s {apply_time * len(columns):>20.2f}s {vector_time:>21.4f}s '
+              f'{apply_time * len(columns) / vector_time:>7.0f}x  {identical}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,256 @@
+'''
+Benchmark suite for all three stages on synthetic data at multiples of Durham's size (851 planning units, 21,493
+development cases and 5 high schools at scale 1, see synthetic_data.py). Stages:
+
+    broad_filter        filter the development cases
+    extract_units       housing units of every description that passes the filter, starting with an empty cache
+    spatial_assignment  region and planning unit of every filtered development, as in sgr_htype_region.py
+    cflp_preprocess     CFLPModel.preprocess, computing the distance matrix (no disk cache)
+    cflp_build          CFLPModel.build_model on each unit's --k nearest sites
+    candidate_scorer    CandidateScorer distance arrays for the existing schools (no disk cache)
+    score_candidate     one CandidateScorer.score call (what heuristic_add.score_candidate runs), mean per candidate
+
+Each scale runs in its own process, and that process's peak memory (setup and every stage run) is recorded once
+per scale as the 'process' record. Every stage is timed --repeat times and the fastest is kept. The results are
+appended to a JSON Lines history (one record per stage and scale, with the commit and machine) and compared with the
+last record of the same stage and scale from the same machine and settings.
+
+Run from the repository root:
+    python benchmarks/bench_suite.py [--scales 1 10 100] [--stages cflp_build score_candidate] [--repeat 3]
+    python benchmarks/bench_suite.py --show      # the history so far
+'''
+import argparse
+import datetime
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+for folder in ('Shared', 'Residential Filter', 'CFLP Model', 'Gravity Model'):
+    sys.path.append(os.path.join(ROOT, folder))
+from CFLP import CFLPModel
+from gravity_engine import CandidateScorer
+from res_dev_filter import broad_filter
+from spatial_join import assign_polygons, sum_by_polygon
+from synthetic_data import (DURHAM_CASES, DURHAM_UNITS, development_points, planning_unit_grid, region_polygons,
+                            school_set)
+from unit_extractor import UnitExtractor
+
+STAGES = ['broad_filter', 'extract_units', 'spatial_assignment', 'cflp_preprocess', 'cflp_build', 'candidate_scorer',
+          'score_candidate']
+HISTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'history.jsonl')
+
+
+def best_of(repeat, run, setup=None):
+    # fastest of repeat runs; setup() builds fresh inputs for each run outside the timing
+    times = []
+    for _ in range(repeat):
+        inputs = setup() if setup is not None else ()
+        start = time.perf_counter()
+        run(*inputs)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def run_scale(scale, args):
+    # one record per stage: items processed and seconds (or the reason it was skipped); then the process record
+    units = planning_unit_grid(DURHAM_UNITS * scale, seed=scale)
+    regions = region_polygons(units)
+    schools = school_set(units, args.schools * scale, seed=scale)
+    capacity = int(schools['capacity'].iloc[0])
+    cases = development_points(DURHAM_CASES * scale, seed=scale)
+    filtered = broad_filter(cases)
+    results = []
+
+    def record(stage, size, seconds=None, skipped=None):
+        if stage in args.stages:
+            results.append({'stage': stage, 'size': size, 'seconds': seconds, 'skipped': skipped})
+
+    if 'broad_filter' in args.stages:
+        record('broad_filter', len(cases), best_of(args.repeat, lambda: broad_filter(cases)))
+
+    if 'extract_units' in args.stages:
+        descriptions = filtered['A_DESCRIPT'].tolist()
+        record('extract_units', len(descriptions), best_of(
+            args.repeat, lambda extractor: [extractor.extract(d) for d in descriptions],
+            setup=lambda: (UnitExtractor(),)))
+
+    if 'spatial_assignment' in args.stages:
+        def assign(developments, regions, units):
+            developments['region'] = assign_polygons(developments, regions, 'region')
+            sum_by_polygon(developments, developments['region'].notna().astype(float), units, 'pu_2324_84')
+        # fresh copies, so each run builds its own spatial indexes as a new process would
+        record('spatial_assignment', len(filtered), best_of(
+            args.repeat, assign, setup=lambda: (filtered.copy(), regions.copy(), units.copy())))
+
+    sites = int((units['Region'] != 'Central').sum())
+    cflp_stages = [stage for stage in ('cflp_preprocess', 'cflp_build') if stage in args.stages]
+    if cflp_stages and len(units) * sites > args.max_cells:
+        for stage in cflp_stages:
+            record(stage, len(units), skipped=f'{len(units)} x {sites} distance matrix is over --max-cells')
+    elif cflp_stages:
+        def model():
+            m = CFLPModel(None, None, 'full', cache_dir=None, k_nearest=args.k, site_capacity=capacity,
+                          existing_sites=dict(zip(schools['pu_2324_84'].tolist(), schools['capacity'].tolist())),
+                          solver_params={'display/verblevel': 0})
+            m.load_data(pu=units, schools=schools)
+            return m
+        record('cflp_preprocess', len(units), best_of(args.repeat, lambda m: m.preprocess(), setup=lambda: (model(),)))
+
+        def preprocessed():
+            m = model()
+            m.preprocess()
+            return (m,)
+        record('cflp_build', len(units), best_of(args.repeat, lambda m: m.build_model(), setup=preprocessed))
+
+    capacities = schools['capacity'].tolist() + [capacity]
+    if 'candidate_scorer' in args.stages:
+        record('candidate_scorer', len(units), best_of(
+            args.repeat, lambda: CandidateScorer(units, schools.geometry, capacities, cache_dir=None)))
+
+    if 'score_candidate' in args.stages:
+        scorer = CandidateScorer(units, schools.geometry, capacities, cache_dir=None)
+        rng = np.random.default_rng(scale)
+        candidates = rng.choice(np.flatnonzero(units['Region'].to_numpy() != 'Central'), args.candidates, replace=False)
+        seconds = best_of(args.repeat, lambda: [scorer.score(c, 30, 70, 110) for c in candidates])
+        record('score_candidate', len(units), seconds / len(candidates))
+
+    # ru_maxrss is the high-water mark of the whole process, so it can only be given once per scale
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    results.append({'stage': 'process', 'size': len(units), 'seconds': None, 'skipped': None,
+                    'stages': args.stages, 'peak_rss_mb': round(peak)})
+    return results
+
+
+def git_state():
+    def git(*command):
+        out = subprocess.run(['git', *command], cwd=ROOT, capture_output=True, text=True)
+        return out.stdout.strip() if out.returncode == 0 else None
+    status = git('status', '--porcelain', '--untracked-files=no')
+    return git('rev-parse', '--short', 'HEAD'), None if status is None else bool(status)
+
+
+def machine():
+    return {'platform': platform.platform(), 'processor': platform.processor() or platform.machine(),
+            'cpus': os.cpu_count(), 'python': platform.python_version()}
+
+
+def read_history(path):
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def previous(history, record, value='seconds'):
+    # last record with a value of the same stage and scale, from the same machine with the same settings
+    # (and for the process record, the same stages)
+    same = ('stage', 'scale', 'machine', 'settings', 'stages')
+    for old in reversed(history):
+        if all(old.get(key) == record.get(key) for key in same) and old.get(value) is not None:
+            return old
+    return None
+
+
+def change(new, old, threshold, words=('slower', 'faster')):
+    # ratio to the previous value, flagged when it grew or shrank by more than threshold
+    if old is None:
+        return ''
+    ratio = new / old
+    flag = words[0] if ratio > threshold else words[1] if ratio < 1 / threshold else ''
+    return f'{ratio:.2f}x {flag}'.rstrip()
+
+
+def show(history, last=5):
+    # the last runs of every stage and scale, oldest first
+    if not history:
+        print('No history yet.')
+        return
+    table = pd.DataFrame(history)
+    table['run'] = table['commit'].fillna('?') + table['dirty'].map({True: '+', False: ''}).fillna('')
+    for (scale, stage), rows in table.groupby(['scale', 'stage'], sort=False):
+        if stage == 'process':
+            runs = ', '.join(f'{r.run} {r.peak_rss_mb:.0f}MB' for r in rows.tail(last).itertuples())
+            stage = 'peak RSS'
+        else:
+            runs = ', '.join(f"{r.run} {r.seconds:.3f}s" if pd.notna(r.seconds) else f'{r.run} skipped'
+                             for r in rows.tail(last).itertuples())
+        print(f'{scale:>4}x {stage:<19} {runs}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scales', nargs='+', type=int, default=[1, 10, 100], help="multiples of Durham's size")
+    parser.add_argument('--stages', nargs='+', default=STAGES, choices=STAGES)
+    parser.add_argument('--repeat', type=int, default=3, help='runs of each stage; the fastest is recorded')
+    parser.add_argument('--schools', type=int, default=5, help='existing schools per scale unit')
+    parser.add_argument('--k', type=int, default=20, help='arcs per planning unit in cflp_build')
+    parser.add_argument('--candidates', type=int, default=3, help='candidates scored in score_candidate')
+    parser.add_argument('--max-cells', type=float, default=1e8,
+                        help='skip the CFLP stages when units x sites is larger (the matrix is 8 bytes per cell)')
+    parser.add_argument('--threshold', type=float, default=1.2,
+                        help='flag a stage as slower or faster (or the peak memory as larger or smaller) when it '
+                             'changes by more than this factor')
+    parser.add_argument('--history', default=HISTORY, help='JSON Lines file the results are appended to')
+    parser.add_argument('--no-history', action='store_true', help="print the results but don't record them")
+    parser.add_argument('--show', action='store_true', help='print the history and exit')
+    parser.add_argument('--child', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child is not None:
+        print(json.dumps(run_scale(args.child, args)))
+        return
+    history = read_history(args.history)
+    if args.show:
+        show(history)
+        return
+
+    commit, dirty = git_state()
+    settings = {'repeat': args.repeat, 'schools': args.schools, 'k': args.k, 'candidates': args.candidates}
+    common = {'timestamp': datetime.datetime.now().isoformat(timespec='seconds'), 'commit': commit, 'dirty': dirty,
+              'machine': machine(), 'settings': settings}
+    options = [str(a) for a in ('--stages', *args.stages, '--repeat', args.repeat, '--schools', args.schools,
+                                '--k', args.k, '--candidates', args.candidates, '--max-cells', args.max_cells)]
+
+    print(f"{'scale':>5} {'stage':<19} {'size':>9} {'value':>9} {'previous':>9} change")
+    records = []
+    for scale in args.scales:
+        out = subprocess.run([sys.executable, os.path.abspath(__file__), '--child', str(scale), *options],
+                             capture_output=True, text=True)
+        if out.returncode != 0:
+            # e.g. killed for running out of memory; the other scales are still recorded
+            print(f'{scale:>4}x failed with exit code {out.returncode}: {out.stderr.strip()[-300:]}')
+            continue
+        for result in json.loads(out.stdout.strip().splitlines()[-1]):
+            record = {**common, 'scale': scale, **result}
+            records.append(record)
+            if record['stage'] == 'process':
+                old = previous(history, record, 'peak_rss_mb')
+                before = f"{old['peak_rss_mb']}MB" if old else ''
+                grown = change(record['peak_rss_mb'], old and old['peak_rss_mb'], args.threshold, ('larger', 'smaller'))
+                print(f"{scale:>4}x {'peak RSS':<19} {record['size']:>9} {record['peak_rss_mb']:>7}MB {before:>9} "
+                      f"{grown}")
+                continue
+            if record['seconds'] is None:
+                print(f"{scale:>4}x {record['stage']:<19} {record['size']:>9} skipped: {record['skipped']}")
+                continue
+            old = previous(history, record)
+            before = f"{old['seconds']:.3f}s" if old else ''
+            print(f"{scale:>4}x {record['stage']:<19} {record['size']:>9} {record['seconds']:>8.3f}s {before:>9} "
+                  f"{change(record['seconds'], old and old['seconds'], args.threshold)}")
+
+    if not args.no_history:
+        with open(args.history, 'a') as f:
+            f.writelines(json.dumps(record) + '\n' for record in records)
+        print(f'Results appended to {args.history}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,158 @@
+'''
+Time the housing unit extractor: the original extract_units (patterns rebuilt on every call), UnitExtractor with
+compiled patterns and a result cache, and the backtracking-safe token matcher. Checks that all give identical output.
+
+Uses the A_DESCRIPT column of Development_Cases.shp. If the shapefile has no attribute table, a synthetic corpus of
+the same size is used instead.
+
+Run from the repository root:
+    python benchmarks/bench_unit_extractor.py [--shapefile durham_developments/Development_Cases.shp] [--synthetic]
+'''
+import argparse
+import os
+import re
+import sys
+import time
+
+import pyogrio
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.append(os.path.join(ROOT, 'Residential Filter'))
+from unit_extractor import UnitExtractor
+from synthetic_data import description_corpus
+
+
+def normalize_for_regex(term):
+    return re.sub(r'[-\s]+', r'\\s*-?\\s*', term)
+
+
+def legacy_extract_units(description):
+    # the original extract_units from res_dev_filter.py
+    description = re.sub(
+        r'(\d+|\d{1,3}(,\d{3})*)(\s+[A-Za-z-]+){0,2}?\s*(SF|square feet|sq\.?\s*ft\.?|sqft)',
+        '', description, flags=re.IGNORECASE
+    )
+
+    term_map = {
+        "home": "home", "homes": "home", "house": "home", "houses": "home",
+        "duplex": "duplex", "duplexes": "duplex",
+        "condo": "condo", "condominium": "condo", "condominiums": "condo", "condos": "condo",
+        "apartment": "apartment", "apartments": "apartment",
+        "townhome": "townhouse", "townhomes": "townhouse",
+        "townhouse": "townhouse", "townhouses": "townhouse",
+        "town home": "townhouse", "town homes": "townhouse",
+        "town house": "townhouse", "town houses": "townhouse",
+        "multifamily": "multifamily", "multi-family": "multifamily",
+        "multi - family": "multifamily", "multi family": "multifamily",
+        "mutifamily": "multifamily", "MF": "multifamily",
+        "single family": "single family", "single-family": "single family",
+        "single - family": "single family", "s-f": "single family", "s - f": "single family", "s f": "single family"
+    }
+
+    modifiers = ["attached", "detached"]
+    suffixes = ["units", "lots", "homes", "houses"]
+
+    housing_pattern = "|".join([normalize_for_regex(term) for term in term_map])
+    modifier_pattern = "|".join(modifiers)
+    suffix_pattern = "|".join(suffixes)
+
+    match_pattern = rf'''
+    (?:
+        (?P<qty>\(?\d{{1,4}}\)?)
+        (?:\s*[-+&/]?\s*)?
+        (?:({modifier_pattern})\s*){{0,2}}?
+        (?:\w+\s*){{0,4}}?
+        (?P<type>{housing_pattern})
+        (?:\s+({modifier_pattern}))?
+        (?:\s+(?P<suffix>{suffix_pattern}))?
+
+    |
+        (?P<type2>{housing_pattern})
+        (?:\s+({modifier_pattern}))?
+        (?:\s*[-+&/]?\s*)?
+        (?:\w+\s*){{0,4}}?
+        (?P<qty2>\(?\d{{1,4}}\)?)
+        (?:\s+(?P<suffix2>{suffix_pattern}))?
+
+    |
+        (?P<type3>{housing_pattern})
+        (?:\s+\w+){{0,4}}?
+        \(\s*(?P<qty3>\d{{1,4}})\s+(?P<suffix3>{suffix_pattern})\s*\)
+    )
+'''
+
+    matches = re.finditer(match_pattern, description, flags=re.IGNORECASE | re.VERBOSE)
+
+    result = []
+    for match in matches:
+        qty = match.group("qty") or match.group("qty2")
+        raw_type = match.group("type") or match.group("type2")
+        raw_mod = match.group(2)
+        raw_suffix = match.group("suffix") or match.group("suffix2")
+
+        if not qty or not raw_type:
+            continue
+
+        norm_key = re.sub(r'[-\s]+', ' ', raw_type.lower()).strip()
+        normalized_type = term_map.get(norm_key, norm_key)
+
+        result.append((
+            int(qty.strip("()")),
+            raw_mod.lower() if raw_mod else None,
+            normalized_type,
+            raw_suffix.lower() if raw_suffix else None
+        ))
+
+    return result
+
+
+def load_corpus(args):
+    path = os.path.join(ROOT, 'data', args.shapefile)
+    fields = pyogrio.read_info(path)['fields']
+    if args.synthetic or 'A_DESCRIPT' not in fields:
+        n = pyogrio.read_info(path)['features']
+        print(f'{args.shapefile} has no A_DESCRIPT column, using {n} synthetic descriptions' if not args.synthetic
+              else f'using {n} synthetic descriptions')
+        return description_corpus(n)
+    descriptions = pyogrio.read_dataframe(path, columns=['A_DESCRIPT'], read_geometry=False)['A_DESCRIPT']
+    return descriptions.dropna().tolist()
+
+
+def timed(extract, corpus):
+    start = time.perf_counter()
+    results = [extract(d) for d in corpus]
+    return results, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--shapefile', default=os.path.join('durham_developments', 'Development_Cases.shp'),
+                        help='developments shapefile in data/')
+    parser.add_argument('--synthetic', action='store_true', help='use a synthetic corpus even if A_DESCRIPT exists')
+    parser.add_argument('--long-word', type=int, default=60,
+                        help='length of the unbroken word (e.g. a pasted URL) in the description used to time backtracking')
+    args = parser.parse_args()
+
+    corpus = load_corpus(args)
+    print(f'{len(corpus)} descriptions, {len(set(corpus))} distinct')
+
+    reference, legacy_time = timed(legacy_extract_units, corpus)
+    print(f"{'extractor':<24} {'time':>8} {'speedup':>8}  identical")
+    print(f"{'original extract_units':<24} {legacy_time:>7.2f}s {1:>7.1f}x")
+    for method in ('regex', 'tokens'):
+        extractor = UnitExtractor(method)
+        for label in ('cold cache', 'warm cache'):
+            results, elapsed = timed(extractor, corpus)
+            print(f"{method + ', ' + label:<24} {elapsed:>7.2f}s {legacy_time / elapsed:>7.1f}x  {results == reference}")
+
+    # a quantity followed by a long word and no housing type: the regex tries every way of
+    # splitting the word into up to 4 pieces before giving up
+    long_description = 'Lot 12 ' + 'abcdefghij' * (args.long_word // 10)
+    for label, extract in (('regex', UnitExtractor('regex')), ('tokens', UnitExtractor('tokens'))):
+        start = time.perf_counter()
+        extract(long_description)
+        print(f'{args.long_word}-character word, {label}: {time.perf_counter() - start:.3f}s')
+
+
+if __name__ == '__main__':
+    main()
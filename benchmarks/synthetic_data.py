@@ -0,0 +1,149 @@
+'''
+Synthetic inputs for the benchmarks, for when the real files are missing columns or a larger scale is needed.
+'''
+import math
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import shapely
+
+HOUSING_WORDS = ['townhomes', 'townhouses', 'town homes', 'single-family detached homes', 'single family lots',
+                 'single-family attached units', 'multifamily units', 'multi-family apartments', 'apartment units',
+                 'apartments', 'condominiums', 'condos', 'duplexes', 'duplex lots', 'homes', 'MF units', 'S-F lots']
+FILLER = ['phase', 'two', 'new', 'proposed', 'residential', 'dwelling', 'additional', 'mixed-use', 'affordable',
+          'rental', 'story', 'building', 'buildings', 'with', 'and', 'of', 'the', 'along', 'road', 'including']
+TEMPLATES = [
+    'Site plan for {n} {h}',
+    'Preliminary plat for {n} {h} and {n2} {h2}',
+    'Rezoning to allow up to {n} {h} and {sf} SF of commercial space',
+    'Major site plan: {f} {f2} {h} ({n} units)',
+    '{h} ({n} lots)',
+    'Construct {n} {f} {h}, {n2} {h2} and a {sf} square foot clubhouse',
+    '{h} - {n} {f} {f2} {f3} {f4} {f5} {f6}',
+    'Mixed use development with {n} {h}, {sf} sq. ft. retail and {n2} {f} {h2}',
+    'Addition of {sf} square feet to existing {f} building',
+    'Expand storage facility by {sf} sqft',
+    'Subdivision of {n} {h} along {f} road, phase {p}',
+    'Tenant upfit of existing {f} building',
+]
+
+
+def description_corpus(n, repeat=0.3, seed=0):
+    '''
+    n development descriptions in the style of Development_Cases.shp A_DESCRIPT.
+    A share `repeat` of them repeats an earlier description, as amended or re-filed cases do.
+    '''
+    rng = np.random.default_rng(seed)
+    descriptions = []
+    for _ in range(n):
+        if descriptions and rng.random() < repeat:
+            descriptions.append(descriptions[rng.integers(len(descriptions))])
+            continue
+        template = TEMPLATES[rng.integers(len(TEMPLATES))]
+        words = {f'f{k}' if k else 'f': FILLER[rng.integers(len(FILLER))] for k in range(7)}
+        descriptions.append(template.format(
+            n=int(rng.integers(2, 400)), n2=int(rng.integers(2, 120)), p=int(rng.integers(1, 5)),
+            sf=f'{int(rng.integers(1, 90)) * 1000:,}',
+            h=HOUSING_WORDS[rng.integers(len(HOUSING_WORDS))], h2=HOUSING_WORDS[rng.integers(len(HOUSING_WORDS))],
+            **words))
+    return descriptions
+
+
+CASE_TYPES = ['PL_MINSP', 'PL_SSP_SM', 'PL_MAJSP', 'PL_PPA', 'PL_MAJPP', 'PL_ZMA', 'PL_SUP', 'PL_VAR']
+CASE_STATUSES = ['APPR', 'PEND', 'UR', 'WITH', 'VOID', 'DEN', 'EXP']
+
+
+def development_cases(geometry, seed=0):
+    '''
+    Attribute table in the layout of Development_Cases.shp (A_NUMBER, A_TYPE, A_STATUS, A_STATUS_D, A_DESCRIPT)
+    for the given development geometries, e.g. the points of the shipped shapefile, whose .dbf is missing.
+    '''
+    rng = np.random.default_rng(seed)
+    n = len(geometry)
+    days = rng.integers(0, 11 * 365, n)
+    return gpd.GeoDataFrame({
+        'A_NUMBER': [f'D{1500000 + k:07d}' for k in range(n)],
+        'A_TYPE': rng.choice(CASE_TYPES, n),
+        'A_STATUS': rng.choice(CASE_STATUSES, n, p=[0.45, 0.2, 0.15, 0.05, 0.05, 0.05, 0.05]),
+        'A_STATUS_D': (pd.Timestamp('2015-01-01') + pd.to_timedelta(days, unit='D')).strftime('%Y-%m-%d'),
+        'A_DESCRIPT': description_corpus(n, seed=seed),
+    }, geometry=geometry.values, crs=geometry.crs)
+
+
+def enrollment_table(pu_ids, years=(2022, 2023, 2024), seed=0):
+    '''
+    Current enrollment by planning unit, grade (0-12) and fall year, in the layout the Residential Filter reads
+    (pu_2324_848, grade, fall_year, basez), with a few planning unit/grade pairs left out.
+    '''
+    rng = np.random.default_rng(seed)
+    pu_ids = np.unique(np.asarray(pu_ids))
+    size = rng.gamma(2, 5, len(pu_ids))
+    rows = [(pu, grade, year, int(rng.poisson(size[k]))) for k, pu in enumerate(pu_ids)
+            for grade in range(13) for year in years if rng.random() > 0.05]
+    return pd.DataFrame(rows, columns=['pu_2324_848', 'grade', 'fall_year', 'basez'])
+
+
+# Durham at 1x scale: the extent of hs_full_geo (EPSG:3857), its planning units and the shapefile's development cases
+DURHAM_BOUNDS = (-8796054.4, 4281814.7, -8760767.9, 4333600.7)
+DURHAM_UNITS = 851
+DURHAM_CASES = 21493
+
+
+def planning_unit_grid(n, bounds=DURHAM_BOUNDS, seed=0):
+    '''
+    n square planning units tiling bounds (EPSG:3857) row by row, in the layout of hs_full_geo: pu_2324_84 from 1,
+    Region (Central around the middle, the others by direction from it, in about Durham's shares), basez with
+    Durham's mean and student_gen, which is zero for most units and large for a few.
+    '''
+    rng = np.random.default_rng(seed)
+    xmin, ymin, xmax, ymax = bounds
+    side = math.sqrt((xmax - xmin) * (ymax - ymin) / n)
+    cols = math.ceil((xmax - xmin) / side)
+    cell = np.arange(n)
+    x0 = xmin + (cell % cols) * side
+    y0 = ymin + (cell // cols) * side
+
+    # direction and scaled distance of each unit from the middle of the extent
+    dx = (x0 + side / 2 - (xmin + xmax) / 2) / (xmax - xmin)
+    dy = (y0 + side / 2 - (ymin + ymax) / 2) / (ymax - ymin)
+    # sectors counterclockwise from East, sized to Durham's region shares
+    angle = (np.degrees(np.arctan2(dy, dx)) + 40) % 360
+    region = np.array(['East', 'North', 'Southwest', 'Southeast'])[np.searchsorted([79, 196, 290], angle, side='right')]
+    region = np.where(np.hypot(dx, dy) < 0.2, 'Central', region)
+
+    return gpd.GeoDataFrame({
+        'pu_2324_84': cell + 1,
+        'Region': region,
+        'basez': rng.poisson(8.3, n),
+        'student_gen': np.where(rng.random(n) < 0.2, rng.integers(1, 60, n), 0),
+    }, geometry=shapely.box(x0, y0, x0 + side, y0 + side), crs='EPSG:3857')
+
+
+def region_polygons(units):
+    # the grid's regions as polygons, in the layout of durham_regions.geojson
+    return units[['Region', 'geometry']].dissolve(by='Region').reset_index().rename(columns={'Region': 'region'})
+
+
+def school_set(units, n, sgr=30, seed=0):
+    '''
+    n schools at the centroids of random non-Central planning units, with name, pu_2324_84 and capacity. The
+    capacities share the students (basez plus sgr percent of student_gen) evenly between the schools and one new
+    school, so the gravity and CFLP models have a feasible capacity range to balance to.
+    '''
+    rng = np.random.default_rng(seed)
+    rows = rng.choice(np.flatnonzero(units['Region'].to_numpy() != 'Central'), n, replace=False)
+    students = units['basez'].sum() + sgr / 100 * units['student_gen'].sum()
+    return gpd.GeoDataFrame({
+        'name': [f'School {k + 1}' for k in range(n)],
+        'pu_2324_84': units['pu_2324_84'].to_numpy()[rows],
+        'capacity': int(students / (n + 1)),
+    }, geometry=units.geometry.iloc[rows].centroid.values, crs=units.crs)
+
+
+def development_points(n, bounds=DURHAM_BOUNDS, seed=0):
+    # n random development points in bounds (EPSG:3857) with a development_cases attribute table
+    rng = np.random.default_rng(seed)
+    xmin, ymin, xmax, ymax = bounds
+    points = gpd.GeoSeries(gpd.points_from_xy(rng.uniform(xmin, xmax, n), rng.uniform(ymin, ymax, n)), crs='EPSG:3857')
+    return development_cases(points, seed=seed)
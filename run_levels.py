@@ -0,0 +1,125 @@
+'''
+Builds the ES, MS and HS planning unit files and runs the CFLP and gravity models for every level in one process.
+The planning units are read and reprojected once. Their spatial index, centroids and distance matrices are built
+once in a GeometryContext (Shared/geometry_context.py) and shared by the Residential Filter and every model.
+
+The models of each level are set in a JSON config (levels.json has the high school setup). Levels without an
+entry only get their planning unit file.
+
+Run from the repository root, e.g.:
+    python run_levels.py --developments durham_developments/Development_Cases.shp --enrollment enrollment_by_pu.csv
+'''
+import argparse
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+for folder in ('Shared', 'Residential Filter', 'CFLP Model', 'Gravity Model'):
+    sys.path.append(os.path.join(ROOT, folder))
+from pipeline import LEVELS, ResidentialPipeline, export
+from CFLP import CFLPModel
+from gravity_engine import CandidateScorer
+from stage_io import read_stage
+from sweep import sweep
+
+
+def run_cflp(level, units, config, context, data_dir, out_dir):
+    '''
+    One CFLP solve per SGR level in config['sgr_levels'] (default none). config['schools'] is the schools file in
+    data_dir, gap and time_limit go to optimize, existing_sites is {pu_2324_84: capacity} and every other key is
+    passed to CFLPModel (k_nearest, backend, screen, site_capacity, new_sites, ...).
+    '''
+    config = dict(config)
+    schools = read_stage(os.path.join(data_dir, config.pop('schools')))
+    sgr_levels = config.pop('sgr_levels', ['none'])
+    solve = {key: config.pop(key) for key in ('gap', 'time_limit') if key in config}
+    if 'existing_sites' in config:
+        config['existing_sites'] = {int(pu): capacity for pu, capacity in config['existing_sites'].items()}
+
+    for sgr_level in sgr_levels:
+        model = CFLPModel(None, None, sgr_level, context=context, **config)
+        model.load_data(pu=units, schools=schools)
+        model.preprocess()
+        model.build_model()
+        model.optimize(**solve)
+        if model.solution is None:
+            print(f'{level} CFLP ({sgr_level} SGR): no solution found')
+            continue
+        name = f'{level}_CFLP_{int(model.sgr_level * 100)}SGR'
+        model.export_results(out_dir, name=name)
+        print(f"{level} CFLP ({sgr_level} SGR): objective {model.solution['objective']:.1f}, "
+              f"facilities {sorted(model.solution['facilities'])}. Output saved to {os.path.join(out_dir, name)}")
+
+
+def run_gravity(level, units, config, context, data_dir, out_dir, processes=None):
+    '''
+    Score every candidate planning unit (or those in config['region']) as the site of a new school, as sweep.py does.
+    config: schools (names in schools_file), capacities (in order, ending with the new school), sgr, lower, upper
+    '''
+    schools_file = os.path.join(data_dir, config.get('schools_file', 'dps_base_2324.geojson'))
+    dps_base = read_stage(schools_file, crs='EPSG:3857')
+    schools = dps_base.set_index('name').loc[config['schools'], 'geometry']
+    capacities = config['capacities']
+    if len(capacities) != len(schools) + 1:
+        raise ValueError(f'{level}: expected one capacity per school plus one for the new school')
+
+    candidates = units.index
+    if config.get('region'):
+        candidates = candidates[units['Region'].isin(config['region'])]
+
+    scorer = CandidateScorer(units, schools, capacities, context=context)
+    table = sweep(scorer, units, config.get('sgr', 0), config.get('lower', 70), config.get('upper', 110),
+                  candidates=units.index.get_indexer(candidates), processes=processes,
+                  method=config.get('method', 'fixed'))
+    path = os.path.join(out_dir, f'{level}_sweep_results.csv')
+    table.to_csv(path, index=False)
+    print(f'{level} gravity: scored {len(table)} candidates ({table["feasible"].sum()} feasible). '
+          f'Output saved to {path}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--developments', required=True, help='Durham developments shapefile')
+    parser.add_argument('--enrollment', required=True,
+                        help='current enrollment by planning unit, grade and fall year')
+    parser.add_argument('--sgr', default='sgr_tables_htype_reg.csv', help='SGRs by housing type and region')
+    parser.add_argument('--pu', default='pu_2324_SPLIT.geojson', help='planning units')
+    parser.add_argument('--regions', default='durham_regions.geojson', help='Durham County regions')
+    parser.add_argument('--data-dir', default='data', help='folder the file names above are relative to')
+    parser.add_argument('--config', default='levels.json', help='models to run for each level (JSON)')
+    parser.add_argument('--levels', nargs='+', default=list(LEVELS), choices=LEVELS)
+    parser.add_argument('--rates', default='k12', choices=['k12', 'level'],
+                        help="student generation rates: K-12 for every level, or each level's own rates")
+    parser.add_argument('--processes', type=int, help='worker processes for parsing and the gravity sweeps')
+    parser.add_argument('--out-dir', default='outputs', help='outputs go in a subfolder per stage')
+    args = parser.parse_args()
+
+    with open(args.config) as f:
+        config = json.load(f)
+
+    start = time.perf_counter()
+    pipeline = ResidentialPipeline(args.developments, args.sgr, args.pu, args.enrollment, regions_path=args.regions,
+                                   data_dir=args.data_dir, rates=args.rates, processes=args.processes).load()
+    outputs = pipeline.run(args.levels)
+    stages = ('Residential Filter', 'CFLP Model', 'Gravity Model')
+    out_dirs = {stage: os.path.join(args.out_dir, stage) for stage in stages}
+    for out_dir in out_dirs.values():
+        os.makedirs(out_dir, exist_ok=True)
+    for path in export(outputs, out_dirs['Residential Filter']):
+        print(f'Output saved to {path}')
+
+    # every model below takes its planning unit geometry, centroids and distances from the pipeline's context
+    for level, units in outputs.items():
+        models = config.get(level, {})
+        if 'cflp' in models:
+            run_cflp(level, units, models['cflp'], pipeline.context, args.data_dir, out_dirs['CFLP Model'])
+        if 'gravity' in models:
+            run_gravity(level, units, models['gravity'], pipeline.context, args.data_dir, out_dirs['Gravity Model'],
+                        processes=args.processes)
+    print(f'Done in {time.perf_counter() - start:.1f} s')
+
+
+if __name__ == '__main__':
+    main()